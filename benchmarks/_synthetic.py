@@ -0,0 +1,188 @@
+# -*- coding:utf8 -*-
+"""Helpers for building synthetic uTensorGraph for benchmarking
+"""
+import numpy as np
+import tensorflow as tf
+
+from utensor_cgen.ir import OperationInfo, TensorInfo, uTensorGraph
+
+__all__ = ['make_synthetic_ugraph', 'make_mlp_graph_def', 'make_synthetic_graph_def',
+           'make_dropout_mlp_graph_def', 'make_const_chain_mlp_graph_def',
+           'make_inception_graph_def', 'make_frozen_mlp_graph_def',
+           'make_redundant_mlp_graph_def']
+
+
+def make_synthetic_ugraph(num_ops, fan_in=2, seed=None):
+  """Build a random DAG of `num_ops` Add-like ops
+
+  Each op consumes the outputs of up to `fan_in` randomly picked
+  previous ops, the last op is the only output node.
+  """
+  rng = np.random.RandomState(seed)
+  ugraph = uTensorGraph()
+  ugraph._backend = 'tensorflow'
+  dtype = np.dtype('float32')
+  out_tensors = []
+  for i in range(num_ops):
+    op_name = u'op_{}'.format(i)
+    if i == 0:
+      in_tensors = []
+    else:
+      n_inputs = min(fan_in, i)
+      in_idxs = rng.choice(i, size=n_inputs, replace=False)
+      # keep the graph connected: always consume the previous op
+      in_idxs[0] = i - 1
+      in_tensors = [out_tensors[idx] for idx in in_idxs]
+    out_tensor = TensorInfo(name=u'{}:0'.format(op_name),
+                            op_name=op_name,
+                            dtype=dtype,
+                            shape=[1],
+                            ugraph=ugraph)
+    out_tensors.append(out_tensor)
+    OperationInfo(name=op_name,
+                  input_tensors=in_tensors,
+                  output_tensors=[out_tensor],
+                  op_type='Const' if i == 0 else 'Add',
+                  backend='tensorflow',
+                  ugraph=ugraph)
+  ugraph.output_nodes = [u'op_{}'.format(num_ops - 1)]
+  # ops are created in topological order
+  ugraph.topo_order = [u'op_{}'.format(i) for i in range(num_ops)]
+  return ugraph
+
+
+def make_mlp_graph_def(num_layers=4, width=1024):
+  graph = tf.Graph()
+  with graph.as_default():
+    x = tf.placeholder(dtype=tf.float32, shape=[1, width], name='x')
+    for i in range(num_layers):
+      weight = tf.constant(np.random.randn(width, width),
+                           dtype=tf.float32,
+                           name='weight_{}'.format(i))
+      bias = tf.constant(np.random.randn(width),
+                         dtype=tf.float32,
+                         name='bias_{}'.format(i))
+      x = tf.nn.relu(tf.matmul(x, weight) + bias, name='relu_{}'.format(i))
+  return graph.as_graph_def(), [x.op.name]
+
+
+def make_synthetic_graph_def(num_ops, fan_in=2, seed=None):
+  """Build a GraphDef of a random DAG of `num_ops` Add ops fed by one Const
+  """
+  rng = np.random.RandomState(seed)
+  graph_def = tf.GraphDef()
+  dtype_attr = tf.AttrValue(type=tf.float32.as_datatype_enum)
+  graph_def.node.add(name='op_0',
+                     op='Const',
+                     attr={'dtype': dtype_attr,
+                           'value': tf.AttrValue(tensor=tf.make_tensor_proto(1.0))})
+  for i in range(1, num_ops):
+    in_idxs = rng.choice(i, size=min(fan_in, i), replace=False)
+    in_idxs[0] = i - 1
+    graph_def.node.add(name='op_{}'.format(i),
+                       op='AddN',
+                       input=['op_{}'.format(idx) for idx in in_idxs],
+                       attr={'T': dtype_attr,
+                             'N': tf.AttrValue(i=len(in_idxs))})
+  return graph_def, ['op_{}'.format(num_ops - 1)]
+
+
+def make_dropout_mlp_graph_def(num_layers=100, width=16):
+  """MLP with a dropout name scope after each layer, all of them
+  sharing one keep_prob placeholder
+  """
+  graph = tf.Graph()
+  with graph.as_default():
+    x = tf.placeholder(dtype=tf.float32, shape=[1, width], name='x')
+    keep_prob = tf.placeholder(dtype=tf.float32, name='keep_prob')
+    for i in range(num_layers):
+      weight = tf.constant(np.random.randn(width, width),
+                           dtype=tf.float32,
+                           name='weight_{}'.format(i))
+      x = tf.nn.relu(tf.matmul(x, weight), name='relu_{}'.format(i))
+      x = tf.nn.dropout(x, keep_prob, name='dropout_{}'.format(i))
+    y = tf.identity(x, name='y')
+  return graph.as_graph_def(), [y.op.name]
+
+
+def make_const_chain_mlp_graph_def(num_layers=10, width=64):
+  """MLP with weights computed from constants by
+  Reshape -> Transpose -> Mul, as exported by some frameworks
+  """
+  graph = tf.Graph()
+  with graph.as_default():
+    x = tf.placeholder(dtype=tf.float32, shape=[1, width], name='x')
+    for i in range(num_layers):
+      weight = tf.constant(np.random.randn(width * width),
+                           dtype=tf.float32,
+                           name='weight_{}'.format(i))
+      weight = tf.transpose(tf.reshape(weight, [width, width]))
+      weight = tf.multiply(weight, 0.5)
+      x = tf.nn.relu(tf.matmul(x, weight), name='relu_{}'.format(i))
+  return graph.as_graph_def(), [x.op.name]
+
+
+def make_inception_graph_def(num_blocks=4, width=64, seed=None):
+  """Blocks of parallel branches of different depths and widths whose
+  outputs are concatenated, the input of a block is consumed by all
+  of its branches. The first branch has the largest output, the others
+  have larger intermediates
+  """
+  rng = np.random.RandomState(seed)
+  graph = tf.Graph()
+  with graph.as_default():
+    x = tf.placeholder(dtype=tf.float32, shape=[1, width], name='x')
+    for i in range(num_blocks):
+      branches = []
+      for depth, hidden_width, out_width in [(1, 0, 8 * width), (2, 16 * width, 8),
+                                             (3, 4 * width, 16), (2, 8 * width, 8)]:
+        h = x
+        in_width = width
+        for j in range(depth):
+          next_width = out_width if j == depth - 1 else hidden_width
+          weight = tf.constant(rng.randn(in_width, next_width), dtype=tf.float32)
+          h = tf.nn.relu(tf.matmul(h, weight))
+          in_width = next_width
+        branches.append(h)
+      x = tf.concat(branches, axis=1)
+      weight = tf.constant(rng.randn(8 * width + 32, width), dtype=tf.float32)
+      x = tf.matmul(x, weight, name='block_{}'.format(i))
+  return graph.as_graph_def(), [x.op.name]
+
+
+def make_frozen_mlp_graph_def(num_layers=10, width=64):
+  """MLP as exported from a frozen training graph: weights read through
+  Identity ops, StopGradient and shape preserving Reshape ops between
+  layers
+  """
+  graph = tf.Graph()
+  with graph.as_default():
+    x = tf.placeholder(dtype=tf.float32, shape=[1, width], name='x')
+    for i in range(num_layers):
+      weight = tf.constant(np.random.randn(width, width),
+                           dtype=tf.float32,
+                           name='weight_{}'.format(i))
+      weight = tf.identity(weight, name='weight_{}/read'.format(i))
+      x = tf.nn.relu(tf.matmul(x, weight), name='relu_{}'.format(i))
+      x = tf.stop_gradient(x)
+      x = tf.reshape(x, [1, width])
+    y = tf.identity(x, name='y')
+  return graph.as_graph_def(), [y.op.name]
+
+
+def make_redundant_mlp_graph_def(num_layers=10, width=64):
+  """MLP whose layers compute the same product twice, once with the
+  weight read through an Identity op and scaled by a constant product
+  """
+  graph = tf.Graph()
+  with graph.as_default():
+    x = tf.placeholder(dtype=tf.float32, shape=[1, width], name='x')
+    for i in range(num_layers):
+      weight = tf.constant(np.random.randn(width, width),
+                           dtype=tf.float32,
+                           name='weight_{}'.format(i))
+      scale = tf.multiply(tf.constant(2.0), tf.constant(0.5))
+      a = tf.matmul(x, tf.identity(weight, name='weight_{}/read'.format(i))) * scale
+      b = tf.matmul(x, weight) * tf.constant(1.0)
+      x = tf.nn.relu(a + b, name='relu_{}'.format(i))
+  return graph.as_graph_def(), [x.op.name]
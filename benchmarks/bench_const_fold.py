@@ -0,0 +1,34 @@
+# -*- coding:utf8 -*-
+"""Ops and bytes of runtime work removed by constant folding on an MLP
+whose weights are computed from constants
+
+usage: python benchmarks/bench_const_fold.py [NUM_LAYERS [WIDTH]]
+"""
+import sys
+import time
+
+from _synthetic import make_const_chain_mlp_graph_def
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import ConstFoldTransformer
+
+
+def _runtime_ops(ugraph):
+  return sum(op.op_type not in ['Const', 'Placeholder']
+             for op in ugraph.ops_info.values())
+
+
+def main(num_layers=10, width=64):
+  graph_def, output_nodes = make_const_chain_mlp_graph_def(num_layers, width)
+  ugraph = uTensorGraph(graph_def, output_nodes, importer='fast')
+  transformer = ConstFoldTransformer()
+  start = time.time()
+  new_ugraph = transformer.transform(ugraph)
+  duration = time.time() - start
+  print('runtime ops: {} -> {}'.format(_runtime_ops(ugraph), _runtime_ops(new_ugraph)))
+  print('constfold: {:.4f}s, {ops_folded} ops folded, {bytes_removed} bytes removed, '
+        '{const_bytes} bytes of new constants'.format(duration, **transformer.fold_stats))
+
+
+if __name__ == '__main__':
+  args = [int(arg) for arg in sys.argv[1:3]]
+  main(*args)
@@ -0,0 +1,43 @@
+# -*- coding:utf8 -*-
+"""Consumer lookup: maintained index vs. full graph scan
+
+usage: python benchmarks/bench_consumer_index.py [NUM_OPS ...]
+"""
+import sys
+import time
+
+from _synthetic import make_synthetic_ugraph
+
+
+def _scan_output_nodes(op_info):
+  # the lookup OperationInfo.output_nodes used to do
+  ugraph = op_info.ugraph
+  out_ops = []
+  for op in ugraph.ops:
+    for in_tensor in op.input_tensors:
+      if in_tensor.op_name == op_info.name and op.name not in out_ops:
+        out_ops.append(op.name)
+        break
+  return [ugraph.ops_info[name] for name in out_ops]
+
+
+def main(sizes):
+  for num_ops in sizes:
+    ugraph = make_synthetic_ugraph(num_ops, seed=0)
+    ops = list(ugraph.ops_info.values())
+    start = time.time()
+    for op in ops:
+      op.output_nodes
+    indexed = time.time() - start
+    # a full scan is quadratic, only time a sample of ops
+    sample = ops[:100]
+    start = time.time()
+    for op in sample:
+      _scan_output_nodes(op)
+    scan = (time.time() - start) * len(ops) / len(sample)
+    print('{:>8d} ops: indexed {:.4f}s, scan (extrapolated) {:.2f}s'
+          .format(num_ops, indexed, scan))
+
+
+if __name__ == '__main__':
+  main([int(arg) for arg in sys.argv[1:]] or [10000, 50000])
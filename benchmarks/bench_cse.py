@@ -0,0 +1,59 @@
+# -*- coding:utf8 -*-
+"""Ops removed by common subexpression elimination on the bundled
+models (float and quantized), and its duration on synthetic graphs of
+growing sizes
+
+usage: python benchmarks/bench_cse.py
+"""
+import os
+import time
+
+import tensorflow as tf
+
+from _synthetic import make_synthetic_graph_def
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import CSETransformer, TransformerPipeline
+
+_TESTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'tests')
+_MODELS = [(os.path.join(_TESTS_DIR, 'deep_mlp', 'simple_mnist.pb'), ['y_pred']),
+           (os.path.join(_TESTS_DIR, 'deep_cnn', 'cifar10_cnn.pb'), ['pred'])]
+
+
+def _load_batch_one(pb_file):
+  graph_def = tf.GraphDef()
+  with open(pb_file, 'rb') as fid:
+    graph_def.ParseFromString(fid.read())
+  for node in graph_def.node:
+    if node.op == 'Placeholder' and node.attr['shape'].shape.dim:
+      node.attr['shape'].shape.dim[0].size = 1
+  return graph_def
+
+
+def _runtime_ops(ugraph):
+  return sum(op.op_type not in ['Const', 'Placeholder']
+             for op in ugraph.ops_info.values())
+
+
+def main():
+  for pb_file, output_nodes in _MODELS:
+    print(os.path.basename(pb_file))
+    for label, methods in [('float', []), ('quantized', ['dropout', 'quantize'])]:
+      ugraph = TransformerPipeline(methods, {}).transform(
+        uTensorGraph(_load_batch_one(pb_file), output_nodes))
+      transformer = CSETransformer()
+      new_ugraph = transformer.transform(ugraph)
+      print('  {}: ops {} -> {}, runtime ops {} -> {}, {bytes_removed} bytes of tensors '
+            'removed'.format(label, len(ugraph.ops_info), len(new_ugraph.ops_info),
+                             _runtime_ops(ugraph), _runtime_ops(new_ugraph),
+                             **transformer.cse_stats))
+  for num_ops in [5000, 10000, 20000, 40000]:
+    graph_def, output_nodes = make_synthetic_graph_def(num_ops, fan_in=1, seed=0)
+    ugraph = uTensorGraph(graph_def, output_nodes, importer='fast')
+    transformer = CSETransformer(prune_graph=False)
+    start = time.time()
+    transformer.transform(ugraph)
+    print('{} ops: {:.4f}s'.format(num_ops, time.time() - start))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,31 @@
+# -*- coding:utf8 -*-
+"""Time of removing dropout from MLPs with a dropout name scope per layer
+
+usage: python benchmarks/bench_dropout.py [NUM_LAYERS ...]
+"""
+import sys
+import time
+
+from _synthetic import make_dropout_mlp_graph_def
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import DropoutTransformer
+
+
+def main(*layers, **kwargs):
+  repeat = kwargs.get('repeat', 5)
+  for num_layers in layers or [100, 300, 1000]:
+    graph_def, output_nodes = make_dropout_mlp_graph_def(num_layers)
+    ugraph = uTensorGraph(graph_def, output_nodes, importer='fast')
+    transformer = DropoutTransformer()
+    durations = []
+    for _ in range(repeat):
+      start = time.time()
+      new_ugraph = transformer.transform(ugraph)
+      durations.append(time.time() - start)
+    print('{} dropout scopes, {} ops: {:.3f}s (best of {}), {} ops left'
+          .format(num_layers, len(ugraph.ops_info), min(durations), repeat,
+                  len(new_ugraph.ops_info)))
+
+
+if __name__ == '__main__':
+  main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,49 @@
+# -*- coding:utf8 -*-
+"""Size of the GraphDef and peak memory of loading a graph with its
+weights inside the GraphDef vs in an external weight file
+
+usage: python benchmarks/bench_external_weights.py [NUM_LAYERS [WIDTH]]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from _synthetic import make_mlp_graph_def
+from tensorflow.core.framework.graph_pb2 import GraphDef
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.ir.external_weights import externalize_weights
+
+
+def _load(name, pb_bytes, output_nodes, weight_file=None):
+  tracemalloc.start()
+  start = time.time()
+  graph_def = GraphDef()
+  graph_def.ParseFromString(pb_bytes)
+  ugraph = uTensorGraph(graph_def, output_nodes, weight_file=weight_file)
+  load_duration = time.time() - start
+  # what the code generator does when emitting the weights
+  for op_info in ugraph.ops_info.values():
+    if op_info.op_type == 'Const':
+      op_info.op_attr['value'].value.np_array.tobytes()
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  print('{}: pb {:.1f} MB, load {:.3f}s, peak allocated: {:.1f} MB'
+        .format(name, len(pb_bytes) / 2.**20, load_duration, peak / 2.**20))
+
+
+def main(num_layers=8, width=1024):
+  graph_def, output_nodes = make_mlp_graph_def(num_layers, width)
+  tmp_dir = tempfile.mkdtemp()
+  weight_file = os.path.join(tmp_dir, 'weights.bin')
+  ext_graph_def = externalize_weights(graph_def, weight_file)
+  print('weight file: {:.1f} MB'.format(os.path.getsize(weight_file) / 2.**20))
+  _load('embedded', graph_def.SerializeToString(), output_nodes)
+  _load('external', ext_graph_def.SerializeToString(), output_nodes, weight_file)
+  os.remove(weight_file)
+  os.rmdir(tmp_dir)
+
+
+if __name__ == '__main__':
+  main(*[int(arg) for arg in sys.argv[1:]])
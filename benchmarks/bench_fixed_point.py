@@ -0,0 +1,40 @@
+# -*- coding:utf8 -*-
+"""Simplification passes run once in a given order versus iterated to a
+fixed point, on an MLP where each pass exposes work for the others
+
+usage: python benchmarks/bench_fixed_point.py [NUM_LAYERS [WIDTH]]
+"""
+import sys
+import time
+
+from _synthetic import make_redundant_mlp_graph_def
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import TransformerPipeline
+
+
+def _runtime_ops(ugraph):
+  return sum(op.op_type not in ['Const', 'Placeholder']
+             for op in ugraph.ops_info.values())
+
+
+def main(num_layers=100, width=16):
+  graph_def, output_nodes = make_redundant_mlp_graph_def(num_layers, width)
+  ugraph = uTensorGraph(graph_def, output_nodes)
+  print('runtime ops: {}'.format(_runtime_ops(ugraph)))
+  for methods in [['cse', 'constfold', 'identity'], ['cse+constfold+identity']]:
+    pipeline = TransformerPipeline(methods, {})
+    start = time.time()
+    new_ugraph = pipeline.transform(ugraph)
+    duration = time.time() - start
+    print('{}: runtime ops {}, {:.4f}s'.format(','.join(methods), _runtime_ops(new_ugraph),
+                                               duration))
+    for stats in pipeline.stats:
+      for idx, iteration in enumerate(stats.get('iterations', [])):
+        print('  iteration {}: {}'.format(idx + 1, ', '.join(
+          '{}{}'.format(pass_stats['method'], ' (changed)' if pass_stats['changed'] else '')
+          for pass_stats in iteration)))
+
+
+if __name__ == '__main__':
+  args = [int(arg) for arg in sys.argv[1:3]]
+  main(*args)
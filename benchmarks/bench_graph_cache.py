@@ -0,0 +1,47 @@
+# -*- coding:utf8 -*-
+"""Time to generate code for the bundled models without and with a
+transformed graph in the cache
+
+usage: python benchmarks/bench_graph_cache.py
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from utensor_cgen.code_generator import CodeGenerator
+
+_TESTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'tests')
+_MODELS = [(os.path.join(_TESTS_DIR, 'deep_mlp', 'simple_mnist.pb'), ['y_pred']),
+           (os.path.join(_TESTS_DIR, 'deep_cnn', 'cifar10_cnn.pb'), ['pred'])]
+_METHODS = ['dropout', 'quantize', 'refcnt']
+
+
+def _generate(pb_file, output_nodes, out_dir, cache_dir):
+  idx_dir = os.path.join(out_dir, 'constants')
+  src_fname = os.path.join(out_dir, 'model.cpp')
+  generator = CodeGenerator(pb_file, idx_dir, '/fs/constants', _METHODS, output_nodes,
+                            cache_dir=cache_dir)
+  start = time.time()
+  generator.generate(src_fname)
+  return time.time() - start, generator.graph_cache
+
+
+def main():
+  for pb_file, output_nodes in _MODELS:
+    out_dir = tempfile.mkdtemp()
+    cache_dir = tempfile.mkdtemp()
+    try:
+      cold, _ = _generate(pb_file, output_nodes, out_dir, cache_dir)
+      warm, cache = _generate(pb_file, output_nodes, out_dir, cache_dir)
+      cache_bytes = sum(os.path.getsize(os.path.join(cache_dir, fname))
+                        for fname in os.listdir(cache_dir))
+      print('{}: {:.3f}s cold, {:.3f}s cached ({} hit, {} bytes in cache)'.format(
+        os.path.basename(pb_file), cold, warm, cache.hits, cache_bytes))
+    finally:
+      shutil.rmtree(out_dir)
+      shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+  main()
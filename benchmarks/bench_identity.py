@@ -0,0 +1,36 @@
+# -*- coding:utf8 -*-
+"""Ops and tensor allocations removed by the identity transform on an MLP
+exported from a frozen training graph, and its duration on graphs of
+growing sizes
+
+usage: python benchmarks/bench_identity.py
+"""
+import time
+
+from _synthetic import make_frozen_mlp_graph_def
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import IdentityTransformer
+
+
+def _runtime_ops(ugraph):
+  return sum(op.op_type not in ['Const', 'Placeholder']
+             for op in ugraph.ops_info.values())
+
+
+def main():
+  for num_layers in [10, 500, 1000, 2000]:
+    graph_def, output_nodes = make_frozen_mlp_graph_def(num_layers, width=16)
+    # shapes are inferred by tensorflow
+    ugraph = uTensorGraph(graph_def, output_nodes, importer='tf')
+    transformer = IdentityTransformer()
+    start = time.time()
+    new_ugraph = transformer.transform(ugraph)
+    duration = time.time() - start
+    print('{} layers: runtime ops {} -> {}, {tensors_removed} tensors ({bytes_removed} bytes) '
+          'not allocated, {:.4f}s'.format(num_layers, _runtime_ops(ugraph),
+                                          _runtime_ops(new_ugraph), duration,
+                                          **transformer.removal_stats))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,37 @@
+# -*- coding:utf8 -*-
+"""Compare the 'tf' and 'fast' GraphDef importers of uTensorGraph
+
+usage: python benchmarks/bench_importer.py [NUM_OPS]
+"""
+import os
+import sys
+import time
+
+import tensorflow as tf
+
+from _synthetic import make_synthetic_graph_def
+from utensor_cgen.ir import uTensorGraph
+
+_CIFAR_PB = os.path.join(os.path.dirname(__file__), '..',
+                         'tests', 'deep_cnn', 'cifar10_cnn.pb')
+
+
+def _time_importers(name, graph_def, output_nodes):
+  for importer in uTensorGraph.TF_IMPORTERS:
+    start = time.time()
+    uTensorGraph(graph_def, output_nodes, importer=importer)
+    print('{}: {:>5s} importer {:.3f}s'.format(name, importer, time.time() - start))
+
+
+def main(num_ops=50000):
+  graph_def = tf.GraphDef()
+  with open(_CIFAR_PB, 'rb') as fid:
+    graph_def.ParseFromString(fid.read())
+  _time_importers('cifar10_cnn.pb', graph_def,
+                  [node.name for node in graph_def.node])
+  graph_def, output_nodes = make_synthetic_graph_def(num_ops, seed=0)
+  _time_importers('synthetic {} ops'.format(num_ops), graph_def, output_nodes)
+
+
+if __name__ == '__main__':
+  main(*[int(arg) for arg in sys.argv[1:]])
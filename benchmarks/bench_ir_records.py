@@ -0,0 +1,62 @@
+# -*- coding:utf8 -*-
+"""Per-node construction cost and memory of IR records
+
+usage: python benchmarks/bench_ir_records.py [NUM_OPS]
+"""
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+
+import numpy as np
+
+from utensor_cgen.ir import OperationInfo, TensorInfo, uTensorGraph
+from utensor_cgen.ir.base import _skip_validation
+
+
+def _build_chain(num_ops):
+  ugraph = uTensorGraph()
+  dtype = np.dtype('float32')
+  in_tensors = []
+  for i in range(num_ops):
+    op_name = u'op_{}'.format(i)
+    out_tensor = TensorInfo(name=u'{}:0'.format(op_name),
+                            op_name=op_name,
+                            dtype=dtype,
+                            shape=[1, 32],
+                            ugraph=ugraph)
+    OperationInfo(name=op_name,
+                  input_tensors=in_tensors,
+                  output_tensors=[out_tensor],
+                  op_type='Identity',
+                  backend='tensorflow',
+                  ugraph=ugraph)
+    in_tensors = [out_tensor]
+  ugraph.output_nodes = [u'op_{}'.format(num_ops - 1)]
+  return ugraph
+
+
+def main(num_ops=50000):
+  start = time.time()
+  ugraph = _build_chain(num_ops)
+  duration = time.time() - start
+  print('construct (validated): {:.2f} us/op'.format(duration * 1e6 / num_ops))
+  start = time.time()
+  with _skip_validation():
+    _build_chain(num_ops)
+  duration = time.time() - start
+  print('construct (trusted):   {:.2f} us/op'.format(duration * 1e6 / num_ops))
+  start = time.time()
+  deepcopy(ugraph)
+  duration = time.time() - start
+  print('deepcopy:              {:.2f} us/op'.format(duration * 1e6 / num_ops))
+  del ugraph
+  tracemalloc.start()
+  ugraph = _build_chain(num_ops)
+  current, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  print('graph memory:          {:.1f} MB'.format(current / 2.**20))
+
+
+if __name__ == '__main__':
+  main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,28 @@
+# -*- coding:utf8 -*-
+"""Time and peak memory of building uTensorGraph from a GraphDef
+
+usage: python benchmarks/bench_load.py [NUM_LAYERS [WIDTH]]
+"""
+import sys
+import time
+import tracemalloc
+
+from _synthetic import make_mlp_graph_def
+from utensor_cgen.ir import uTensorGraph
+
+
+def main(num_layers=8, width=1024):
+  graph_def, output_nodes = make_mlp_graph_def(num_layers, width)
+  print('GraphDef: {:.1f} MB'.format(graph_def.ByteSize() / 2.**20))
+  tracemalloc.start()
+  start = time.time()
+  ugraph = uTensorGraph(graph_def, output_nodes)
+  duration = time.time() - start
+  current, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  print('load: {:.3f}s, peak allocated: {:.1f} MB, retained by the graph: {:.1f} MB'
+        .format(duration, peak / 2.**20, current / 2.**20))
+
+
+if __name__ == '__main__':
+  main(*[int(arg) for arg in sys.argv[1:]])
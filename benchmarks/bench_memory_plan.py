@@ -0,0 +1,31 @@
+# -*- coding:utf8 -*-
+"""Arena size of the static memory plan against allocating every
+intermediate tensor separately
+
+usage: python benchmarks/bench_memory_plan.py [NUM_LAYERS [WIDTH]]
+"""
+import sys
+import time
+
+from _synthetic import make_mlp_graph_def
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.memory import plan_memory
+
+
+def main(num_layers=50, width=256):
+  graph_def, output_nodes = make_mlp_graph_def(num_layers, width)
+  # shapes are inferred by tensorflow
+  ugraph = uTensorGraph(graph_def, output_nodes)
+  start = time.time()
+  plan = plan_memory(ugraph)
+  duration = time.time() - start
+  print('{} tensors planned in {:.4f}s, {} of unknown shapes'.format(
+    len(plan.offsets), duration, len(plan.unplanned)))
+  print('without reuse: {} bytes'.format(plan.total_bytes))
+  print('arena: {} bytes (lower bound {} bytes)'.format(plan.arena_size,
+                                                       plan.peak_live_bytes))
+
+
+if __name__ == '__main__':
+  args = [int(arg) for arg in sys.argv[1:3]]
+  main(*args)
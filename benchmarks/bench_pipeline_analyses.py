@@ -0,0 +1,39 @@
+# -*- coding:utf8 -*-
+"""Wall time of a transformer pipeline with and without caching graph
+analyses, on an MLP with a dropout name scope per layer
+
+usage: python benchmarks/bench_pipeline_analyses.py [NUM_LAYERS [METHOD,METHOD,...]]
+"""
+import sys
+import time
+
+from _synthetic import make_dropout_mlp_graph_def
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import TransformerPipeline
+
+
+def main(num_layers=500, methods=('dropout', 'refcnt', 'inline'), repeat=5):
+  graph_def, output_nodes = make_dropout_mlp_graph_def(num_layers)
+  ugraph = uTensorGraph(graph_def, output_nodes, importer='fast')
+  print('graph: {} ops, pipeline: {}'.format(len(ugraph.ops_info),
+                                             ' -> '.join(methods)))
+  for cache_analyses in [False, True]:
+    pipeline = TransformerPipeline(list(methods), {}, cache_analyses=cache_analyses)
+    durations = []
+    for _ in range(repeat):
+      start = time.time()
+      new_ugraph = pipeline.transform(ugraph)
+      durations.append(time.time() - start)
+    manager = pipeline.analysis_manager
+    print('cache_analyses={}: {:.3f}s (best of {}), analyses computed: {}, reused: {}, '
+          'ops left: {}'.format(cache_analyses, min(durations), repeat,
+                                manager.misses, manager.hits, len(new_ugraph.ops_info)))
+
+
+if __name__ == '__main__':
+  kwargs = {}
+  if len(sys.argv) > 1:
+    kwargs['num_layers'] = int(sys.argv[1])
+  if len(sys.argv) > 2:
+    kwargs['methods'] = sys.argv[2].split(',')
+  main(**kwargs)
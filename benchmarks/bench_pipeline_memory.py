@@ -0,0 +1,35 @@
+# -*- coding:utf8 -*-
+"""Peak memory of running a transformer pipeline on a weight-heavy MLP
+
+usage: python benchmarks/bench_pipeline_memory.py [METHOD,METHOD,...]
+"""
+import sys
+import tracemalloc
+
+from _synthetic import make_mlp_graph_def
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import TransformerPipeline
+
+
+def main(methods):
+  graph_def, output_nodes = make_mlp_graph_def()
+  ugraph = uTensorGraph(graph_def, output_nodes)
+  weight_bytes = sum(op.op_attr['value'].value.np_array.nbytes
+                     for op in ugraph.ops_info.values()
+                     if op.op_type == 'Const')
+  pipeline = TransformerPipeline(methods, {})
+  tracemalloc.start()
+  pipeline.transform(ugraph)
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  print('pipeline: {}'.format(' -> '.join(methods)))
+  print('weights: {:.1f} MB, peak allocated during pipeline: {:.1f} MB'
+        .format(weight_bytes / 2.**20, peak / 2.**20))
+
+
+if __name__ == '__main__':
+  if len(sys.argv) > 1:
+    methods = sys.argv[1].split(',')
+  else:
+    methods = ['dropout', 'quantize', 'refcnt', 'inline']
+  main(methods)
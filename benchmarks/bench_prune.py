@@ -0,0 +1,34 @@
+# -*- coding:utf8 -*-
+"""Pruning time per pipeline stage on an MLP with a dropout name scope
+per layer
+
+usage: python benchmarks/bench_prune.py [NUM_LAYERS [METHOD,METHOD,...]]
+"""
+import sys
+
+from _synthetic import make_dropout_mlp_graph_def
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import TransformerPipeline
+
+
+def main(num_layers=500, methods=('dropout', 'refcnt', 'inline')):
+  graph_def, output_nodes = make_dropout_mlp_graph_def(num_layers)
+  ugraph = uTensorGraph(graph_def, output_nodes, importer='fast')
+  print('graph: {} ops'.format(len(ugraph.ops_info)))
+  pipeline = TransformerPipeline(list(methods), {})
+  pipeline.transform(ugraph)
+  for stats in pipeline.stats:
+    if stats['prune_time'] is None:
+      print('{method}: {time:.4f}s, no pruning'.format(**stats))
+    else:
+      print('{method}: {time:.4f}s, pruning: {prune_time:.4f}s, '
+            '{ops_removed} ops removed'.format(**stats))
+
+
+if __name__ == '__main__':
+  kwargs = {}
+  if len(sys.argv) > 1:
+    kwargs['num_layers'] = int(sys.argv[1])
+  if len(sys.argv) > 2:
+    kwargs['methods'] = sys.argv[2].split(',')
+  main(**kwargs)
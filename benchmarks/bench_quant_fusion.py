@@ -0,0 +1,52 @@
+# -*- coding:utf8 -*-
+"""Ops and intermediate tensor bytes removed by fusing quantized layers
+on the bundled models, with a batch size of 1 as on device
+
+usage: python benchmarks/bench_quant_fusion.py
+"""
+import os
+
+import tensorflow as tf
+
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.memory import peak_live_bytes
+from utensor_cgen.transformer import TransformerPipeline
+
+_TESTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'tests')
+_MODELS = [(os.path.join(_TESTS_DIR, 'deep_mlp', 'simple_mnist.pb'), ['y_pred']),
+           (os.path.join(_TESTS_DIR, 'deep_cnn', 'cifar10_cnn.pb'), ['pred'])]
+
+
+def _load_batch_one(pb_file):
+  graph_def = tf.GraphDef()
+  with open(pb_file, 'rb') as fid:
+    graph_def.ParseFromString(fid.read())
+  for node in graph_def.node:
+    if node.op == 'Placeholder' and node.attr['shape'].shape.dim:
+      node.attr['shape'].shape.dim[0].size = 1
+  return graph_def
+
+
+def _runtime_ops(ugraph):
+  return sum(op.op_type not in ['Const', 'Placeholder']
+             for op in ugraph.ops_info.values())
+
+
+def main():
+  for pb_file, output_nodes in _MODELS:
+    ugraph = uTensorGraph(_load_batch_one(pb_file), output_nodes)
+    quant_ugraph = TransformerPipeline(['dropout', 'quantize'], {}).transform(ugraph)
+    pipeline = TransformerPipeline(['quant_fusion'], {})
+    fused_ugraph = pipeline.transform(quant_ugraph)
+    stats = pipeline.pipeline[0].fusion_stats
+    print(os.path.basename(pb_file))
+    print('  runtime ops: {} -> {}'.format(_runtime_ops(quant_ugraph),
+                                           _runtime_ops(fused_ugraph)))
+    print('  {layers_fused} layers fused, {bytes_removed} bytes of intermediate '
+          'tensors removed'.format(**stats))
+    print('  peak live bytes: {} -> {}'.format(peak_live_bytes(quant_ugraph),
+                                               peak_live_bytes(fused_ugraph)))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,61 @@
+# -*- coding:utf8 -*-
+"""Duration of the quantize transformer against the conversions to a
+GraphDef and back needed by tensorflow TransformGraph
+
+usage: python benchmarks/bench_quantize.py [PB_FILE [OUTPUT_NODE ...]]
+"""
+import os
+import sys
+import time
+
+import tensorflow as tf
+
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import QuantizeTransformer
+
+_MNIST_PB = os.path.join(os.path.dirname(__file__), '..', 'tests', 'deep_mlp', 'simple_mnist.pb')
+
+
+def _best_of(func, repeat=5):
+  durations = []
+  for _ in range(repeat):
+    start = time.time()
+    result = func()
+    durations.append(time.time() - start)
+  return min(durations), result
+
+
+def main(pb_file=_MNIST_PB, output_nodes=('y_pred',)):
+  graph_def = tf.GraphDef()
+  with open(pb_file, 'rb') as fid:
+    graph_def.ParseFromString(fid.read())
+  ugraph = uTensorGraph(graph_def, list(output_nodes))
+  transformer = QuantizeTransformer()
+  duration, new_ugraph = _best_of(lambda: transformer.transform(ugraph))
+  print('quantize: {:.4f}s, {} -> {} ops'.format(duration, len(ugraph.ops_info),
+                                                 len(new_ugraph.ops_info)))
+  print('  {weights_quantized} weights ({weight_bytes_before} -> {weight_bytes_after} bytes), '
+        '{ops_quantized} ops quantized'.format(**transformer.quantize_stats))
+  # lower bound of the TransformGraph path: the graph conversions only
+  quant_graph_def = new_ugraph.graph_def
+  export_time, _ = _best_of(lambda: ugraph.graph_def)
+  import_time, _ = _best_of(lambda: uTensorGraph(quant_graph_def, list(output_nodes)))
+  print('graph_def export + import: {:.4f}s'.format(export_time + import_time))
+  try:
+    from tensorflow.tools.graph_transforms import TransformGraph
+    tf_time, _ = _best_of(lambda: TransformGraph(input_graph_def=ugraph.graph_def,
+                                                 inputs=[],
+                                                 outputs=list(output_nodes),
+                                                 transforms=['quantize_weights',
+                                                             'quantize_nodes']))
+  except (ImportError, NotImplementedError):
+    print('TransformGraph: not available')
+  else:
+    print('TransformGraph: {:.4f}s (+ export and import)'.format(tf_time))
+
+
+if __name__ == '__main__':
+  if len(sys.argv) > 2:
+    main(sys.argv[1], sys.argv[2:])
+  else:
+    main()
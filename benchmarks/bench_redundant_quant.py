@@ -0,0 +1,53 @@
+# -*- coding:utf8 -*-
+"""Ops and peak live bytes removed by dropping the Dequantize -> QuantizeV2
+round trips between quantized ops on the bundled models, with a batch
+size of 1 as on device, alone and followed by quant_fusion
+
+usage: python benchmarks/bench_redundant_quant.py
+"""
+import os
+
+import tensorflow as tf
+
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.memory import peak_live_bytes
+from utensor_cgen.transformer import TransformerPipeline
+
+_TESTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'tests')
+_MODELS = [(os.path.join(_TESTS_DIR, 'deep_mlp', 'simple_mnist.pb'), ['y_pred']),
+           (os.path.join(_TESTS_DIR, 'deep_cnn', 'cifar10_cnn.pb'), ['pred'])]
+
+
+def _load_batch_one(pb_file):
+  graph_def = tf.GraphDef()
+  with open(pb_file, 'rb') as fid:
+    graph_def.ParseFromString(fid.read())
+  for node in graph_def.node:
+    if node.op == 'Placeholder' and node.attr['shape'].shape.dim:
+      node.attr['shape'].shape.dim[0].size = 1
+  return graph_def
+
+
+def _runtime_ops(ugraph):
+  return sum(op.op_type not in ['Const', 'Placeholder']
+             for op in ugraph.ops_info.values())
+
+
+def main():
+  for pb_file, output_nodes in _MODELS:
+    ugraph = uTensorGraph(_load_batch_one(pb_file), output_nodes)
+    quant_ugraph = TransformerPipeline(['dropout', 'quantize'], {}).transform(ugraph)
+    pipeline = TransformerPipeline(['redundant_quant'], {})
+    new_ugraph = pipeline.transform(quant_ugraph)
+    fused_ugraph = TransformerPipeline(['quant_fusion'], {}).transform(new_ugraph)
+    print(os.path.basename(pb_file))
+    print('  {pairs_removed} round trips removed'.format(**pipeline.pipeline[0].removal_stats))
+    print('  runtime ops: {} -> {} ({} with quant_fusion)'.format(_runtime_ops(quant_ugraph),
+                                                                 _runtime_ops(new_ugraph),
+                                                                 _runtime_ops(fused_ugraph)))
+    print('  peak live bytes: {} -> {} ({} with quant_fusion)'.format(
+      peak_live_bytes(quant_ugraph), peak_live_bytes(new_ugraph), peak_live_bytes(fused_ugraph)))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,31 @@
+# -*- coding:utf8 -*-
+"""Peak live bytes of the depth first order against memory-aware
+schedules, on a graph of inception-style blocks
+
+usage: python benchmarks/bench_schedule.py [NUM_BLOCKS [WIDTH]]
+"""
+import sys
+import time
+
+from _synthetic import make_inception_graph_def
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import ScheduleTransformer
+
+
+def main(num_blocks=4, width=64):
+  graph_def, output_nodes = make_inception_graph_def(num_blocks, width, seed=0)
+  # shapes are inferred by tensorflow
+  ugraph = uTensorGraph(graph_def, output_nodes)
+  print('graph: {} ops'.format(len(ugraph.ops_info)))
+  for mode in ['heuristic', 'exact']:
+    transformer = ScheduleTransformer(mode=mode)
+    start = time.time()
+    transformer.transform(ugraph)
+    duration = time.time() - start
+    print('{mode}: {duration:.4f}s, peak live bytes {peak_before} -> {peak_after}'.format(
+      duration=duration, **transformer.schedule_stats))
+
+
+if __name__ == '__main__':
+  args = [int(arg) for arg in sys.argv[1:3]]
+  main(*args)
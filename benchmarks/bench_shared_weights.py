@@ -0,0 +1,51 @@
+# -*- coding:utf8 -*-
+"""Flash/SD bytes saved by writing constants of the same value once when
+generating code for the bundled models
+
+usage: python benchmarks/bench_shared_weights.py
+"""
+import os
+import shutil
+import tempfile
+
+from utensor_cgen.code_generator import CodeGenerator
+
+_TESTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'tests')
+_MODELS = [(os.path.join(_TESTS_DIR, 'deep_mlp', 'simple_mnist.pb'), ['y_pred']),
+           (os.path.join(_TESTS_DIR, 'deep_cnn', 'cifar10_cnn.pb'), ['pred'])]
+
+
+def _dir_bytes(dirname):
+  return sum(os.path.getsize(os.path.join(dirname, fname)) for fname in os.listdir(dirname))
+
+
+def main():
+  for pb_file, output_nodes in _MODELS:
+    print(os.path.basename(pb_file))
+    for methods in [['dropout', 'quantize', 'refcnt'], ['dropout', 'quantize', 'refcnt', 'inline']]:
+      out_dir = tempfile.mkdtemp()
+      try:
+        idx_dir = os.path.join(out_dir, 'constants')
+        src_fname = os.path.join(out_dir, 'model.cpp')
+        generator = CodeGenerator(pb_file, idx_dir, '/fs/constants', methods, output_nodes)
+        try:
+          generator.generate(src_fname)
+        except ValueError as err:
+          print('  {}: {}'.format(','.join(methods), err))
+          continue
+        if 'inline' in methods:
+          written = os.path.getsize(os.path.join(out_dir, 'model_weight.hpp'))
+          unit = 'weight header'
+        else:
+          written = _dir_bytes(idx_dir)
+          unit = '{} idx files'.format(len(os.listdir(idx_dir)))
+        shared_weights = generator.shared_weights
+        print('  {}: {} constants shared, {} bytes of data saved, {} bytes of {} '
+              'written'.format(','.join(methods), shared_weights.num_shared,
+                               shared_weights.bytes_saved, written, unit))
+      finally:
+        shutil.rmtree(out_dir)
+
+
+if __name__ == '__main__':
+  main()
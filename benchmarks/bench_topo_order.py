@@ -0,0 +1,64 @@
+# -*- coding:utf8 -*-
+"""Reading topo_order after each graph mutation: ops nobody consumes
+(kept in place) vs. rewired consumers (sorted again)
+
+usage: python benchmarks/bench_topo_order.py [NUM_OPS ...]
+"""
+import sys
+import time
+
+import numpy as np
+
+from _synthetic import make_synthetic_ugraph
+from utensor_cgen.ir import OperationInfo, TensorInfo
+
+
+def _new_op(ugraph, op_name, in_tensor):
+  out_tensor = TensorInfo(name=u'{}:0'.format(op_name),
+                          op_name=op_name,
+                          dtype=np.dtype('float32'),
+                          shape=[1],
+                          ugraph=ugraph)
+  return OperationInfo(name=op_name,
+                       input_tensors=[in_tensor],
+                       output_tensors=[out_tensor],
+                       op_type='Identity',
+                       backend='tensorflow',
+                       ugraph=ugraph)
+
+
+def _add_ops(ugraph, num_adds, resort):
+  in_tensor = ugraph.ops_info[ugraph.topo_order[0]].output_tensors[0]
+  start = time.time()
+  for i in range(num_adds):
+    _new_op(ugraph, u'new_{}'.format(i), in_tensor)
+    if resort:
+      # the order was always marked stale by adding an op
+      ugraph._dirty = True
+    ugraph.topo_order
+  return time.time() - start
+
+
+def _rewire_ops(ugraph, num_rewires):
+  ops = [ugraph.ops_info[name] for name in ugraph.topo_order[1:num_rewires + 1]]
+  start = time.time()
+  for i, op in enumerate(ops):
+    # takes the place of op
+    new_op = _new_op(ugraph, u'rewire_{}'.format(i), op.input_tensors[0])
+    ugraph.replace_tensor(op.output_tensors[0], new_op.output_tensors[0])
+    ugraph.topo_order
+  return time.time() - start
+
+
+def main(sizes):
+  num_mutations = 200
+  for num_ops in sizes:
+    unconsumed = _add_ops(make_synthetic_ugraph(num_ops, seed=0), num_mutations, False)
+    resorted = _add_ops(make_synthetic_ugraph(num_ops, seed=0), num_mutations, True)
+    rewired = _rewire_ops(make_synthetic_ugraph(num_ops, seed=0), num_mutations)
+    print('{:>8d} ops, {} mutations: unconsumed ops {:.4f}s (sorted each time {:.4f}s), '
+          'rewired ops {:.4f}s'.format(num_ops, num_mutations, unconsumed, resorted, rewired))
+
+
+if __name__ == '__main__':
+  main([int(arg) for arg in sys.argv[1:]] or [10000, 50000])
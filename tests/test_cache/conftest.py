@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+
+@pytest.fixture(scope='session', name='add_graph_tuple')
+def add_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 8], name='x')
+        for i in range(3):
+            b = tf.constant(np.random.randn(1, 8), dtype=tf.float32, name='bias_{}'.format(i))
+            x = tf.raw_ops.Add(x=x, y=b, name='add_{}'.format(i))
+    return graph.as_graph_def(), [x.op.name]
@@ -0,0 +1,130 @@
+import os
+import pickle
+
+from utensor_cgen import cache as cache_module
+from utensor_cgen.cache import GraphCache
+from utensor_cgen.code_generator import CodeGenerator
+from utensor_cgen.ir import _serialization, uTensorGraph
+
+
+def _write_pb(graph_tuple, tmpdir):
+    graph_def, _ = graph_tuple
+    pb_file = str(tmpdir.join('add.pb'))
+    with open(pb_file, 'wb') as fid:
+        fid.write(graph_def.SerializeToString())
+    return pb_file
+
+
+def _generate(graph_tuple, tmpdir, cache_dir, methods):
+    _, output_nodes = graph_tuple
+    pb_file = _write_pb(graph_tuple, tmpdir)
+    src_fname = str(tmpdir.join('add.cpp'))
+    idx_dir = str(tmpdir.join('constants'))
+    generator = CodeGenerator(pb_file, idx_dir, '/fs/constants', methods, output_nodes,
+                              cache_dir=cache_dir)
+    generator.generate(src_fname)
+    with open(src_fname) as fid:
+        source = fid.read()
+    return generator, source
+
+
+def test_cache_hit(add_graph_tuple, tmpdir):
+    cache_dir = str(tmpdir.join('cache'))
+    generator, source = _generate(add_graph_tuple, tmpdir, cache_dir, ['refcnt'])
+    assert generator.graph_cache.misses == 1
+    assert generator.graph_cache.hits == 0
+    assert len(os.listdir(cache_dir)) == 1
+
+    generator, cached_source = _generate(add_graph_tuple, tmpdir, cache_dir, ['refcnt'])
+    assert generator.graph_cache.hits == 1
+    assert cached_source == source
+
+
+def test_fingerprint(add_graph_tuple, tmpdir):
+    pb_file = _write_pb(add_graph_tuple, tmpdir)
+    key = GraphCache.fingerprint(pb_file, ['add_2'], ['refcnt'], version='1')
+    assert key == GraphCache.fingerprint(pb_file, ['add_2'], ['refcnt'], version='1')
+    assert key != GraphCache.fingerprint(pb_file, ['add_1'], ['refcnt'], version='1')
+    assert key != GraphCache.fingerprint(pb_file, ['add_2'], ['inline'], version='1')
+    assert key != GraphCache.fingerprint(pb_file, ['add_2'], ['refcnt', 'inline'], version='1')
+    assert key != GraphCache.fingerprint(pb_file, ['add_2'], ['refcnt'], version='2')
+    assert key != GraphCache.fingerprint(pb_file, ['add_2'], ['refcnt'],
+                                         trans_kwargs={'max_iterations': 3}, version='1')
+    assert key != GraphCache.fingerprint(pb_file, ['add_2'], ['refcnt'],
+                                         importer='fast', version='1')
+
+
+def test_lru_eviction(add_graph_tuple, tmpdir):
+    graph_def, output_nodes = add_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    cache = GraphCache(str(tmpdir.join('cache')))
+    cache.put('a', ugraph)
+    entry_size = os.path.getsize(os.path.join(cache.cache_dir, 'a.ugraph'))
+    # room for two graphs
+    cache.max_bytes = 2 * entry_size
+    os.utime(os.path.join(cache.cache_dir, 'a.ugraph'), (1, 1))
+    cache.put('b', ugraph)
+    os.utime(os.path.join(cache.cache_dir, 'b.ugraph'), (2, 2))
+    # a is used more recently than b
+    assert cache.get('a') is not None
+    cache.put('c', ugraph)
+    assert cache.evictions == 1
+    assert sorted(os.listdir(cache.cache_dir)) == ['a.ugraph', 'c.ugraph']
+    assert cache.get('b') is None
+    assert cache.misses == 1
+
+
+def test_unreadable_entry(tmpdir):
+    cache = GraphCache(str(tmpdir.join('cache')))
+    path = os.path.join(cache.cache_dir, 'broken.ugraph')
+    with open(path, 'wb') as fid:
+        fid.write(b'not a graph')
+    assert cache.get('broken') is None
+    assert cache.misses == 1
+    assert not os.path.exists(path)
+
+
+class _RemoveFile(object):
+
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return (os.remove, (self.path,))
+
+
+def test_untrusted_entry(tmpdir):
+    cache = GraphCache(str(tmpdir.join('cache')))
+    marker = str(tmpdir.join('marker'))
+    with open(marker, 'w') as fid:
+        fid.write('marker')
+    structure = pickle.dumps({'ops': [_RemoveFile(marker)]}, protocol=2)
+    with open(os.path.join(cache.cache_dir, 'evil.ugraph'), 'wb') as fid:
+        fid.write(_serialization._MAGIC)
+        fid.write(_serialization._HEADER.pack(len(structure)))
+        fid.write(structure)
+    assert cache.get('evil') is None
+    # the payload is never run
+    assert os.path.exists(marker)
+
+
+def test_source_changes(add_graph_tuple, tmpdir, monkeypatch):
+    pb_file = _write_pb(add_graph_tuple, tmpdir)
+    key = GraphCache.fingerprint(pb_file, ['add_2'], ['refcnt'])
+    # editable installs keep their version when sources are edited
+    monkeypatch.setattr(cache_module, '_source_digest', lambda: 'edited')
+    assert key != GraphCache.fingerprint(pb_file, ['add_2'], ['refcnt'])
+
+
+def test_stale_tmp_files(add_graph_tuple, tmpdir):
+    graph_def, output_nodes = add_graph_tuple
+    cache = GraphCache(str(tmpdir.join('cache')))
+    stale = os.path.join(cache.cache_dir, 'stale.tmp')
+    recent = os.path.join(cache.cache_dir, 'recent.tmp')
+    for path in [stale, recent]:
+        with open(path, 'wb') as fid:
+            fid.write(b'partial graph')
+    os.utime(stale, (1, 1))
+    cache.put('a', uTensorGraph(graph_def, output_nodes))
+    # left by an interrupted write, recent ones may be written concurrently
+    assert sorted(os.listdir(cache.cache_dir)) == ['a.ugraph', 'recent.tmp']
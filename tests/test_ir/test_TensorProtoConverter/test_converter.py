@@ -1,4 +1,5 @@
 import numpy as np
+from tensorflow import make_ndarray, make_tensor_proto
 
 from utensor_cgen.ir.converter import TensorProtoConverter
 
@@ -24,3 +25,16 @@ def test_tf_tensor_quint8(tf_quint8_tensor):
     tf_value = TensorProtoConverter.get_tf_value(np_array)
     assert tf_value.tensor_content == tf_quint8_tensor.tensor_content
     assert tf_value.tensor_shape == tf_quint8_tensor.tensor_shape
+
+
+def test_tensor_content_view():
+    np_array = np.random.randn(3, 4).astype(np.float32)
+    tf_value = make_tensor_proto(np_array)
+    generic = TensorProtoConverter.get_generic_value(tf_value)
+    assert not generic.np_array.flags.writeable
+    assert (generic.np_array == np_array).all()
+    assert TensorProtoConverter.get_tf_value(generic) is tf_value
+    generic.np_array = generic.np_array * 2
+    new_tf_value = TensorProtoConverter.get_tf_value(generic)
+    assert new_tf_value is not tf_value
+    assert (make_ndarray(new_tf_value) == np_array * 2).all()
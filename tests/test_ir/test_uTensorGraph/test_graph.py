@@ -1,9 +1,13 @@
+import pickle
 from copy import deepcopy
 
+import attr
 import numpy as np
+import pytest
 import tensorflow as tf
 
-from utensor_cgen.ir import OperationInfo, uTensorGraph
+from utensor_cgen.ir import OperationInfo, TensorInfo, uTensorGraph
+from utensor_cgen.ir.base import _skip_validation
 from utensor_cgen.ir.converter import TensorProtoConverter
 
 
@@ -66,3 +70,233 @@ def test_tensor_ops(graph_tuple):
     for op in ugraph.ops_info.values():
         for tensor in op.output_tensors:
             assert tensor.op is op
+
+def test_consumers_index(graph_tuple):
+    ugraph = uTensorGraph(*graph_tuple)
+    bias2 = ugraph.ops_info['bias2']
+    assert [str(op.name) for op in bias2.output_nodes] == ['x3']
+    ugraph.drop_op('x3')
+    ugraph.output_nodes = ['x2']
+    assert bias2.output_nodes == []
+    new_ugraph = deepcopy(ugraph)
+    x2 = new_ugraph.ops_info['x2']
+    assert all(op.ugraph is new_ugraph for op in x2.input_nodes)
+    assert [str(op.name) for op in new_ugraph.ops_info['weight'].output_nodes] == ['MatMul']
+
+def test_deep_graph_topo_order():
+    ugraph = uTensorGraph()
+    dtype = np.dtype('float32')
+    num_ops = 5000
+    in_tensors = []
+    for i in range(num_ops):
+        op_name = 'op_{}'.format(i)
+        out_tensor = TensorInfo(name='{}:0'.format(op_name),
+                                op_name=op_name,
+                                dtype=dtype,
+                                shape=[1],
+                                ugraph=ugraph)
+        OperationInfo(name=op_name,
+                      input_tensors=in_tensors,
+                      output_tensors=[out_tensor],
+                      op_type='Identity',
+                      backend='tensorflow',
+                      ugraph=ugraph)
+        in_tensors = [out_tensor]
+    ugraph.output_nodes = ['op_{}'.format(num_ops - 1)]
+    assert ugraph.is_dirty
+    assert ugraph.topo_order == ['op_{}'.format(i) for i in range(num_ops)]
+    assert not ugraph.is_dirty
+    ugraph.drop_op('op_{}'.format(num_ops - 1))
+    ugraph.output_nodes = ['op_{}'.format(num_ops - 2)]
+    assert len(ugraph.topo_order) == num_ops - 1
+
+
+def test_topo_order_unconsumed_ops():
+    ugraph = uTensorGraph()
+    dtype = np.dtype('float32')
+    tensors = {}
+    def add_op(op_name, in_names):
+        tensors[op_name] = TensorInfo(name='{}:0'.format(op_name),
+                                      op_name=op_name,
+                                      dtype=dtype,
+                                      shape=[1],
+                                      ugraph=ugraph)
+        return OperationInfo(name=op_name,
+                             input_tensors=[tensors[name] for name in in_names],
+                             output_tensors=[tensors[op_name]],
+                             op_type='Identity',
+                             backend='tensorflow',
+                             ugraph=ugraph)
+    add_op('a', [])
+    add_op('b', ['a'])
+    ugraph.output_nodes = ['b']
+    assert ugraph.topo_order == ['a', 'b']
+    # not consumed, the order is not changed
+    add_op('c', ['a'])
+    assert not ugraph.is_dirty
+    ugraph.drop_op('c')
+    assert not ugraph.is_dirty
+    add_op('d', ['a'])
+    ugraph.replace_tensor(tensors['a'], tensors['d'])
+    assert ugraph.is_dirty
+    assert ugraph.topo_order == ['a', 'd', 'b']
+    ugraph.drop_op('b')
+    assert ugraph.is_dirty
+
+def test_ugraph_fork(graph_tuple):
+    ugraph = uTensorGraph(*graph_tuple)
+    new_ugraph = ugraph.fork()
+    assert new_ugraph.topo_order == ugraph.topo_order
+    assert new_ugraph.graph_def == ugraph.graph_def
+    for op_name, op in new_ugraph.ops_info.items():
+        ori_op = ugraph.ops_info[op_name]
+        assert op is not ori_op
+        assert op.ugraph is new_ugraph
+        assert op.op_attr is not ori_op.op_attr
+        for key, value in op.op_attr.items():
+            assert value is ori_op.op_attr[key]
+
+def test_op_attr_lazy_conversion(graph_tuple):
+    ugraph = uTensorGraph(*graph_tuple)
+    op_attr = ugraph.ops_info['weight'].op_attr
+    assert 'value' in op_attr
+    assert isinstance(op_attr.raw_value('value'), tf.AttrValue)
+    generic_value = op_attr['value']
+    assert op_attr.raw_value('value') is None
+    assert isinstance(generic_value.value,
+                      TensorProtoConverter.__utensor_generic_type__)
+    assert op_attr['value'] is generic_value
+
+def test_fast_importer(graph_tuple):
+    graph_def, output_nodes = graph_tuple
+    tf_ugraph = uTensorGraph(graph_def, output_nodes, importer='tf')
+    fast_ugraph = uTensorGraph(graph_def, output_nodes, importer='fast')
+    assert fast_ugraph.topo_order == tf_ugraph.topo_order
+    for op_name, tf_op in tf_ugraph.ops_info.items():
+        fast_op = fast_ugraph.ops_info[op_name]
+        assert fast_op.op_type == tf_op.op_type
+        for fast_tensors, tf_tensors in [(fast_op.input_tensors, tf_op.input_tensors),
+                                         (fast_op.output_tensors, tf_op.output_tensors)]:
+            assert [t.name for t in fast_tensors] == [t.name for t in tf_tensors]
+            assert [t.dtype for t in fast_tensors] == [t.dtype for t in tf_tensors]
+    assert fast_ugraph.ops_info['weight'].output_tensors[0].shape == [3, 3]
+
+def test_tensor_name_components(graph_tuple):
+    for importer in uTensorGraph.TF_IMPORTERS:
+        ugraph = uTensorGraph(*graph_tuple, importer=importer)
+        for op in ugraph.ops_info.values():
+            for index, tensor in enumerate(op.output_tensors):
+                assert tensor.op_name == op.name
+                assert tensor.output_index == index
+    tensor = TensorInfo(name='a/b:2',
+                        op_name='a/b',
+                        dtype=np.dtype('float32'),
+                        shape=None,
+                        ugraph=uTensorGraph())
+    assert tensor.output_index == 2
+
+
+def test_ugraph_save_load(graph_tuple, tmpdir):
+    from utensor_cgen.transformer.optimizer import RefCntOptimizer
+
+    ugraph = RefCntOptimizer().transform(uTensorGraph(*graph_tuple))
+    # one converted constant and one untouched
+    ugraph.ops_info['weight'].op_attr['value']
+    path = str(tmpdir.join('graph.ugraph'))
+    ugraph.save(path)
+    for mmap in [True, False]:
+        loaded = uTensorGraph.load(path, mmap=mmap)
+        assert loaded.output_nodes == ugraph.output_nodes
+        assert loaded.topo_order == ugraph.topo_order
+        assert [(node.name, node.op, node.input) for node in loaded.graph_def.node] == \
+            [(node.name, node.op, node.input) for node in ugraph.graph_def.node]
+        for op_name, op_info in ugraph.ops_info.items():
+            loaded_op = loaded.ops_info[op_name]
+            for loaded_tensors, tensors in [(loaded_op.input_tensors, op_info.input_tensors),
+                                            (loaded_op.output_tensors, op_info.output_tensors)]:
+                assert [(t.name, t.dtype, t.shape) for t in loaded_tensors] == \
+                    [(t.name, t.dtype, t.shape) for t in tensors]
+            assert sorted(loaded_op.op_attr) == sorted(op_info.op_attr)
+        for name in ['weight', 'x1', 'bias']:
+            array = loaded.ops_info[name].op_attr['value'].value.np_array
+            assert not array.flags.writeable
+            assert (array == ugraph.ops_info[name].op_attr['value'].value.np_array).all()
+
+
+def test_external_weights(graph_tuple, tmpdir):
+    import pytest
+    from utensor_cgen.ir.external_weights import externalize_weights
+
+    graph_def, output_nodes = graph_tuple
+    weight_file = str(tmpdir.join('weights.bin'))
+    ext_graph_def = externalize_weights(graph_def, weight_file)
+    for node in ext_graph_def.node:
+        if node.op == 'Const':
+            assert not node.attr['value'].tensor.tensor_content
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    for importer in uTensorGraph.TF_IMPORTERS:
+        ext_ugraph = uTensorGraph(ext_graph_def, output_nodes,
+                                  importer=importer,
+                                  weight_file=weight_file)
+        for name in ['weight', 'x1', 'bias', 'bias2']:
+            op_attr = ext_ugraph.ops_info[name].op_attr
+            assert '_external_offset' not in op_attr
+            array = op_attr['value'].value.np_array
+            assert isinstance(array.base, np.memmap)
+            assert (array == ugraph.ops_info[name].op_attr['value'].value.np_array).all()
+        assert ext_ugraph.graph_def == uTensorGraph(graph_def, output_nodes).graph_def
+    with pytest.raises(ValueError):
+        uTensorGraph(ext_graph_def, output_nodes)
+
+def test_record_validators():
+    ugraph = uTensorGraph()
+    with pytest.raises(TypeError):
+        TensorInfo(name=1, op_name=u'a', dtype=np.dtype('float32'), shape=[1],
+                   ugraph=ugraph)
+    with pytest.raises(AssertionError):
+        TensorInfo(name=u'a:0', op_name=u'a', dtype=np.dtype('float32'), shape=['1'],
+                   ugraph=ugraph)
+    with pytest.raises(ValueError):
+        OperationInfo(name='a', input_tensors=[], output_tensors=[], op_type='NoOp',
+                      backend='pytorch', ugraph=ugraph)
+    assert 'a' not in ugraph.ops_info
+
+def test_record_skip_validation():
+    ugraph = uTensorGraph()
+    with _skip_validation():
+        tensor = TensorInfo(name=u'a:0', op_name=u'a', dtype=np.dtype('float32'),
+                            shape=['1'], ugraph=ugraph)
+        OperationInfo(name='a', input_tensors=[], output_tensors=[tensor], op_type='NoOp',
+                      backend='pytorch', ugraph=ugraph)
+    assert tensor.output_index == 0
+    assert 'a' in ugraph.ops_info
+    # validators run again out of the context
+    assert attr.get_run_validators()
+    with pytest.raises(ValueError):
+        OperationInfo(name='b', input_tensors=[], output_tensors=[], op_type='NoOp',
+                      backend='pytorch', ugraph=ugraph)
+
+def _assert_same_structure(ugraph, new_ugraph):
+    assert new_ugraph.topo_order == ugraph.topo_order
+    assert new_ugraph.output_nodes == ugraph.output_nodes
+    assert new_ugraph.graph_def == ugraph.graph_def
+    for op_name, op in new_ugraph.ops_info.items():
+        assert not hasattr(op, '__dict__')
+        assert op.ugraph is new_ugraph
+        for tensor in op.input_tensors + op.output_tensors:
+            assert not hasattr(tensor, '__dict__')
+            assert tensor.ugraph is new_ugraph
+        ori_op = ugraph.ops_info[op_name]
+        assert [t.name for t in op.input_tensors] == [t.name for t in ori_op.input_tensors]
+        assert [(t.op_name, t.output_index, t.dtype, t.shape) for t in op.output_tensors] == \
+            [(t.op_name, t.output_index, t.dtype, t.shape) for t in ori_op.output_tensors]
+        assert sorted(out_op.name for out_op in op.output_nodes) == \
+            sorted(out_op.name for out_op in ori_op.output_nodes)
+
+def test_record_copies(graph_tuple):
+    ugraph = uTensorGraph(*graph_tuple)
+    _assert_same_structure(ugraph, ugraph.fork())
+    _assert_same_structure(ugraph, deepcopy(ugraph))
+    _assert_same_structure(ugraph, pickle.loads(pickle.dumps(ugraph)))
+    # validators are not left disabled by copies
+    assert attr.get_run_validators()
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+
+@pytest.fixture(scope='session', name='branchy_graph_tuple')
+def branchy_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 64], name='x')
+        branches = []
+        for i, width in enumerate([256, 32, 128]):
+            weight = tf.constant(np.random.randn(64, width), dtype=tf.float32)
+            hidden = tf.nn.relu(tf.matmul(x, weight), name='hidden_{}'.format(i))
+            weight = tf.constant(np.random.randn(width, 8), dtype=tf.float32)
+            branches.append(tf.matmul(hidden, weight, name='branch_{}'.format(i)))
+        y = tf.add_n(branches, name='y')
+    return graph.as_graph_def(), [y.op.name]
+
+
+@pytest.fixture(scope='session', name='add_graph_tuple')
+def add_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[4], name='x')
+        z = tf.raw_ops.Add(x=x, y=tf.constant(np.ones(4), dtype=tf.float32), name='z')
+        y = tf.raw_ops.Add(x=z, y=z, name='y')
+    return graph.as_graph_def(), [y.op.name]
@@ -0,0 +1,55 @@
+import os
+
+from utensor_cgen.code_generator import CodeGenerator
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.memory import peak_live_bytes, plan_memory, tensor_lifetimes
+
+
+def test_lifetimes(branchy_graph_tuple):
+    ugraph = uTensorGraph(*branchy_graph_tuple)
+    order = ugraph.topo_order
+    lifetimes = tensor_lifetimes(ugraph)
+    assert 'x:0' not in lifetimes
+    assert lifetimes['y:0'] == (order.index('y'), len(order))
+    for i in range(3):
+        hidden = 'hidden_{}'.format(i)
+        assert lifetimes[hidden + ':0'] == (order.index(hidden),
+                                            order.index('branch_{}'.format(i)))
+
+
+def test_plan_memory(branchy_graph_tuple):
+    ugraph = uTensorGraph(*branchy_graph_tuple)
+    plan = plan_memory(ugraph)
+    assert not plan.unplanned
+    assert plan.sizes['hidden_0:0'] == 256 * 4
+    assert plan.peak_live_bytes == peak_live_bytes(ugraph)
+    assert plan.peak_live_bytes <= plan.arena_size < plan.total_bytes
+    # tensors live at the same time don't overlap
+    for tname, (first, last) in plan.lifetimes.items():
+        start, end = plan.offsets[tname], plan.offsets[tname] + plan.sizes[tname]
+        assert start % 8 == 0
+        for other, (other_first, other_last) in plan.lifetimes.items():
+            if other == tname or other_last < first or last < other_first:
+                continue
+            other_start = plan.offsets[other]
+            assert end <= other_start or other_start + plan.sizes[other] <= start
+    # deterministic
+    assert plan_memory(ugraph).offsets == plan.offsets
+
+
+def test_arena_codegen(add_graph_tuple, tmpdir):
+    graph_def, output_nodes = add_graph_tuple
+    pb_file = str(tmpdir.join('add.pb'))
+    with open(pb_file, 'wb') as fid:
+        fid.write(graph_def.SerializeToString())
+    src_fname = str(tmpdir.join('add.cpp'))
+    generator = CodeGenerator(pb_file, str(tmpdir.join('constants')), '/fs/constants',
+                              ['refcnt'], output_nodes, arena=True)
+    generator.generate(src_fname)
+    with open(src_fname) as fid:
+        source = fid.read()
+    # z:0 and y:0 are live at the same time
+    assert 'static uint8_t utensor_arena[32];' in source
+    assert 'new WrappedRamTensor<float>({4}, (float*) (utensor_arena + 0)), "z:0"' in source
+    assert 'new WrappedRamTensor<float>({4}, (float*) (utensor_arena + 16)), "y:0"' in source
+    assert 'new RamTensor' not in source
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+
+def _bn_params(num_channels):
+    return [tf.constant(value, dtype=tf.float32) for value in
+            [np.random.rand(num_channels) + 0.5,
+             np.random.randn(num_channels),
+             np.random.randn(num_channels),
+             np.random.rand(num_channels) + 0.1]]
+
+
+@pytest.fixture(scope='session', name='bn_cnn_graph_tuple')
+def bn_cnn_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 8, 8, 3], name='x')
+        # conv + bias + fused batch norm
+        kernel = tf.constant(np.random.randn(3, 3, 3, 4), dtype=tf.float32)
+        bias = tf.constant(np.random.randn(4), dtype=tf.float32)
+        conv = tf.nn.bias_add(tf.nn.conv2d(x, kernel, [1, 1, 1, 1], 'SAME'), bias)
+        scale, offset, mean, variance = _bn_params(4)
+        conv, _, _ = tf.nn.fused_batch_norm(conv, scale, offset, mean, variance,
+                                            epsilon=1e-3, is_training=False)
+        conv = tf.nn.relu(conv)
+        # conv + unfused batch norm
+        kernel = tf.constant(np.random.randn(3, 3, 4, 4), dtype=tf.float32)
+        conv = tf.nn.conv2d(conv, kernel, [1, 2, 2, 1], 'SAME')
+        scale, offset, mean, variance = _bn_params(4)
+        conv = tf.nn.batch_normalization(conv, mean, variance, offset, scale, 1e-3)
+        conv = tf.nn.relu(conv)
+        # matmul + unfused batch norm, without scale
+        flat = tf.reshape(conv, [1, 64])
+        weight = tf.constant(np.random.randn(64, 10), dtype=tf.float32)
+        _, offset, mean, variance = _bn_params(10)
+        logits = tf.nn.batch_normalization(tf.matmul(flat, weight),
+                                           mean, variance, offset, None, 1e-3)
+        y = tf.identity(logits, name='y')
+    return graph.as_graph_def(), [y.op.name]
+
+
+@pytest.fixture(scope='session', name='bn_variable_stats_graph_tuple')
+def bn_variable_stats_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 8, 8, 3], name='x')
+        kernel = tf.constant(np.random.randn(3, 3, 3, 4), dtype=tf.float32)
+        conv = tf.nn.conv2d(x, kernel, [1, 1, 1, 1], 'SAME')
+        scale, offset, mean, _ = _bn_params(4)
+        # statistics fed at runtime, read through an Identity
+        variance = tf.identity(tf.placeholder(dtype=tf.float32, shape=[4]))
+        conv, _, _ = tf.nn.fused_batch_norm(conv, scale, offset, mean, variance,
+                                            epsilon=1e-3, is_training=False)
+        y = tf.identity(conv, name='y')
+    return graph.as_graph_def(), [y.op.name]
+
+
+@pytest.fixture(scope='session', name='bn_shared_scaled_graph_tuple')
+def bn_shared_scaled_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 8, 8, 3], name='x')
+        kernel = tf.constant(np.random.randn(3, 3, 3, 4), dtype=tf.float32)
+        conv = tf.nn.conv2d(x, kernel, [1, 1, 1, 1], 'SAME')
+        scale, offset, mean, variance = _bn_params(4)
+        bn = tf.nn.batch_normalization(conv, mean, variance, offset, scale, 1e-3)
+        # conv * multiplier is consumed after the batch norm too
+        scaled = bn.op.inputs[0]
+        y = tf.add(bn, tf.reduce_sum(scaled), name='y')
+    return graph.as_graph_def(), [y.op.name]
+
+
+@pytest.fixture(scope='session', name='bn_dead_branch_graph_tuple')
+def bn_dead_branch_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 8, 8, 3], name='x')
+        kernel = tf.constant(np.random.randn(3, 3, 3, 4), dtype=tf.float32)
+        conv = tf.nn.conv2d(x, kernel, [1, 1, 1, 1], 'SAME')
+        # not needed by the output
+        tf.nn.relu(conv, name='dead')
+        scale, offset, mean, variance = _bn_params(4)
+        conv, _, _ = tf.nn.fused_batch_norm(conv, scale, offset, mean, variance,
+                                            epsilon=1e-3, is_training=False)
+        y = tf.identity(conv, name='y')
+    return graph.as_graph_def(), [y.op.name]
@@ -0,0 +1,79 @@
+import numpy as np
+import tensorflow as tf
+
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import BatchNormTransformer
+
+
+def _run(graph_def, output_name, x):
+    graph = tf.Graph()
+    with graph.as_default():
+        tf.import_graph_def(graph_def, name='')
+    with tf.Session(graph=graph) as sess:
+        return sess.run('{}:0'.format(output_name), feed_dict={'x:0': x})
+
+
+def test_batch_norm_fold(bn_cnn_graph_tuple):
+    graph_def, output_nodes = bn_cnn_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    transformer = BatchNormTransformer()
+    new_ugraph = transformer.transform(ugraph)
+    assert transformer.num_rewrites == 3
+    op_types = set(op.op_type for op in new_ugraph.ops_info.values())
+    assert not op_types.intersection(['FusedBatchNorm', 'FusedBatchNormV3',
+                                      'Rsqrt', 'Sub', 'Mul'])
+    # one BiasAdd after each conv/matmul
+    assert sum(op.op_type == 'BiasAdd' for op in new_ugraph.ops_info.values()) == 3
+
+    x = np.random.randn(1, 8, 8, 3).astype(np.float32)
+    expected = _run(graph_def, output_nodes[0], x)
+    result = _run(new_ugraph.graph_def, output_nodes[0], x)
+    assert np.allclose(result, expected, rtol=1e-4, atol=1e-4)
+
+
+def test_batch_norm_non_const_stats(bn_variable_stats_graph_tuple):
+    graph_def, output_nodes = bn_variable_stats_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    transformer = BatchNormTransformer()
+    new_ugraph = transformer.transform(ugraph)
+    assert transformer.num_rewrites == 0
+    assert any(op.op_type.startswith('FusedBatchNorm')
+               for op in new_ugraph.ops_info.values())
+
+
+def test_batch_norm_stripped_default_attrs(bn_cnn_graph_tuple):
+    graph_def, output_nodes = bn_cnn_graph_tuple
+    stripped = tf.GraphDef()
+    stripped.CopyFrom(graph_def)
+    for node in stripped.node:
+        for attr_name in ['is_training', 'data_format']:
+            if attr_name in node.attr:
+                del node.attr[attr_name]
+    ugraph = uTensorGraph(stripped, output_nodes)
+    transformer = BatchNormTransformer()
+    transformer.transform(ugraph)
+    assert transformer.num_rewrites == 3
+
+
+def test_batch_norm_shared_scaled(bn_shared_scaled_graph_tuple):
+    graph_def, output_nodes = bn_shared_scaled_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    transformer = BatchNormTransformer()
+    new_ugraph = transformer.transform(ugraph)
+    assert transformer.num_rewrites == 0
+
+    x = np.random.randn(1, 8, 8, 3).astype(np.float32)
+    expected = _run(graph_def, output_nodes[0], x)
+    result = _run(new_ugraph.graph_def, output_nodes[0], x)
+    assert np.allclose(result, expected, rtol=1e-4, atol=1e-4)
+
+
+def test_batch_norm_dead_branch(bn_dead_branch_graph_tuple):
+    graph_def, output_nodes = bn_dead_branch_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    assert 'dead' in ugraph.ops_info
+    transformer = BatchNormTransformer()
+    new_ugraph = transformer.transform(ugraph)
+    # dead consumers of the conv don't prevent folding
+    assert transformer.num_rewrites == 1
+    assert 'dead' not in new_ugraph.ops_info
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+
+@pytest.fixture(scope='session', name='const_chain_graph_tuple')
+def const_chain_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[2, 6], name='x')
+        # Const -> Reshape -> Transpose -> Mul
+        weight = tf.constant(np.random.randn(24), dtype=tf.float32, name='weight')
+        weight = tf.transpose(tf.reshape(weight, [4, 6]), name='transpose')
+        weight = tf.multiply(weight, 0.5, name='scaled_weight')
+        y = tf.matmul(x, weight, name='matmul')
+        # no numpy kernel for Tile
+        bias = tf.tile(tf.constant([1., 2.]), [2], name='bias')
+        y = tf.add(y, bias, name='add')
+        # shape of x is fully known
+        y = tf.reshape(y, tf.shape(x)[:1] * 4, name='y')
+    return graph.as_graph_def(), [y.op.name]
+
+
+@pytest.fixture(scope='session', name='stateful_graph_tuple')
+def stateful_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[4], name='x')
+        # all inputs are constant, a new value at each run
+        noise = tf.random_uniform([4], 0, 10, dtype=tf.int32, name='noise')
+        y = tf.add(x, tf.cast(noise, tf.float32), name='y')
+    return graph.as_graph_def(), [y.op.name]
+
+
+@pytest.fixture(scope='session', name='failing_kernel_graph_tuple')
+def failing_kernel_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[2], name='x')
+        # index out of range, fails when run, no numpy kernel
+        gathered = tf.gather(tf.constant([1., 2.]), [0, 5], name='gathered')
+        y = tf.add(x, gathered, name='y')
+    return graph.as_graph_def(), [y.op.name]
+
+
+@pytest.fixture(scope='session', name='nchw_bias_graph_tuple')
+def nchw_bias_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 3, 4, 5], name='x')
+        bias = tf.nn.bias_add(tf.zeros([1, 3, 4, 5]), tf.constant([1., 2., 3.]),
+                              data_format='NCHW', name='bias')
+        y = tf.add(x, bias, name='y')
+    return graph.as_graph_def(), [y.op.name]
+
+
+@pytest.fixture(scope='session', name='large_output_graph_tuple')
+def large_output_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[4], name='x')
+        # 2MB of float32 from small constants
+        ones = tf.fill([512, 1024], 1., name='ones')
+        ones = tf.reduce_sum(ones, axis=0, name='sum')
+        # 1-d axis
+        axis = tf.constant([0], dtype=tf.int32, name='axis')
+        small = tf.expand_dims(tf.constant([1., 2., 3., 4.]), axis, name='expanded')
+        y = tf.add(x, tf.reshape(small, [4]) + ones[:4], name='y')
+    return graph.as_graph_def(), [y.op.name]
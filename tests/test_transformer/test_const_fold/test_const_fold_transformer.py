@@ -0,0 +1,88 @@
+import numpy as np
+import tensorflow as tf
+
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import ConstFoldTransformer, TransformerPipeline
+
+
+def _run(graph_def, output_name, x):
+    graph = tf.Graph()
+    with graph.as_default():
+        tf.import_graph_def(graph_def, name='')
+    with tf.Session(graph=graph) as sess:
+        return sess.run('{}:0'.format(output_name), feed_dict={'x:0': x})
+
+
+def test_const_fold(const_chain_graph_tuple):
+    graph_def, output_nodes = const_chain_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    transformer = ConstFoldTransformer()
+    new_ugraph = transformer.transform(ugraph)
+    runtime_ops = sorted(op.name for op in new_ugraph.ops_info.values()
+                         if op.op_type != 'Const')
+    assert runtime_ops == ['add', 'matmul', 'x', 'y']
+    assert new_ugraph.ops_info['scaled_weight'].op_type == 'Const'
+    assert new_ugraph.ops_info['bias'].op_type == 'Const'
+    assert transformer.fold_stats['ops_folded'] > 0
+    assert transformer.fold_stats['bytes_removed'] >= 3 * 24 * 4
+    # the original graph is untouched
+    assert ugraph.ops_info['scaled_weight'].op_type == 'Mul'
+
+    x = np.random.randn(2, 6).astype(np.float32)
+    expected = _run(graph_def, output_nodes[0], x)
+    result = _run(new_ugraph.graph_def, output_nodes[0], x)
+    assert np.allclose(result, expected)
+
+
+def test_const_fold_without_tf(const_chain_graph_tuple):
+    graph_def, output_nodes = const_chain_graph_tuple
+    pipeline = TransformerPipeline(['constfold'], {'_utensor_constfold__use_tf': False})
+    new_ugraph = pipeline.transform(uTensorGraph(graph_def, output_nodes))
+    assert new_ugraph.ops_info['scaled_weight'].op_type == 'Const'
+    assert new_ugraph.ops_info['bias'].op_type == 'Tile'
+
+
+def test_const_fold_stateful(stateful_graph_tuple):
+    graph_def, output_nodes = stateful_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    transformer = ConstFoldTransformer()
+    new_ugraph = transformer.transform(ugraph)
+    assert new_ugraph.ops_info['noise'].op_type == 'RandomUniformInt'
+    assert transformer.fold_stats['ops_folded'] == 0
+
+
+def test_const_fold_kernel_error(failing_kernel_graph_tuple):
+    graph_def, output_nodes = failing_kernel_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    new_ugraph = ConstFoldTransformer().transform(ugraph)
+    assert new_ugraph.ops_info['gathered'].op_type.startswith('Gather')
+
+
+def test_const_fold_nchw_bias_add(nchw_bias_graph_tuple):
+    graph_def, output_nodes = nchw_bias_graph_tuple
+    pipeline = TransformerPipeline(['constfold'], {'_utensor_constfold__use_tf': False})
+    new_ugraph = pipeline.transform(uTensorGraph(graph_def, output_nodes))
+    assert new_ugraph.ops_info['bias'].op_type == 'Const'
+
+    x = np.random.randn(1, 3, 4, 5).astype(np.float32)
+    expected = _run(graph_def, output_nodes[0], x)
+    result = _run(new_ugraph.graph_def, output_nodes[0], x)
+    assert np.allclose(result, expected)
+
+
+def test_const_fold_max_output_size(large_output_graph_tuple):
+    graph_def, output_nodes = large_output_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    new_ugraph = ConstFoldTransformer(use_tf=False).transform(ugraph)
+    assert new_ugraph.ops_info['ones'].op_type == 'Fill'
+    assert new_ugraph.ops_info['expanded'].op_type == 'Const'
+
+    transformer = ConstFoldTransformer(use_tf=False, max_output_size=None)
+    new_ugraph = transformer.transform(ugraph)
+    assert new_ugraph.ops_info['sum'].op_type == 'Const'
+    assert 'ones' not in new_ugraph.ops_info
+
+    x = np.random.randn(4).astype(np.float32)
+    expected = _run(graph_def, output_nodes[0], x)
+    result = _run(new_ugraph.graph_def, output_nodes[0], x)
+    assert np.allclose(result, expected)
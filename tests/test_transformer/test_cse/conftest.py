@@ -0,0 +1,33 @@
+import pytest
+import tensorflow as tf
+
+
+@pytest.fixture(scope='session', name='duplicated_graph_tuple')
+def duplicated_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[2, 4], name='x')
+        # same Const -> Reshape -> Max chains
+        ranges = []
+        for i in range(3):
+            flat = tf.reshape(x, tf.constant([-1], name='shape_{}'.format(i)),
+                              name='flat_{}'.format(i))
+            ranges.append(tf.reduce_max(flat, axis=0, name='max_{}'.format(i)))
+        # different attributes
+        weight = tf.constant([[1., 2.], [3., 4.], [5., 6.], [7., 8.]], name='weight')
+        a = tf.matmul(x, weight, name='a')
+        b = tf.matmul(tf.transpose(x, name='x_t'), tf.transpose(weight), transpose_a=True,
+                      transpose_b=True, name='b')
+        y = tf.add_n(ranges + [tf.reduce_sum(a + b)], name='y')
+    return graph.as_graph_def(), [y.op.name]
+
+
+@pytest.fixture(scope='session', name='random_graph_tuple')
+def random_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        # same inputs and attributes, different values at runtime
+        noises = [tf.random_uniform([4], 0, 10, dtype=tf.int32, name='noise_{}'.format(i))
+                  for i in range(2)]
+        y = tf.add(noises[0], noises[1], name='y')
+    return graph.as_graph_def(), [y.op.name]
@@ -0,0 +1,56 @@
+import numpy as np
+import tensorflow as tf
+
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import CSETransformer, TransformerPipeline
+
+
+def _run(graph_def, output_name, x):
+    graph = tf.Graph()
+    with graph.as_default():
+        tf.import_graph_def(graph_def, name='')
+    with tf.Session(graph=graph) as sess:
+        return sess.run('{}:0'.format(output_name), feed_dict={'x:0': x})
+
+
+def test_cse(duplicated_graph_tuple):
+    graph_def, output_nodes = duplicated_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    transformer = CSETransformer()
+    new_ugraph = transformer.transform(ugraph)
+    # shape, flat, max and its axis of the 2 last chains, perm of one Transpose
+    assert transformer.cse_stats == {'ops_removed': 9, 'bytes_removed': 2 * (8 * 4 + 4)}
+    for i in [1, 2]:
+        for name in ['shape', 'flat', 'max']:
+            assert '{}_{}'.format(name, i) not in new_ugraph.ops_info
+    y = new_ugraph.ops_info['y']
+    assert [tensor.name for tensor in y.input_tensors[:3]] == ['max_0:0'] * 3
+    # transpose_a/transpose_b differ
+    assert 'a' in new_ugraph.ops_info and 'b' in new_ugraph.ops_info
+    # the original graph is untouched
+    assert 'max_1' in ugraph.ops_info
+
+    x = np.random.randn(2, 4).astype(np.float32)
+    expected = _run(graph_def, output_nodes[0], x)
+    result = _run(new_ugraph.graph_def, output_nodes[0], x)
+    assert np.allclose(result, expected)
+
+
+def test_cse_ref_counts(duplicated_graph_tuple):
+    graph_def, output_nodes = duplicated_graph_tuple
+    key = '_utensor_refcnt__ref_counts'
+    after = TransformerPipeline(['refcnt', 'cse'], {}).transform(uTensorGraph(graph_def,
+                                                                             output_nodes))
+    expected = TransformerPipeline(['cse', 'refcnt'], {}).transform(uTensorGraph(graph_def,
+                                                                                output_nodes))
+    assert after.ops_info['max_0'].op_attr[key] == [3]
+    assert after.ops_info['x'].op_attr[key] == [3]
+    for op_name, op_info in expected.ops_info.items():
+        assert after.ops_info[op_name].op_attr[key] == op_info.op_attr[key]
+
+
+def test_cse_stateful(random_graph_tuple):
+    graph_def, output_nodes = random_graph_tuple
+    new_ugraph = CSETransformer().transform(uTensorGraph(graph_def, output_nodes))
+    assert new_ugraph.ops_info['noise_0'].op_type == 'RandomUniformInt'
+    assert new_ugraph.ops_info['noise_1'].op_type == 'RandomUniformInt'
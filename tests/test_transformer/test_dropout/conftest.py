@@ -17,3 +17,32 @@ def dropout_graph_tuple():
     return (graph.as_graph_def(),
             [keep_prob.name, dropout_x.name],
             [y.op.name])
+
+
+@pytest.fixture(scope='session', name='dropout_like_graph_tuple')
+def dropout_like_graph():
+    # the structures of dropout, without random mask
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[4], name='x')
+        a = tf.placeholder(dtype=tf.float32, shape=[4], name='a')
+        b = tf.placeholder(dtype=tf.float32, shape=[4], name='b')
+        keep_prob_like = tf.multiply(x / 2., tf.floor(a + b), name='keep_prob_like')
+        rate_like = tf.multiply(x * 3., tf.cast(a >= b, tf.float32), name='rate_like')
+        select_like = tf.where(a + b >= 0.5, x / 4., tf.zeros([4]), name='select_like')
+        y = tf.add_n([keep_prob_like, rate_like, select_like], name='y')
+    return graph.as_graph_def(), [y.op.name]
+
+
+@pytest.fixture(scope='session', name='dropout_scope_graph_tuple')
+def dropout_scope_graph():
+    # a real dropout and a dropout name scope without random mask
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[4], name='x')
+        keep_prob = tf.placeholder(dtype=tf.float32, name='keep_prob')
+        dropout_x = tf.nn.dropout(x, keep_prob, name='dropout')
+        with tf.name_scope('dropout_fake'):
+            fake_x = tf.multiply(dropout_x / 2., tf.floor(x + 0.5), name='mul')
+        y = tf.add(fake_x, 1., name='y')
+    return graph.as_graph_def(), [y.op.name]
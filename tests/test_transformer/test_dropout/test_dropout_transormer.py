@@ -36,3 +36,27 @@ def test_dropout_trans(droput_graph_tuple):
         output_2 = output.eval()
     # expecting the same outputs with keep_prob == 1.0
     assert (output_1 == output_2).all()
+
+
+def test_dropout_like_ops_kept(dropout_like_graph_tuple):
+    graph_def, output_nodes = dropout_like_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes=output_nodes)
+    transformer = DropoutTransformer()
+    new_ugraph = transformer.transform(ugraph)
+    assert transformer.num_rewrites == 0
+    for name in ['keep_prob_like', 'rate_like', 'select_like']:
+        assert name in new_ugraph.ops_info
+    y = new_ugraph.ops_info[output_nodes[0]]
+    assert [tensor.op_name for tensor in y.input_tensors] == \
+        ['keep_prob_like', 'rate_like', 'select_like']
+
+
+def test_dropout_unmatched_scopes(dropout_scope_graph_tuple):
+    graph_def, output_nodes = dropout_scope_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes=output_nodes)
+    transformer = DropoutTransformer()
+    new_ugraph = transformer.transform(ugraph)
+    assert transformer.num_rewrites == 1
+    assert transformer.unmatched_scopes == ['dropout_fake']
+    assert 'dropout_fake/mul' in new_ugraph.ops_info
+    assert not [name for name in new_ugraph.ops_info if name.startswith('dropout/')]
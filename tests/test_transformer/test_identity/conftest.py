@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+
+@pytest.fixture(scope='session', name='identity_graph_tuple')
+def identity_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[2, 3], name='x')
+        weight = tf.constant(np.random.randn(3, 4), dtype=tf.float32, name='weight')
+        # as in frozen graphs
+        weight = tf.identity(weight, name='weight/read')
+        h = tf.stop_gradient(tf.matmul(x, weight, name='matmul'), name='stop_gradient')
+        h = tf.reshape(h, [2, 4], name='same_shape')
+        h = tf.reshape(h, [4, 2], name='new_shape')
+        h = tf.identity(h, name='forward')
+        y = tf.identity(h, name='y')
+        tf.no_op(name='noop')
+    return graph.as_graph_def(), [y.op.name]
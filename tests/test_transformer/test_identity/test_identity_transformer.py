@@ -0,0 +1,36 @@
+import numpy as np
+import tensorflow as tf
+
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import IdentityTransformer
+
+
+def _run(graph_def, output_name, x):
+    graph = tf.Graph()
+    with graph.as_default():
+        tf.import_graph_def(graph_def, name='')
+    with tf.Session(graph=graph) as sess:
+        return sess.run('{}:0'.format(output_name), feed_dict={'x:0': x})
+
+
+def test_identity(identity_graph_tuple):
+    graph_def, output_nodes = identity_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    assert 'noop' in ugraph.ops_info
+    transformer = IdentityTransformer()
+    new_ugraph = transformer.transform(ugraph)
+    for op_name in ['weight/read', 'stop_gradient', 'same_shape', 'forward', 'noop']:
+        assert op_name not in new_ugraph.ops_info
+    assert transformer.removal_stats == {'ops_removed': 5,
+                                         'tensors_removed': 4,
+                                         'bytes_removed': 3 * 4 * 4 + 3 * 2 * 4 * 4}
+    matmul = new_ugraph.ops_info['matmul']
+    assert [tensor.name for tensor in matmul.input_tensors] == ['x:0', 'weight:0']
+    assert new_ugraph.ops_info['new_shape'].input_tensors[0].name == 'matmul:0'
+    # output nodes are kept
+    assert new_ugraph.ops_info['y'].input_tensors[0].name == 'new_shape:0'
+
+    x = np.random.randn(2, 3).astype(np.float32)
+    expected = _run(graph_def, output_nodes[0], x)
+    result = _run(new_ugraph.graph_def, output_nodes[0], x)
+    assert np.allclose(result, expected)
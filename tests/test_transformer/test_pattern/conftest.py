@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+
+@pytest.fixture(scope='session', name='dropout_mlp_graph_tuple')
+def dropout_mlp_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 4], name='x')
+        keep_prob = tf.placeholder(dtype=tf.float32, name='keep_prob')
+        for i in range(3):
+            weight = tf.constant(np.random.randn(4, 4),
+                                 dtype=tf.float32,
+                                 name='weight_{}'.format(i))
+            x = tf.nn.relu(tf.matmul(x, weight), name='relu_{}'.format(i))
+            x = tf.nn.dropout(x, keep_prob, name='dropout_{}'.format(i))
+        y = tf.identity(x, name='y')
+    return graph.as_graph_def(), [y.op.name]
@@ -0,0 +1,47 @@
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import DropoutTransformer
+from utensor_cgen.transformer.analysis import OpTypeIndex
+from utensor_cgen.transformer.pattern import (OpPattern, RewriteRule,
+                                              apply_rewrite_rules)
+
+
+def test_pattern_match(dropout_mlp_graph_tuple):
+    ugraph = uTensorGraph(*dropout_mlp_graph_tuple)
+    pattern = OpPattern('Relu', name='relu', inputs=[
+        OpPattern('MatMul', name='matmul', inputs=[
+            None,
+            OpPattern('Const', name='weight',
+                      predicate=lambda op: op.name.startswith('weight'))
+        ])
+    ])
+    matches = []
+    rule = RewriteRule(pattern, lambda ugraph, match: matches.append(match))
+    num_rewrites = apply_rewrite_rules(ugraph, [rule], OpTypeIndex.run(ugraph))
+    assert num_rewrites == 3
+    assert sorted(match['weight'].name for match in matches) == \
+        ['weight_0', 'weight_1', 'weight_2']
+    for match in matches:
+        assert match['matmul'].input_tensors[1].op_name == match['weight'].name
+
+    # the same name binds the same op
+    same_input = OpPattern('MatMul', name='matmul', inputs=[
+        OpPattern(name='in'), OpPattern(name='in')
+    ])
+    rule = RewriteRule(same_input, lambda ugraph, match: None)
+    assert apply_rewrite_rules(ugraph, [rule], OpTypeIndex.run(ugraph)) == 0
+
+
+def test_dropout_pattern(dropout_mlp_graph_tuple):
+    graph_def, output_nodes = dropout_mlp_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    transformer = DropoutTransformer()
+    new_ugraph = transformer.transform(ugraph)
+    assert transformer.num_rewrites == 3
+    assert 'keep_prob' not in new_ugraph.ops_info
+    assert not any(name.startswith('dropout') for name in new_ugraph.ops_info)
+    for i in range(1, 3):
+        matmul = new_ugraph.ops_info['MatMul_{}'.format(i)]
+        assert matmul.input_tensors[0].op_name == 'relu_{}'.format(i - 1)
+    assert new_ugraph.ops_info['y'].input_tensors[0].op_name == 'relu_2'
+    # the original graph is untouched
+    assert ugraph.ops_info['y'].input_tensors[0].op_name.startswith('dropout_2')
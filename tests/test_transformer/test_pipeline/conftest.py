@@ -1,6 +1,7 @@
 from random import shuffle
 
 import pytest
+import tensorflow as tf
 
 from utensor_cgen.transformer import (BatchNormTransformer, DropoutTransformer,
                                       QuantizeTransformer, RefCntOptimizer)
@@ -14,3 +15,28 @@ def pipeline_methods():
                    RefCntOptimizer.METHOD_NAME]
     shuffle(all_methods)
     return all_methods
+
+
+@pytest.fixture(scope='session', name='refcnt_graph_tuple')
+def refcnt_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.constant(1, name='x', dtype=tf.float32)
+        y = tf.constant(1, name='y', dtype=tf.float32)
+        z = tf.add(x, y, name='z')
+        w = tf.add(x, 2.0, name='w')
+        k = tf.add(z, w, name='k')
+    return graph.as_graph_def(), [k.op.name]
+
+
+@pytest.fixture(scope='session', name='hidden_duplicate_graph_tuple')
+def hidden_duplicate_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[4], name='x')
+        c = tf.constant([1., 2., 3., 4.], name='c')
+        # duplicates once the Identity is removed
+        y = tf.add(x, tf.identity(c, name='c_read'), name='y')
+        z = tf.add(x, c, name='z')
+        out = tf.multiply(y, z, name='out')
+    return graph.as_graph_def(), [out.op.name]
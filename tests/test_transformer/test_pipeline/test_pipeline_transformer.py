@@ -1,4 +1,5 @@
-from utensor_cgen.transformer import TransformerPipeline
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import TransformerPipeline, pipline
 
 
 # three random tests
@@ -19,3 +20,92 @@ def test_pipeline_3(methods):
     assert len(pipeline.pipeline) == len(methods)
     for transformer, method_name in zip(pipeline.pipeline, methods):
         assert isinstance(transformer, pipeline._TRANSFORMER_MAP[method_name])
+
+def test_pipeline_analyses_cache(refcnt_graph_tuple):
+    graph_def, output_nodes = refcnt_graph_tuple
+    results = []
+    for cache_analyses in [False, True]:
+        ugraph = uTensorGraph(graph_def, output_nodes)
+        pipeline = TransformerPipeline(['inline', 'refcnt', 'inline'], {},
+                                       cache_analyses=cache_analyses)
+        new_ugraph = pipeline.transform(ugraph)
+        results.append(new_ugraph)
+        # refcnt and inline preserve the reachability of the first pruning
+        assert pipeline.analysis_manager.misses == (4 if cache_analyses else 5)
+        assert pipeline.analysis_manager.hits == (1 if cache_analyses else 0)
+        assert all(transformer.analysis_manager is None
+                   for transformer in pipeline.pipeline)
+    no_cache, cache = results
+    assert no_cache.topo_order == cache.topo_order
+    for op_name in no_cache.topo_order:
+        assert no_cache.ops_info[op_name].op_attr['_utensor_refcnt__ref_counts'] == \
+            cache.ops_info[op_name].op_attr['_utensor_refcnt__ref_counts']
+
+def test_pipeline_prune_stats(refcnt_graph_tuple):
+    graph_def, _ = refcnt_graph_tuple
+    ugraph = uTensorGraph(graph_def, ['z'])
+    pipeline = TransformerPipeline(['inline', 'refcnt', 'inline'], {})
+    new_ugraph = pipeline.transform(ugraph)
+    assert sorted(new_ugraph.ops_info) == ['x', 'y', 'z']
+    assert not new_ugraph.is_dirty
+    assert new_ugraph.topo_order[-1] == 'z'
+    assert [stats['method'] for stats in pipeline.stats] == ['inline', 'refcnt', 'inline']
+    assert [stats['ops_removed'] for stats in pipeline.stats] == [3, None, 0]
+
+def test_pipeline_fixed_point(hidden_duplicate_graph_tuple):
+    graph_def, output_nodes = hidden_duplicate_graph_tuple
+    once = TransformerPipeline(['cse', 'identity'], {}).transform(
+        uTensorGraph(graph_def, output_nodes))
+    assert 'z' in once.ops_info
+
+    pipeline = TransformerPipeline(['cse+identity'], {})
+    assert [type(transformer).METHOD_NAME for transformer in pipeline.pipeline] == \
+        ['cse', 'identity']
+    new_ugraph = pipeline.transform(uTensorGraph(graph_def, output_nodes))
+    assert 'c_read' not in new_ugraph.ops_info and 'z' not in new_ugraph.ops_info
+    assert [tensor.name for tensor in new_ugraph.ops_info['out'].input_tensors] == \
+        ['y:0', 'y:0']
+    stats, = pipeline.stats
+    assert stats['method'] == 'cse+identity'
+    assert stats['converged']
+    assert stats['ops_removed'] == 2
+    # identity exposes a duplicate, only passes not clean are run again
+    assert [[(pass_stats['method'], pass_stats['changed']) for pass_stats in iteration]
+            for iteration in stats['iterations']] == \
+        [[('cse', False), ('identity', True)],
+         [('cse', True), ('identity', False)],
+         [('cse', False)]]
+
+def test_pipeline_fixed_point_cap(hidden_duplicate_graph_tuple):
+    graph_def, output_nodes = hidden_duplicate_graph_tuple
+    pipeline = TransformerPipeline(['cse+identity'], {}, max_iterations=1)
+    new_ugraph = pipeline.transform(uTensorGraph(graph_def, output_nodes))
+    assert 'z' in new_ugraph.ops_info
+    assert not pipeline.stats[0]['converged']
+    assert len(pipeline.stats[0]['iterations']) == 1
+
+def test_pipeline_fixed_point_no_report(hidden_duplicate_graph_tuple):
+    # refcnt doesn't report changes, it only sets attributes
+    graph_def, output_nodes = hidden_duplicate_graph_tuple
+    pipeline = TransformerPipeline(['identity+refcnt'], {})
+    pipeline.transform(uTensorGraph(graph_def, output_nodes))
+    stats, = pipeline.stats
+    assert stats['converged']
+    assert [[pass_stats['changed'] for pass_stats in iteration]
+            for iteration in stats['iterations']] == [[True, False], [False]]
+
+def test_pipeline_fixed_point_signatures(hidden_duplicate_graph_tuple, monkeypatch):
+    graph_def, output_nodes = hidden_duplicate_graph_tuple
+    num_signatures = [0]
+    graph_signature = pipline._graph_signature
+
+    def counted_signature(ugraph):
+        num_signatures[0] += 1
+        return graph_signature(ugraph)
+    monkeypatch.setattr(pipline, '_graph_signature', counted_signature)
+    # all passes report changes
+    TransformerPipeline(['cse+identity'], {}).transform(uTensorGraph(graph_def, output_nodes))
+    assert num_signatures[0] == 0
+    # before the first refcnt, after each refcnt
+    TransformerPipeline(['identity+refcnt'], {}).transform(uTensorGraph(graph_def, output_nodes))
+    assert num_signatures[0] == 2
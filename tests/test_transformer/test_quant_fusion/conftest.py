@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+
+@pytest.fixture(scope='session', name='quantized_layer_graph_tuple')
+def quantized_layer_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 16], name='x')
+        weight = tf.constant(np.random.rand(16, 8), dtype=tf.float32, name='weight')
+        q_x = tf.raw_ops.QuantizeV2(input=x, min_range=0., max_range=1., T=tf.quint8,
+                                    mode='MIN_FIRST', name='quantize_x')
+        q_w = tf.raw_ops.QuantizeV2(input=weight, min_range=0., max_range=1., T=tf.quint8,
+                                    mode='MIN_FIRST', name='quantize_weight')
+        matmul = tf.raw_ops.QuantizedMatMul(a=q_x[0], b=q_w[0],
+                                            min_a=q_x[1], max_a=q_x[2],
+                                            min_b=q_w[1], max_b=q_w[2],
+                                            Toutput=tf.qint32, name='matmul')
+        requant_range = tf.raw_ops.RequantizationRange(input=matmul[0],
+                                                       input_min=matmul[1],
+                                                       input_max=matmul[2],
+                                                       name='requant_range')
+        requant = tf.raw_ops.Requantize(input=matmul[0],
+                                        input_min=matmul[1],
+                                        input_max=matmul[2],
+                                        requested_output_min=requant_range[0],
+                                        requested_output_max=requant_range[1],
+                                        out_type=tf.quint8,
+                                        name='requantize')
+        relu = tf.raw_ops.QuantizedRelu(features=requant[0],
+                                        min_features=requant[1],
+                                        max_features=requant[2],
+                                        out_type=tf.quint8,
+                                        name='relu')
+        y = tf.raw_ops.Dequantize(input=relu[0], min_range=relu[1], max_range=relu[2],
+                                  mode='MIN_FIRST', name='y')
+    return graph.as_graph_def(), [y.op.name]
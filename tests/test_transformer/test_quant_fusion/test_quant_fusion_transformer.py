@@ -0,0 +1,44 @@
+import os
+
+import tensorflow as tf
+
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.operators import OperatorFactory
+from utensor_cgen.transformer import QuantizedFusionTransformer, TransformerPipeline
+
+
+def test_fuse_relu(quantized_layer_graph_tuple):
+    graph_def, output_nodes = quantized_layer_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    transformer = QuantizedFusionTransformer()
+    new_ugraph = transformer.transform(ugraph)
+    op_types = set(op.op_type for op in new_ugraph.ops_info.values())
+    assert not op_types & set(['QuantizedMatMul', 'RequantizationRange',
+                               'Requantize', 'QuantizedRelu'])
+    fused = new_ugraph.ops_info['relu']
+    assert fused.op_type == 'QuantizedFusedMatMul'
+    assert fused.op_attr['fused_relu'].value
+    assert [tensor.name for tensor in fused.input_tensors] == \
+      [tensor.name for tensor in ugraph.ops_info['matmul'].input_tensors]
+    assert new_ugraph.ops_info['y'].input_tensors[0].op_name == 'relu'
+    assert transformer.fusion_stats['layers_fused'] == 1
+    assert transformer.fusion_stats['ops_removed'] == 3
+    # qint32 and uint8 values of 8 elements, and 4 floats of ranges
+    assert transformer.fusion_stats['bytes_removed'] == 4 * 8 + 8 + 4 * 6
+
+    snippet = OperatorFactory().createOperatorSnippet(fused)
+    assert 'QntFusedMatMulOp<uint8_t, uint8_t, uint8_t>(true)' in snippet.render()
+
+
+def test_fuse_mnist():
+    pb_file = os.path.join(os.path.dirname(__file__), '..', '..', 'deep_mlp', 'simple_mnist.pb')
+    graph_def = tf.GraphDef()
+    with open(pb_file, 'rb') as fid:
+        graph_def.ParseFromString(fid.read())
+    pipeline = TransformerPipeline(['quantize', 'quant_fusion'], {})
+    new_ugraph = pipeline.transform(uTensorGraph(graph_def, ['y_pred']))
+    op_types = [op.op_type for op in new_ugraph.ops_info.values()]
+    assert 'QuantizedMatMul' not in op_types
+    assert op_types.count('QuantizedFusedMatMul') == 3
+    # not followed by a QuantizedRelu
+    assert not new_ugraph.ops_info['Layer1/MatMul/eightbit/requantize'].op_attr['fused_relu'].value
@@ -0,0 +1,28 @@
+import os
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+
+@pytest.fixture(scope='session', name='mnist_graph_tuple')
+def mnist_graph():
+    pb_file = os.path.join(os.path.dirname(__file__), '..', '..', 'deep_mlp', 'simple_mnist.pb')
+    graph_def = tf.GraphDef()
+    with open(pb_file, 'rb') as fid:
+        graph_def.ParseFromString(fid.read())
+    return graph_def, ['y_pred']
+
+
+@pytest.fixture(scope='session', name='float_consumer_graph_tuple')
+def float_consumer_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 64], name='x')
+        # channels of very different ranges
+        weight = tf.constant(np.random.randn(32, 64) * np.logspace(-2, 2, 64),
+                             dtype=tf.float32,
+                             name='weight')
+        # Sub has no quantized kernel
+        y = tf.subtract(x, weight, name='y')
+    return graph.as_graph_def(), [y.op.name]
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.operators import OperatorFactory
+from utensor_cgen.transformer import QuantizeTransformer, TransformerPipeline
+from utensor_cgen.transformer.utils import make_const_op
+
+
+def _run(graph_def, output_name, x):
+    graph = tf.Graph()
+    with graph.as_default():
+        tf.import_graph_def(graph_def, name='')
+    with tf.Session(graph=graph) as sess:
+        return sess.run(output_name, feed_dict={'x:0': x})
+
+
+def test_quantize_mnist(mnist_graph_tuple):
+    graph_def, output_nodes = mnist_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    transformer = QuantizeTransformer()
+    new_ugraph = transformer.transform(ugraph)
+    op_types = set(op.op_type for op in new_ugraph.ops_info.values())
+    assert not op_types & set(['MatMul', 'Add', 'Relu'])
+    assert set(['QuantizeV2', 'QuantizedMatMul', 'QuantizedAdd', 'QuantizedRelu',
+                'RequantizationRange', 'Requantize', 'Dequantize']) <= op_types
+    # quantized weights are fed to the quantized kernel directly
+    matmul = new_ugraph.ops_info['Layer1/MatMul/eightbit']
+    assert [tensor.name for tensor in matmul.input_tensors[1::4]] == \
+      ['Layer1/Variable_quantized_const:0', 'Layer1/Variable_quantized_max:0']
+    assert matmul.input_tensors[1].dtype == np.dtype(tf.quint8.as_numpy_dtype)
+    # consumers of float ops are not changed
+    assert new_ugraph.ops_info['Layer1/Relu'].op_type == 'Dequantize'
+    assert transformer.quantize_stats['weights_quantized'] == 2
+    assert transformer.quantize_stats['weight_bytes_after'] * 3 < \
+      transformer.quantize_stats['weight_bytes_before']
+
+    x = np.random.RandomState(0).rand(10, 784).astype(np.float32)
+    expected = _run(graph_def, 'OuputLayer/logits:0', x)
+    result = _run(new_ugraph.graph_def, 'OuputLayer/logits:0', x)
+    assert np.abs(result - expected).max() < 0.05 * np.abs(expected).max()
+    assert (result.argmax(axis=1) == expected.argmax(axis=1)).mean() >= 0.9
+
+
+def test_quantize_float_consumer(float_consumer_graph_tuple):
+    graph_def, output_nodes = float_consumer_graph_tuple
+    pipeline = TransformerPipeline(['quantize'], {})
+    new_ugraph = pipeline.transform(uTensorGraph(graph_def, output_nodes))
+    dequantize = new_ugraph.ops_info['weight']
+    assert dequantize.op_type == 'Dequantize'
+    # a single range, uTensor has no per-channel Dequantize
+    assert dequantize.op_attr['mode'].value == b'MIN_FIRST'
+    assert 'axis' not in dequantize.op_attr
+    assert new_ugraph.ops_info['weight_quantized_min'].output_tensors[0].shape == []
+
+    x = np.zeros([1, 64], dtype=np.float32)
+    expected = _run(graph_def, 'y:0', x)
+    result = _run(new_ugraph.graph_def, 'y:0', x)
+    # errors within half a step of the range of the weight
+    step = (np.maximum(expected.max(), 0) - np.minimum(expected.min(), 0)) / 255
+    assert (np.abs(result - expected) <= step / 2 + 1e-6).all()
+
+
+def test_dequantize_operator_mode():
+    ugraph = uTensorGraph()
+    dequantize = make_const_op(ugraph, 'dequantize', np.zeros([4], dtype=np.float32))
+    dequantize.op_type = 'Dequantize'
+    # MIN_COMBINED if not set
+    with pytest.raises(ValueError, match='dequantize, mode MIN_COMBINED'):
+        OperatorFactory().createOperatorSnippet(dequantize)
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+import tensorflow as tf
+
+
+@pytest.fixture(scope='session', name='mnist_graph_tuple')
+def mnist_graph():
+    pb_file = os.path.join(os.path.dirname(__file__), '..', '..', 'deep_mlp', 'simple_mnist.pb')
+    graph_def = tf.GraphDef()
+    with open(pb_file, 'rb') as fid:
+        graph_def.ParseFromString(fid.read())
+    return graph_def, ['y_pred']
+
+
+@pytest.fixture(scope='session', name='const_range_graph_tuple')
+def const_range_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 16], name='x')
+        quantized = tf.raw_ops.QuantizeV2(input=x, min_range=-1., max_range=1., T=tf.quint8,
+                                          mode='MIN_FIRST', name='quantize_x')
+        dequantized = tf.raw_ops.Dequantize(input=quantized[0],
+                                            min_range=quantized[1],
+                                            max_range=quantized[2],
+                                            mode='MIN_FIRST', name='dequantize')
+        # calibrated range
+        requantized = tf.raw_ops.QuantizeV2(input=dequantized,
+                                            min_range=tf.constant(-0.5, name='min'),
+                                            max_range=tf.constant(0.5, name='max'),
+                                            T=tf.quint8, mode='MIN_FIRST', name='requantize')
+        y = tf.raw_ops.Dequantize(input=requantized[0],
+                                  min_range=requantized[1],
+                                  max_range=requantized[2],
+                                  mode='MIN_FIRST', name='y')
+    return graph.as_graph_def(), [y.op.name]
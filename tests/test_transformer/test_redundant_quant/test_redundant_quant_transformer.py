@@ -0,0 +1,45 @@
+import numpy as np
+import tensorflow as tf
+
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.transformer import RedundantQuantizationTransformer, TransformerPipeline
+
+
+def _run(graph_def, output_name, x):
+    graph = tf.Graph()
+    with graph.as_default():
+        tf.import_graph_def(graph_def, name='')
+    with tf.Session(graph=graph) as sess:
+        return sess.run(output_name, feed_dict={'x:0': x})
+
+
+def test_remove_pairs(mnist_graph_tuple):
+    graph_def, output_nodes = mnist_graph_tuple
+    quant_ugraph = TransformerPipeline(['quantize'], {}).transform(uTensorGraph(graph_def,
+                                                                                output_nodes))
+    transformer = RedundantQuantizationTransformer()
+    new_ugraph = transformer.transform(quant_ugraph)
+    # between MatMul, Add and Relu of 3 layers, Relu and MatMul of 2
+    assert transformer.removal_stats == {'pairs_removed': 7}
+    for op_info in new_ugraph.ops_info.values():
+        if op_info.op_type == 'QuantizeV2':
+            assert op_info.input_tensors[0].op.op_type != 'Dequantize'
+    relu = new_ugraph.ops_info['Layer1/Relu/eightbit']
+    assert [tensor.name for tensor in relu.input_tensors] == \
+      ['Layer1/zscore/eightbit/requantize:{}'.format(idx) for idx in range(3)]
+    assert len(new_ugraph.ops_info) < len(quant_ugraph.ops_info)
+
+    x = np.random.RandomState(0).rand(10, 784).astype(np.float32)
+    expected = _run(graph_def, 'OuputLayer/logits:0', x)
+    result = _run(new_ugraph.graph_def, 'OuputLayer/logits:0', x)
+    assert np.abs(result - expected).max() < 0.05 * np.abs(expected).max()
+
+
+def test_keep_const_range(const_range_graph_tuple):
+    graph_def, output_nodes = const_range_graph_tuple
+    transformer = RedundantQuantizationTransformer()
+    new_ugraph = transformer.transform(uTensorGraph(graph_def, output_nodes))
+    # no Requantize of 8 bits inputs
+    assert transformer.removal_stats == {'pairs_removed': 0}
+    assert new_ugraph.ops_info['requantize'].op_type == 'QuantizeV2'
+    assert new_ugraph.ops_info['dequantize'].op_type == 'Dequantize'
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+
+@pytest.fixture(scope='session', name='concat_graph_tuple')
+def concat_graph():
+    """concat of a large tensor and of the small output of a branch
+    with large intermediates, better computed first
+    """
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 64], name='x')
+        weight = tf.constant(np.random.randn(64, 1024), dtype=tf.float32)
+        large = tf.matmul(x, weight, name='large')
+        weight = tf.constant(np.random.randn(64, 1024), dtype=tf.float32)
+        hidden = tf.nn.relu(tf.matmul(x, weight, name='hidden'), name='relu')
+        weight = tf.constant(np.random.randn(1024, 8), dtype=tf.float32)
+        small = tf.matmul(hidden, weight, name='small')
+        y = tf.concat([large, small], axis=1, name='y')
+    return graph.as_graph_def(), [y.op.name]
+
+
+@pytest.fixture(scope='session', name='add_branches_graph_tuple')
+def add_branches_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 4], name='x')
+        branches = []
+        for name in ['a', 'b']:
+            c = tf.constant(np.random.randn(1, 4), dtype=tf.float32, name='c_' + name)
+            branches.append(tf.raw_ops.Add(x=x, y=c, name=name))
+        y = tf.raw_ops.Add(x=branches[0], y=branches[1], name='y')
+    return graph.as_graph_def(), [y.op.name]
@@ -0,0 +1,59 @@
+import pytest
+
+from utensor_cgen.code_generator import CodeGenerator
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.memory import peak_live_bytes
+from utensor_cgen.transformer import ScheduleTransformer, TransformerPipeline
+
+
+def _is_topological(ugraph, order):
+    position = dict((op_name, idx) for idx, op_name in enumerate(order))
+    return all(position[tensor.op_name] < position[op_name]
+               for op_name in order
+               for tensor in ugraph.ops_info[op_name].input_tensors)
+
+
+@pytest.mark.parametrize('mode', ['heuristic', 'exact'])
+def test_schedule(concat_graph_tuple, mode):
+    ugraph = uTensorGraph(*concat_graph_tuple)
+    # depth first order computes `large` first
+    assert peak_live_bytes(ugraph) == 3 * 4096
+    transformer = ScheduleTransformer(mode=mode)
+    new_ugraph = transformer.transform(ugraph)
+    order = new_ugraph.topo_order
+    assert sorted(order) == sorted(ugraph.topo_order)
+    assert _is_topological(new_ugraph, order)
+    assert order.index('small') < order.index('large')
+    # hidden and relu, then the output with its inputs
+    expected_peak = 4 * (1024 + 1032 + 8)
+    assert transformer.schedule_stats == {'mode': mode,
+                                          'peak_before': 3 * 4096,
+                                          'peak_after': expected_peak}
+    assert peak_live_bytes(new_ugraph) == expected_peak
+
+
+def test_schedule_fallback(concat_graph_tuple):
+    pipeline = TransformerPipeline(['schedule'], {'_utensor_schedule__mode': 'exact',
+                                                  '_utensor_schedule__max_exact_ops': 2})
+    pipeline.transform(uTensorGraph(*concat_graph_tuple))
+    assert pipeline.pipeline[0].schedule_stats['mode'] == 'heuristic'
+
+
+def test_saved_schedule_codegen(add_branches_graph_tuple, tmpdir):
+    graph_def, output_nodes = add_branches_graph_tuple
+    ugraph = uTensorGraph(graph_def, output_nodes)
+    # a valid order other than the depth first one
+    order = ['x', 'c_b', 'b', 'c_a', 'a', 'y']
+    assert ugraph.topo_order != order
+    ugraph.topo_order = order
+    ugraph_file = str(tmpdir.join('scheduled.ugraph'))
+    ugraph.save(ugraph_file)
+    assert uTensorGraph.load(ugraph_file).topo_order == order
+
+    src_fname = str(tmpdir.join('scheduled.cpp'))
+    generator = CodeGenerator(ugraph_file, str(tmpdir.join('constants')), '/fs/constants',
+                              [], list(output_nodes))
+    generator.generate(src_fname)
+    with open(src_fname) as fid:
+        source = fid.read()
+    assert source.index('"b:0"') < source.index('"a:0"')
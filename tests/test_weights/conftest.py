@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+
+@pytest.fixture(scope='session', name='tied_graph_tuple')
+def tied_graph():
+    graph = tf.Graph()
+    with graph.as_default():
+        x = tf.placeholder(dtype=tf.float32, shape=[1, 16], name='x')
+        weight = np.random.randn(1, 16)
+        for i in range(3):
+            # same weight, zero biases (no float MatMul in uTensor)
+            w = tf.constant(weight, dtype=tf.float32, name='weight_{}'.format(i))
+            b = tf.constant(np.zeros(16), dtype=tf.float32, name='bias_{}'.format(i))
+            x = tf.raw_ops.Add(x=tf.raw_ops.Add(x=x, y=w, name='scale_{}'.format(i)), y=b,
+                              name='add_{}'.format(i))
+    return graph.as_graph_def(), [x.op.name]
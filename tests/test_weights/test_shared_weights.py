@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+
+from utensor_cgen.code_generator import CodeGenerator
+from utensor_cgen.weights import SharedWeights
+
+
+def test_shared_weights():
+    shared_weights = SharedWeights()
+    value = np.arange(6, dtype=np.float32).reshape(2, 3)
+    assert shared_weights.get_name('idx', value, 'a') == 'a'
+    assert shared_weights.get_name('idx', value.copy(), 'b') == 'a'
+    # different kind, shape, dtype or values
+    assert shared_weights.get_name('inline', value, 'c') == 'c'
+    assert shared_weights.get_name('idx', value.reshape(3, 2), 'd') == 'd'
+    assert shared_weights.get_name('idx', value.astype(np.int32), 'e') == 'e'
+    assert shared_weights.get_name('idx', value + 1, 'f') == 'f'
+    assert shared_weights.num_shared == 1
+    assert shared_weights.bytes_saved == value.nbytes
+
+
+def _generate(graph_tuple, tmpdir, methods):
+    graph_def, output_nodes = graph_tuple
+    pb_file = str(tmpdir.join('tied.pb'))
+    with open(pb_file, 'wb') as fid:
+        fid.write(graph_def.SerializeToString())
+    src_fname = str(tmpdir.join('tied.cpp'))
+    idx_dir = str(tmpdir.join('constants'))
+    generator = CodeGenerator(pb_file, idx_dir, '/fs/constants', methods, output_nodes)
+    generator.generate(src_fname)
+    with open(src_fname) as fid:
+        source = fid.read()
+    return generator, source, idx_dir
+
+
+def test_shared_idx_files(tied_graph_tuple, tmpdir):
+    generator, source, idx_dir = _generate(tied_graph_tuple, tmpdir, ['refcnt'])
+    assert sorted(os.listdir(idx_dir)) == ['bias_0_0.idx', 'weight_0_0.idx']
+    assert source.count('"/fs/constants/weight_0_0.idx"') == 3
+    assert source.count('"/fs/constants/bias_0_0.idx"') == 3
+    assert generator.shared_weights.num_shared == 4
+    assert generator.shared_weights.bytes_saved == 2 * (16 * 4 + 16 * 4)
+
+
+def test_shared_inline_arrays(tied_graph_tuple, tmpdir):
+    generator, source, _ = _generate(tied_graph_tuple, tmpdir, ['inline'])
+    with open(str(tmpdir.join('tied_weight.hpp'))) as fid:
+        weight_header = fid.read()
+    assert weight_header.count('inline_weight_0_0 [') == 1
+    assert weight_header.count('inline_bias_0_0 [') == 1
+    assert 'inline_weight_1_0' not in weight_header
+    assert source.count('inline_weight_0_0') == 3
+    assert generator.shared_weights.num_shared == 4
+
+
+def test_grouped_inline_arrays(tied_graph_tuple, tmpdir):
+    _, source, _ = _generate(tied_graph_tuple, tmpdir, ['identity+inline'])
+    # inline arrays are written though inline is not a method by itself
+    with open(str(tmpdir.join('tied_weight.hpp'))) as fid:
+        weight_header = fid.read()
+    assert weight_header.count('inline_weight_0_0 [') == 1
+    assert source.count('inline_weight_0_0') == 3
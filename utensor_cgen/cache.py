@@ -0,0 +1,177 @@
+# -*- coding:utf8 -*-
+r"""Transformed Graph Cache
+
+Graphs transformed by `CodeGenerator` are saved in a cache directory
+(see `uTensorGraph.save`), under a fingerprint of everything the
+transformation depends on: the model file, the output nodes, the
+transform methods and their kwargs, the importer and the version of
+utensor_cgen. Converting the same model with the same methods again
+loads the transformed graph instead of parsing and transforming it.
+
+The total size of the cache is bounded, the least recently used graphs
+are evicted first.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+__all__ = ['GraphCache']
+
+_logger = logging.getLogger('utensor-cli')
+
+_EXT = '.ugraph'
+_TMP_EXT = '.tmp'
+# temporary files older than this (seconds) are left by interrupted writes
+_TMP_MAX_AGE = 3600
+
+# os.rename is atomic on POSIX, os.replace on all platforms (python 3)
+_replace = getattr(os, 'replace', os.rename)
+
+
+def _source_digest():
+  digest = hashlib.sha1()
+  pkg_dir = os.path.dirname(os.path.abspath(__file__))
+  for dir_path, dir_names, file_names in os.walk(pkg_dir):
+    dir_names.sort()
+    for fname in sorted(file_names):
+      if fname.endswith('.py'):
+        with open(os.path.join(dir_path, fname), 'rb') as fid:
+          digest.update(fid.read())
+  return digest.hexdigest()
+
+
+def _package_version():
+  """Version of the installed distribution, if any, and a digest of the
+  sources: editable installs and checkouts change without a new version
+  """
+  import pkg_resources
+  try:
+    version = pkg_resources.get_distribution('utensor_cgen').version
+  except pkg_resources.DistributionNotFound:
+    version = 'none'
+  return '{}+src-{}'.format(version, _source_digest())
+
+
+def _update_file(digest, path, chunk_size=1 << 20):
+  with open(path, 'rb') as fid:
+    for chunk in iter(lambda: fid.read(chunk_size), b''):
+      digest.update(chunk)
+
+
+class GraphCache(object):
+  """Transformed graphs saved in `cache_dir`, at most `max_bytes` in
+  total
+
+  Hits, misses and evicted graphs since creation are counted in `hits`,
+  `misses` and `evictions`.
+  """
+
+  def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+    if not os.path.exists(cache_dir):
+      os.makedirs(cache_dir)
+    self.cache_dir = cache_dir
+    self.max_bytes = max_bytes
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  @staticmethod
+  def fingerprint(model_file, output_nodes, trans_methods, trans_kwargs=None,
+                  importer='tf', weight_file=None, version=None):
+    """Key of the transformed graph of `model_file`
+
+    `version` defaults to the version of utensor_cgen
+    """
+    if version is None:
+      version = _package_version()
+    digest = hashlib.sha256()
+    config = {
+      'version': version,
+      'output_nodes': list(output_nodes),
+      'trans_methods': list(trans_methods),
+      'trans_kwargs': trans_kwargs or {},
+      'importer': importer,
+    }
+    digest.update(json.dumps(config, sort_keys=True, default=repr).encode('utf8'))
+    _update_file(digest, model_file)
+    if weight_file is not None:
+      digest.update(b'weight_file')
+      _update_file(digest, weight_file)
+    return digest.hexdigest()
+
+  def _path(self, key):
+    return os.path.join(self.cache_dir, key + _EXT)
+
+  def get(self, key):
+    """The graph saved under `key`, None if not cached
+    """
+    from .ir import uTensorGraph
+
+    path = self._path(key)
+    if not os.path.exists(path):
+      self.misses += 1
+      return None
+    try:
+      ugraph = uTensorGraph.load(path)
+    except Exception as err:  # pylint: disable=W0703
+      _logger.warning('Removing unreadable cached graph %s: %s', path, err)
+      self._remove(path)
+      self.misses += 1
+      return None
+    # most recently used
+    os.utime(path, None)
+    self.hits += 1
+    return ugraph
+
+  def put(self, key, ugraph):
+    """Save `ugraph` under `key`, evicting least recently used graphs
+    if the cache is too large
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix=_TMP_EXT, dir=self.cache_dir)
+    os.close(fd)
+    try:
+      ugraph.save(tmp_path)
+      # atomic, concurrent conversions never read a partial file
+      _replace(tmp_path, self._path(key))
+    finally:
+      if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    self._evict()
+
+  def _evict(self):
+    entries = []
+    now = time.time()
+    for fname in os.listdir(self.cache_dir):
+      if not fname.endswith((_EXT, _TMP_EXT)):
+        continue
+      path = os.path.join(self.cache_dir, fname)
+      try:
+        stat = os.stat(path)
+      except OSError:
+        # removed by another process
+        continue
+      if fname.endswith(_TMP_EXT):
+        # recent ones may be written by concurrent conversions
+        if now - stat.st_mtime > _TMP_MAX_AGE and self._remove(path):
+          _logger.info('Removed stale temporary file %s', path)
+        continue
+      entries.append((stat.st_mtime, fname, stat.st_size, path))
+    total = sum(entry[2] for entry in entries)
+    for _, _, size, path in sorted(entries):
+      if total <= self.max_bytes:
+        break
+      if self._remove(path):
+        total -= size
+        self.evictions += 1
+        _logger.info('Evicted cached graph %s (%d bytes)', path, size)
+
+  @staticmethod
+  def _remove(path):
+    try:
+      os.remove(path)
+    except OSError:
+      return False
+    return True
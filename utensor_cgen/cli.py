@@ -7,6 +7,8 @@ import pkg_resources
 
 from .utils import NArgsParam
 
+_IMPORTERS = ['tf', 'fast']
+
 
 def _get_pb_model_name(path):
   return os.path.basename(os.path.splitext(path)[0])
@@ -21,9 +23,10 @@ def cli():
   pass
 
 
-@cli.command(name='convert', help='convert graph to cpp/hpp files')
+@cli.command(name='convert', help=('convert graph to cpp/hpp files, MODEL can be '
+                                   'a pb file or a graph saved with --save-graph'))
 @click.help_option('-h', '--help')
-@click.argument('pb_file', required=True, metavar='MODEL.pb')
+@click.argument('pb_file', required=True, metavar='MODEL.{pb,ugraph}')
 @click.option('-o', '--output',
               metavar="FILE.cpp",
               help="output source file name, header file will be named accordingly. (defaults to protobuf name, e.g.: my_model.cpp)")
@@ -42,12 +45,12 @@ def cli():
 @click.option("--output-nodes",
               type=NArgsParam(),
               metavar="NODE_NAME,NODE_NAME,...",
-              required=True,
-              help="list of output nodes")
+              help="list of output nodes (required for pb file)")
 @click.option("--transform-methods",
               type=NArgsParam(),
               default='dropout,quantize,refcnt,inline',
-              help='optimization methods',
+              help=('optimization methods, methods joined by + (ex: identity+constfold+cse) '
+                    'are run repeatedly until the graph is unchanged'),
               metavar='METHOD,METHOD,...',
               show_default=True)
 @click.option("-m", "--model-dir",
@@ -57,13 +60,38 @@ def cli():
               show_default=True)
 @click.option("--save-graph",
               is_flag=True,
-              help="save transformed graph")
+              help="save transformed graph as quant_MODEL.ugraph")
+@click.option("--importer",
+              type=click.Choice(_IMPORTERS),
+              default='tf',
+              help="how to load the pb file, 'fast' loads it without importing into tensorflow",
+              show_default=True)
+@click.option("--weight-file",
+              metavar="FILE",
+              help="external weight file referenced by Const nodes of the pb file")
+@click.option("--arena",
+              is_flag=True,
+              help="place intermediate tensors in a static arena planned at compile time")
+@click.option("--cache-dir",
+              metavar="DIR",
+              envvar="UTENSOR_CGEN_CACHE_DIR",
+              help=("reuse graphs transformed by previous conversions of the same model "
+                    "with the same methods, saved in DIR (env: UTENSOR_CGEN_CACHE_DIR)"))
+@click.option("--cache-size",
+              type=int,
+              default=512,
+              metavar="MB",
+              help="max size of the cache, least recently used graphs are evicted",
+              show_default=True)
 def convert_graph(pb_file, output, data_dir, embed_data_dir, save_graph,
-                  debug_comment, output_nodes, transform_methods, model_dir):
+                  debug_comment, output_nodes, transform_methods, model_dir,
+                  importer, weight_file, arena, cache_dir, cache_size):
   from utensor_cgen.code_generator import CodeGenerator
 
   if pb_file is None:
     raise ValueError("No pb file given")
+  if not output_nodes and not pb_file.endswith('.ugraph'):
+    raise click.UsageError('--output-nodes is required for pb file')
 
   if not os.path.exists(model_dir):
     os.makedirs(model_dir)
@@ -80,7 +108,12 @@ def convert_graph(pb_file, output, data_dir, embed_data_dir, save_graph,
   # TODO: pass transformation kwargs to codegenerator (better argument parser)
   generator = CodeGenerator(pb_file, data_dir, embed_data_dir,
                             transform_methods, output_nodes,
-                            save_graph, debug_comment)
+                            save_graph, debug_comment,
+                            importer=importer,
+                            weight_file=weight_file,
+                            arena=arena,
+                            cache_dir=cache_dir,
+                            cache_size=cache_size * 1024 * 1024)
   generator.generate(model_path)
 
 
@@ -88,8 +121,13 @@ def convert_graph(pb_file, output, data_dir, embed_data_dir, save_graph,
 @click.help_option('-h', '--help')
 @click.option('--oneline', is_flag=True,
               help='show in oneline format (no detail information)')
+@click.option("--importer",
+              type=click.Choice(_IMPORTERS),
+              default='tf',
+              help="how to load the pb file, 'fast' loads it without importing into tensorflow",
+              show_default=True)
 @click.argument('pb_file', required=True, metavar='MODEL.pb')
-def show_pb_file(pb_file, oneline=False):
+def show_pb_file(pb_file, oneline=False, importer='tf'):
   import tensorflow as tf
   from utensor_cgen.ir import uTensorGraph
   import textwrap
@@ -100,7 +138,8 @@ def show_pb_file(pb_file, oneline=False):
     with open(pb_file, 'rb') as fid:
       graph_def.ParseFromString(fid.read())
       ugraph = uTensorGraph(graph=graph_def,
-                            output_nodes=[node.name for node in graph_def.node])
+                            output_nodes=[node.name for node in graph_def.node],
+                            importer=importer)
   else:
     msg = click.style('unknown file extension: {}'.format(ext), fg='red', bold=True)
     click.echo(msg, file=sys.stderr)
@@ -1,15 +1,15 @@
 # -*- coding:utf8 -*-
 import logging
 import os
-import pickle
 from tempfile import NamedTemporaryFile
 
 import numpy as np
 import tensorflow as tf
 from tensorflow.core.framework.graph_pb2 import GraphDef
-from tensorflow.tools.graph_transforms import TransformGraph
 
+from .cache import GraphCache
 from .ir import uTensorGraph
+from .memory import plan_memory
 from .operators import OperatorFactory
 from .snippets import (CommentSnippet, ContextGlobalArrayContainer,
                        ContextHeaderSnippet, ContextSnippetsContainer,
@@ -18,6 +18,7 @@ from .snippets.composer import Composer
 from .transformer.optimizer import RefCntOptimizer
 from .transformer.pipline import TransformerPipeline
 from .utils import NamescopedKWArgsParser
+from .weights import SharedWeights
 
 __all__ = ["CodeGenerator"]
 _logger = logging.getLogger('utensor-cli')
@@ -30,6 +31,11 @@ class CodeGenerator(object):
                output_nodes,
                save_graph=False,
                debug_cmt=False,
+               importer='tf',
+               weight_file=None,
+               arena=False,
+               cache_dir=None,
+               cache_size=512 * 1024 * 1024,
                **trans_kwargs):
     self.model_file = model_file
     if not os.path.exists(idx_dir):
@@ -40,49 +46,103 @@ class CodeGenerator(object):
     self.output_nodes = output_nodes
     self.save_graph = save_graph
     self.debug_cmt = debug_cmt
+    self.importer = importer
+    self.weight_file = weight_file
+    self.arena = arena
     self.trans_kwargs = trans_kwargs
+    # constants written once in the last generation, see `SharedWeights`
+    self.shared_weights = None
+    # transformed graphs of previous runs, see `GraphCache`
+    self.graph_cache = None
+    if cache_dir is not None:
+      self.graph_cache = GraphCache(cache_dir, cache_size)
 
   def generate(self, src_fname):
     _, ext = os.path.splitext(self.model_file)
     if ext == '.pb':
       self._generate_from_pb(src_fname)
+    elif ext == '.ugraph':
+      self._generate_from_saved_graph(src_fname)
     else:
-      raise ValueError('Support only pb file')
+      raise ValueError('Support only pb or ugraph file')
 
   def _generate_from_pb(self, src_fname):
-    """Generate source and header files
+    """Transform the graph in the pb file and generate source and header files
     """
+    graph_name, _ = os.path.splitext(os.path.basename(self.model_file))
+    quant_ugraph = None
+    if self.graph_cache is not None:
+      cache_key = self.graph_cache.fingerprint(self.model_file, self.output_nodes,
+                                               self.trans_methods, self.trans_kwargs,
+                                               importer=self.importer,
+                                               weight_file=self.weight_file)
+      quant_ugraph = self.graph_cache.get(cache_key)
+      if quant_ugraph is not None:
+        _logger.info("Using cached transformed graph: %s", cache_key)
+    if quant_ugraph is None:
+      graph_def = self._tf_load_graph_def(self.model_file)
+      self._expect_non_quantized(graph_def)
+      ugraph = uTensorGraph(graph_def, self.output_nodes,
+                            importer=self.importer,
+                            weight_file=self.weight_file)
+      _logger.info("Transforming graph: %s", self.model_file)
+      _logger.info("Transform pipeline: %s", ' -> '.join(self.trans_methods))
+      quant_ugraph = self._transform_graph(ugraph,
+                                           self.trans_methods,
+                                           self.trans_kwargs)
+      _logger.info('Graph transormation done')
+      if self.graph_cache is not None:
+        self.graph_cache.put(cache_key, quant_ugraph)
+
+    if self.save_graph:
+      _logger.info('Saving transformed graph')
+      ugraph_fname = "quant_{}.ugraph".format(graph_name)
+      quant_ugraph.save(ugraph_fname)
+      _logger.info('{} saved'.format(ugraph_fname))
+    self._generate_from_ugraph(quant_ugraph, src_fname)
+
+  def _generate_from_saved_graph(self, src_fname):
+    """Generate source and header files from a graph saved by uTensorGraph.save,
+    the graph is expected to be transformed already
+    """
+    _logger.info("Loading transformed graph: %s", self.model_file)
+    ugraph = uTensorGraph.load(self.model_file)
+    # setting output nodes sorts the graph again, dropping a saved schedule
+    if self.output_nodes and set(self.output_nodes) != set(ugraph.output_nodes):
+      ugraph.output_nodes = self.output_nodes
+    self._generate_from_ugraph(ugraph, src_fname)
+
+  def _generate_from_ugraph(self, quant_ugraph, src_fname):
+    # inline methods may be grouped (ex: identity+inline)
+    has_inline = any(op_info.op_type == 'Inline'
+                     for op_info in quant_ugraph.ops_info.values())
     fname, _ = os.path.splitext(src_fname)
     graph_name, _ = os.path.splitext(os.path.basename(self.model_file))
     guard_name = fname.replace('/', '_')
     weightheader_fname = '{}_weight.hpp'.format(fname)
     header_snippet = ContextHeaderSnippet(guard_name, graph_name)
     weight_container = ContextGlobalArrayContainer()
+    shared_weights = SharedWeights()
     composer = Composer()
     header_fname = '{}.hpp'.format(fname)
     header_name = os.path.basename(header_fname)
     weightheader_name = os.path.basename(weightheader_fname)
-    container = ContextSnippetsContainer(graph_name, header_name, weightheader_name)
+    arena = None
+    arena_size = 0
+    if self.arena:
+      plan = plan_memory(quant_ugraph)
+      arena = dict((tname, (offset, plan.shapes[tname]))
+                   for tname, offset in plan.offsets.items())
+      arena_size = plan.arena_size
+      _logger.info('Memory plan: arena of %d bytes for %d tensors (%d bytes without reuse, '
+                   'lower bound %d bytes), %d tensors of unknown shapes on the heap',
+                   plan.arena_size, len(plan.offsets), plan.total_bytes,
+                   plan.peak_live_bytes, len(plan.unplanned))
+    container = ContextSnippetsContainer(graph_name, header_name, weightheader_name,
+                                         arena_size=arena_size)
 
     opFactory = OperatorFactory()
 
-    graph_def = self._tf_load_graph_def(self.model_file)
-    self._expect_non_quantized(graph_def)
-    ugraph = uTensorGraph(graph_def, self.output_nodes)
-    _logger.info("Transforming graph: %s", self.model_file)
-    _logger.info("Transform pipeline: %s", ' -> '.join(self.trans_methods))
-    quant_ugraph = self._transform_graph(ugraph,
-                                         self.trans_methods,
-                                         self.trans_kwargs)
-    _logger.info('Graph transormation done')
-
-    if self.save_graph:
-      _logger.info('Saving transformed graph')
-      pkl_fname = "quant_{}.pkl".format(graph_name)
-      with open(pkl_fname, 'wb') as fid:
-        pickle.dump(quant_ugraph, fid)
-      _logger.info('{} saved'.format(pkl_fname))
-
     for op_id, op_name in enumerate(quant_ugraph.topo_order):
       op_info = quant_ugraph.ops_info[op_name]
       op_type = op_info.op_type
@@ -101,7 +161,10 @@ class CodeGenerator(object):
         snippet = opFactory.createOperatorSnippet(op_info,
                                                   idx_dir=self.idx_dir,
                                                   embed_data_dir=self.embed_data_dir,
-                                                  weight_container=weight_container)
+                                                  weight_container=weight_container,
+                                                  shared_weights=shared_weights)
+        if arena:
+          snippet.template_vars['arena'] = arena
         container.add_snippet(snippet)
 
       if self.debug_cmt:
@@ -110,8 +173,12 @@ class CodeGenerator(object):
         cmt_snippet = CommentSnippet(comments)
         container.add_snippet(cmt_snippet)
     composer.add_snippet(container)
+    self.shared_weights = shared_weights
+    if shared_weights.num_shared:
+      _logger.info('Shared weights: %d constants reuse the data of another one, %d bytes saved',
+                   shared_weights.num_shared, shared_weights.bytes_saved)
 
-    if 'inline' in self.trans_methods:
+    if has_inline:
       _logger.info("Generate weight file: %s", weightheader_fname)
       with open(weightheader_fname, "w") as wf:
         wf.write('// Auto generated by utensor-cli\n\n')
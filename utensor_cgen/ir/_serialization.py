@@ -0,0 +1,206 @@
+# -*- coding: utf8 -*-
+r"""Binary on-disk format of uTensorGraph
+
+Layout of a saved graph:
+
+  MAGIC | uint64 length of structure | structure | padding | weight blob
+
+- structure: pickled plain python objects (dicts, lists, str, int...)
+  and numpy dtypes describing ops, tensors and attributes, other objects
+  are rejected on load (graphs may be read from shared caches)
+- weight blob: every constant array, each of them aligned to `_ALIGNMENT`
+  bytes, which can be memory-mapped on load
+"""
+import io
+import os
+import pickle
+import struct
+
+import numpy as np
+from tensorflow.core.framework.attr_value_pb2 import AttrValue as _AttrValue
+
+from .base import OperationInfo, TensorInfo, _skip_validation, uTensorGraph
+from .converter import (AttrValueConverter, ConverterFactory,
+                        TensorProtoConverter)
+
+__all__ = ['save_ugraph', 'load_ugraph']
+
+_MAGIC = b'UTGRAPH\x01'
+_HEADER = struct.Struct('<Q')
+_ALIGNMENT = 64
+
+# attribute encodings
+_PY_VALUE = 0
+_ATTR_PROTO = 1
+_ATTR_TENSOR = 2
+
+# (module, name) of the globals a structure can refer to
+_SAFE_GLOBALS = set([
+  # bytes in pickle protocol 2
+  ('_codecs', 'encode'),
+  ('builtins', 'set'), ('builtins', 'frozenset'), ('builtins', 'complex'),
+  ('__builtin__', 'set'), ('__builtin__', 'frozenset'), ('__builtin__', 'complex'),
+  ('numpy', 'dtype'),
+  ('numpy.core.multiarray', 'scalar'), ('numpy._core.multiarray', 'scalar'),
+])
+
+
+class _StructureUnpickler(pickle.Unpickler):
+
+  def find_class(self, module, name):
+    if (module, name) not in _SAFE_GLOBALS:
+      raise pickle.UnpicklingError('forbidden global in saved uTensorGraph: '
+                                   '{}.{}'.format(module, name))
+    return pickle.Unpickler.find_class(self, module, name)
+
+
+def _load_structure(data):
+  return _StructureUnpickler(io.BytesIO(data)).load()
+
+
+class _WeightBlobWriter(object):
+
+  def __init__(self):
+    self._arrays = []
+    self._size = 0
+
+  def add(self, np_array):
+    np_array = np.ascontiguousarray(np_array)
+    offset = _align(self._size)
+    self._arrays.append((offset, np_array))
+    self._size = offset + np_array.nbytes
+    return (offset, np_array.dtype, list(np_array.shape))
+
+  def write(self, fid):
+    written = 0
+    for offset, np_array in self._arrays:
+      fid.write(b'\x00' * (offset - written))
+      fid.write(np_array.tobytes())
+      written = offset + np_array.nbytes
+
+
+def _align(size):
+  return (size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _encode_attr(op_attr, key, blob_writer):
+  raw_value = op_attr.raw_value(key)
+  if isinstance(raw_value, _AttrValue) and raw_value.WhichOneof('value') != 'tensor':
+    # never accessed, save as-is
+    return (_ATTR_PROTO, raw_value.SerializeToString())
+  value = op_attr[key]
+  if not isinstance(value, AttrValueConverter.__utensor_generic_type__):
+    return (_PY_VALUE, value)
+  if isinstance(value.value, TensorProtoConverter.__utensor_generic_type__):
+    array_ref = blob_writer.add(value.value.np_array)
+    return (_ATTR_TENSOR, value.value_name, array_ref, value.value.dtype)
+  tf_value = ConverterFactory.get_tf_value(value.value)
+  attr_value = _AttrValue(**{value.value_name: tf_value})
+  return (_ATTR_PROTO, attr_value.SerializeToString())
+
+
+def _decode_attr(encoded, blob):
+  if encoded[0] == _ATTR_PROTO:
+    attr_value = _AttrValue()
+    attr_value.ParseFromString(encoded[1])
+    return attr_value
+  _, value_name, (offset, np_dtype, shape), dtype = encoded
+  nbytes = int(np.prod(shape)) * np_dtype.itemsize
+  np_array = blob[offset:offset + nbytes].view(np_dtype).reshape(shape)
+  tensor = TensorProtoConverter.__utensor_generic_type__(np_array=np_array,
+                                                         dtype=dtype)
+  return AttrValueConverter.__utensor_generic_type__(value_name=value_name,
+                                                     value=tensor)
+
+
+def _encode_tensor(tensor):
+  return (tensor.name, tensor.op_name, tensor.output_index,
+          tensor.dtype, tensor.shape)
+
+
+def _decode_tensor(encoded, ugraph):
+  name, op_name, output_index, dtype, shape = encoded
+  return TensorInfo(name=name,
+                    op_name=op_name,
+                    output_index=output_index,
+                    dtype=dtype,
+                    shape=shape,
+                    ugraph=ugraph)
+
+
+def save_ugraph(ugraph, path):
+  """Save given uTensorGraph to `path`
+  """
+  blob_writer = _WeightBlobWriter()
+  ops = []
+  for op_info in ugraph.ops_info.values():
+    ops.append({
+      'name': op_info.name,
+      'op_type': op_info.op_type,
+      'backend': op_info.backend,
+      'input_tensors': [_encode_tensor(t) for t in op_info.input_tensors],
+      'output_tensors': [_encode_tensor(t) for t in op_info.output_tensors],
+      'op_attr': dict((key, _encode_attr(op_info.op_attr, key, blob_writer))
+                      for key in op_info.op_attr),
+    })
+  structure = pickle.dumps({
+    'backend': ugraph.backend,
+    'output_nodes': list(ugraph.output_nodes),
+    'topo_order': list(ugraph.topo_order),
+    'ops': ops,
+  }, protocol=2)
+  with open(path, 'wb') as fid:
+    fid.write(_MAGIC)
+    fid.write(_HEADER.pack(len(structure)))
+    fid.write(structure)
+    header_size = len(_MAGIC) + _HEADER.size + len(structure)
+    fid.write(b'\x00' * (_align(header_size) - header_size))
+    blob_writer.write(fid)
+
+
+def load_ugraph(path, mmap=True):
+  """Load a uTensorGraph saved by `save_ugraph`
+
+  If `mmap` is True, constant arrays are read-only views over a
+  memory-mapped weight blob and are only read from disk on access.
+  """
+  with open(path, 'rb') as fid:
+    if fid.read(len(_MAGIC)) != _MAGIC:
+      raise ValueError('not a saved uTensorGraph: {}'.format(path))
+    structure_size, = _HEADER.unpack(fid.read(_HEADER.size))
+    structure = _load_structure(fid.read(structure_size))
+    blob_offset = _align(len(_MAGIC) + _HEADER.size + structure_size)
+    if os.path.getsize(path) <= blob_offset:
+      blob = np.zeros((0,), dtype=np.uint8)
+    elif mmap:
+      blob = np.memmap(path, dtype=np.uint8, mode='r', offset=blob_offset)
+    else:
+      fid.seek(blob_offset)
+      blob = np.frombuffer(fid.read(), dtype=np.uint8)
+
+  ugraph = uTensorGraph()
+  ugraph._backend = structure['backend']
+  with _skip_validation():
+    for op in structure['ops']:
+      op_attr = {}
+      py_values = {}
+      for key, encoded in op['op_attr'].items():
+        if encoded[0] == _PY_VALUE:
+          py_values[key] = encoded[1]
+        else:
+          op_attr[key] = _decode_attr(encoded, blob)
+      op_info = OperationInfo(name=op['name'],
+                              input_tensors=[_decode_tensor(t, ugraph)
+                                             for t in op['input_tensors']],
+                              output_tensors=[_decode_tensor(t, ugraph)
+                                              for t in op['output_tensors']],
+                              op_type=op['op_type'],
+                              backend=op['backend'],
+                              op_attr=op_attr,
+                              ugraph=ugraph)
+      # plain python values are never converted
+      for key, value in py_values.items():
+        op_info.op_attr[key] = value
+  ugraph.output_nodes = structure['output_nodes']
+  ugraph.topo_order = structure['topo_order']
+  return ugraph
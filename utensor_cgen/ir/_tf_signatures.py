@@ -0,0 +1,117 @@
+# -*- coding: utf8 -*-
+r"""Output signatures of tensorflow ops
+
+Used to resolve the dtypes of output tensors from a NodeDef without
+importing the graph into tensorflow.
+"""
+from tensorflow.core.framework.types_pb2 import DT_BOOL, DT_FLOAT, DT_INT32
+
+__all__ = ['OUTPUT_DTYPES', 'get_output_dtypes']
+
+# op type --> dtype of each output, either the name of the attribute
+# holding the dtype or a fixed DataType enum value
+OUTPUT_DTYPES = {
+  # sources
+  'Const': ['dtype'],
+  'Placeholder': ['dtype'],
+  'PlaceholderWithDefault': ['dtype'],
+  'RandomUniform': ['dtype'],
+  'RandomStandardNormal': ['dtype'],
+  'TruncatedNormal': ['dtype'],
+  # element-wise
+  'Identity': ['T'],
+  'StopGradient': ['T'],
+  'Abs': ['T'],
+  'Add': ['T'],
+  'AddV2': ['T'],
+  'AddN': ['T'],
+  'BiasAdd': ['T'],
+  'Exp': ['T'],
+  'Floor': ['T'],
+  'Log': ['T'],
+  'Maximum': ['T'],
+  'Minimum': ['T'],
+  'Mul': ['T'],
+  'Neg': ['T'],
+  'RealDiv': ['T'],
+  'Relu': ['T'],
+  'Relu6': ['T'],
+  'Rsqrt': ['T'],
+  'Select': ['T'],
+  'SelectV2': ['T'],
+  'Sigmoid': ['T'],
+  'Sqrt': ['T'],
+  'Square': ['T'],
+  'Sub': ['T'],
+  'Tanh': ['T'],
+  'Equal': [DT_BOOL],
+  'Greater': [DT_BOOL],
+  'GreaterEqual': [DT_BOOL],
+  'Less': [DT_BOOL],
+  'LessEqual': [DT_BOOL],
+  'Cast': ['DstT'],
+  # reduction
+  'ArgMax': ['output_type'],
+  'ArgMin': ['output_type'],
+  'Max': ['T'],
+  'Mean': ['T'],
+  'Min': ['T'],
+  'Prod': ['T'],
+  'Sum': ['T'],
+  # nn
+  'AvgPool': ['T'],
+  'Conv2D': ['T'],
+  'DepthwiseConv2dNative': ['T'],
+  'FusedBatchNorm': ['T', 'T', 'T', 'T', 'T'],
+  'FusedBatchNormV2': ['T', 'U', 'U', 'U', 'U'],
+  'FusedBatchNormV3': ['T', 'U', 'U', 'U', 'U', 'U'],
+  'MatMul': ['T'],
+  'MaxPool': ['T'],
+  'Softmax': ['T'],
+  # array
+  'ConcatV2': ['T'],
+  'ExpandDims': ['T'],
+  'Fill': ['T'],
+  'Pack': ['T'],
+  'Pad': ['T'],
+  'Reshape': ['T'],
+  'Shape': ['out_type'],
+  'Size': ['out_type'],
+  'Rank': [DT_INT32],
+  'Slice': ['T'],
+  'Squeeze': ['T'],
+  'StridedSlice': ['T'],
+  'Tile': ['T'],
+  'Transpose': ['T'],
+  'NoOp': [],
+  # quantized
+  'Dequantize': [DT_FLOAT],
+  'QuantizeV2': ['T', DT_FLOAT, DT_FLOAT],
+  'QuantizedAdd': ['Toutput', DT_FLOAT, DT_FLOAT],
+  'QuantizedConv2D': ['out_type', DT_FLOAT, DT_FLOAT],
+  'QuantizedMatMul': ['Toutput', DT_FLOAT, DT_FLOAT],
+  'QuantizedMaxPool': ['T', DT_FLOAT, DT_FLOAT],
+  'QuantizedRelu': ['out_type', DT_FLOAT, DT_FLOAT],
+  'QuantizedReshape': ['T', DT_FLOAT, DT_FLOAT],
+  'RequantizationRange': [DT_FLOAT, DT_FLOAT],
+  'Requantize': ['out_type', DT_FLOAT, DT_FLOAT],
+}
+
+
+def get_output_dtypes(node_def):
+  """Return the list of DataType enum values of the outputs of given
+  NodeDef or None if they can not be resolved from its attributes
+  """
+  signature = OUTPUT_DTYPES.get(node_def.op, None)
+  if signature is None:
+    if 'output_types' in node_def.attr:
+      return list(node_def.attr['output_types'].list.type)
+    return None
+  dtypes = []
+  for dtype in signature:
+    if isinstance(dtype, str):
+      if dtype not in node_def.attr:
+        return None
+      dtype = node_def.attr[dtype].type
+    dtypes.append(dtype)
+  return dtypes
@@ -1,6 +1,7 @@
 # -*- coding: utf8 -*-
 import re
 from collections import defaultdict
+from contextlib import contextmanager
 from copy import deepcopy
 
 import attr
@@ -8,6 +9,7 @@ import numpy as np
 import six
 import tensorflow as tf
 from attr.validators import instance_of
+from six.moves import intern
 from tensorflow import make_ndarray
 from tensorflow.core.framework.attr_value_pb2 import AttrValue as _AttrValue
 from tensorflow.core.framework.attr_value_pb2 import \
@@ -16,37 +18,75 @@ from tensorflow.core.framework.tensor_pb2 import TensorProto as _TensorProto
 from tensorflow.core.framework.tensor_shape_pb2 import \
     TensorShapeProto as _TensorShapeProto
 from tensorflow.core.framework.types_pb2 import DataType as _DataType
-from tensorflow.tools.graph_transforms import TransformGraph
 
 from utensor_cgen.utils import parse_tensor_name
 
+from ._tf_signatures import get_output_dtypes
 from .converter import AttrValueConverter, ConverterFactory
+from .external_weights import load_external_weights
+
+try:
+  from collections.abc import MutableMapping
+except ImportError:
+  from collections import MutableMapping
 
 __all__ = ['TensorInfo', 'OperationInfo', 'uTensorGraph']
 
+# tensorflow DataType enum --> numpy dtype
+_TF_NP_DTYPES = {}
+
+
+@contextmanager
+def _skip_validation():
+  """Skip attrs validators while constructing IR records from data
+  which is already validated (deepcopy, importers)
+  """
+  run_validators = attr.get_run_validators()
+  attr.set_run_validators(False)
+  try:
+    yield
+  finally:
+    attr.set_run_validators(run_validators)
+
+
+def _intern(name):
+  if isinstance(name, str):
+    return intern(name)
+  return name
+
 
 class _NoShallowCopyMixin(object):
+  __slots__ = ()
 
   def __copy__(self):
     raise RuntimeError('shallow copy is not allowed for type %s' % type(self))
 
 
 class IRBase(object):
+  __slots__ = ()
 
   @property
   def all_supported_backends(self):
     return ['tensorflow']
 
 
-@attr.s
+@attr.s(slots=True)
 class TensorInfo(IRBase, _NoShallowCopyMixin):
   """
   name : str
+  op_name : str
   dtype : numpy.dtype
   shape : list
+  output_index : int
+
+  Note
+  ====
+  - `op_name` and `output_index` are the components of `name`, parsed
+    once at construction if `output_index` is not given. Graph traversals
+    should use them instead of parsing `name` again.
   """
-  name = attr.ib(validator=instance_of(six.text_type))
-  op_name = attr.ib(validator=instance_of(six.text_type))
+  name = attr.ib(converter=_intern, validator=instance_of(six.text_type))
+  op_name = attr.ib(converter=_intern, validator=instance_of(six.text_type))
   dtype = attr.ib(validator=instance_of(np.dtype))
   shape = attr.ib(validator=instance_of((list, type(None))))
   @shape.validator
@@ -60,6 +100,11 @@ class TensorInfo(IRBase, _NoShallowCopyMixin):
   def check(self, attrib, value):
     if not isinstance(value, uTensorGraph):
       raise ValueError('Expecting a uTensorGraph, get {}'.format(type(value)))
+  output_index = attr.ib(default=None, repr=False, cmp=False)
+
+  def __attrs_post_init__(self):
+    if self.output_index is None:
+      self.output_index = parse_tensor_name(self.name)[1]
   
   @property
   def op(self):
@@ -73,15 +118,108 @@ class TensorInfo(IRBase, _NoShallowCopyMixin):
     return op.is_dangling
 
   def __deepcopy__(self, memo):
-    new_tensor = TensorInfo(name=self.name,
-                            ugraph=memo['ugraph'],
-                            op_name=self.op_name,
-                            dtype=self.dtype,
-                            shape=deepcopy(self.shape, memo))
+    # copying fields of a constructed record, no need of the converters
+    # and validators of __init__
+    new_tensor = object.__new__(TensorInfo)
+    new_tensor.name = self.name
+    new_tensor.op_name = self.op_name
+    new_tensor.dtype = self.dtype
+    new_tensor.shape = None if self.shape is None else list(self.shape)
+    new_tensor.ugraph = memo['ugraph']
+    new_tensor.output_index = self.output_index
     return new_tensor
 
 
-@attr.s
+class _LazyAttrValue(object):
+  """Convert a value to generic type on first access
+  """
+  __slots__ = ('raw', '_value', '_converted')
+
+  def __init__(self, raw):
+    self.raw = raw
+    self._value = None
+    self._converted = False
+
+  @property
+  def value(self):
+    if not self._converted:
+      self._value = ConverterFactory.get_generic_value(self.raw)
+      self._converted = True
+    return self._value
+
+
+class _LazyAttrDict(MutableMapping):
+  """Operation attributes converted to generic types on first access
+
+  Values given at construction are kept as-is (ex: tensorflow AttrValue)
+  and converted with `ConverterFactory.get_generic_value` only when they
+  are accessed. The converted values are cached and the cache is shared
+  by copies of the dict. Values set afterward and values of keys matching
+  `_SKIP_PATTERN` are never converted.
+  """
+  _SKIP_PATTERN = re.compile(r'_utensor_[^_]*')
+  __slots__ = ('_raw', '_values')
+
+  def __init__(self, attrs=None):
+    self._raw = {}
+    self._values = {}
+    if attrs is None:
+      return
+    if isinstance(attrs, _LazyAttrDict):
+      self._raw.update(attrs._raw)
+      self._values.update(attrs._values)
+      return
+    for key, value in attrs.items():
+      if self._SKIP_PATTERN.match(key):
+        self._values[key] = value
+      else:
+        self._raw[key] = _LazyAttrValue(value)
+
+  def raw_value(self, key, default=None):
+    """Return the value of `key` as given at construction if it's not
+    accessed yet, `default` otherwise
+    """
+    lazy_value = self._raw.get(key, None)
+    if lazy_value is None:
+      return default
+    return lazy_value.raw
+
+  def copy(self):
+    return _LazyAttrDict(self)
+
+  def __getitem__(self, key):
+    if key in self._values:
+      return self._values[key]
+    value = self._raw[key].value
+    self._values[key] = value
+    del self._raw[key]
+    return value
+
+  def __setitem__(self, key, value):
+    self._raw.pop(key, None)
+    self._values[key] = value
+
+  def __delitem__(self, key):
+    if key in self._raw:
+      del self._raw[key]
+    else:
+      del self._values[key]
+
+  def __contains__(self, key):
+    return key in self._values or key in self._raw
+
+  def __iter__(self):
+    # snapshot of keys, accessing values moves them out of _raw
+    return iter(list(self._values.keys()) + list(self._raw.keys()))
+
+  def __len__(self):
+    return len(self._values) + len(self._raw)
+
+  def __repr__(self):
+    return repr(dict(self.items()))
+
+
+@attr.s(slots=True)
 class OperationInfo(IRBase, _NoShallowCopyMixin):
   """
   name : str
@@ -99,6 +237,11 @@ class OperationInfo(IRBase, _NoShallowCopyMixin):
     types defined in `converter.ConverterFactor.all_generic_types`. The
     only exception is the key which match regex pattern r'_[^_]*'. The 
     values of such keys will be saved as-is without any type conversion.
+  - values in `op_attr` are converted lazily, on first access.
+  - the graph indexes the consumers of each op (see `output_nodes`).
+    Rewire an op with `uTensorGraph.replace_tensor` or construct a new
+    one of the same name: assigning `input_tensors` directly leaves the
+    index stale.
   """
   name = attr.ib(type=str)
   ugraph = attr.ib(repr=False)
@@ -128,7 +271,7 @@ class OperationInfo(IRBase, _NoShallowCopyMixin):
     if value not in ['tensorflow']:
       raise ValueError('Unsupported backend: {}'.format(value))
 
-  op_attr = attr.ib(factory=dict, converter=dict)
+  op_attr = attr.ib(factory=dict, converter=_LazyAttrDict)
 
   @property
   def input_nodes(self):
@@ -140,12 +283,13 @@ class OperationInfo(IRBase, _NoShallowCopyMixin):
   
   @property
   def output_nodes(self):
-    out_ops = []
-    for op in self.ugraph.ops:
-      for in_tensor in op.input_tensors:
-        if in_tensor.op_name == self.name and op.name not in out_ops:
-          out_ops.append(op.name)
-          break
+    """Ops consuming the outputs of this op, in the order they were
+    added to the graph
+
+    All consumers in the graph are returned, including the ones not
+    needed by the output nodes of the graph until it's pruned
+    """
+    out_ops = self.ugraph._consumers.get(self.name, [])
     return [self.ugraph.ops_info[name] for name in out_ops]
   
   @property
@@ -165,30 +309,34 @@ class OperationInfo(IRBase, _NoShallowCopyMixin):
     return len(self.output_tensors)
 
   def __attrs_post_init__(self):
-    skip_pattern = re.compile(r'_utensor_[^_]*')
-    if self.op_attr:
-      op_attr = {}
-      for k, v in self.op_attr.items():
-        match = skip_pattern.match(k)
-        if match:
-          op_attr[k] = v
-        else:
-          op_attr[k] = ConverterFactory.get_generic_value(v)
-      self.op_attr = op_attr
+    old_op = self.ugraph.ops_info.get(self.name, None)
+    if old_op is not None and old_op is not self:
+      self.ugraph._unlink_op(old_op)
     self.ugraph.ops_info[self.name] = self
+    self.ugraph._link_op(self)
 
   def __deepcopy__(self, memo):
-    op_info = OperationInfo(name=self.name,
-                            input_tensors=deepcopy(self.input_tensors, memo),
-                            output_tensors=deepcopy(self.output_tensors, memo),
-                            op_type=self.op_type,
-                            backend=self.backend,
-                            op_attr=deepcopy(self.op_attr, memo),
-                            ugraph=memo['ugraph'])
+    if memo.get('share_attr_values', False):
+      op_attr = self.op_attr.copy()
+    else:
+      op_attr = deepcopy(self.op_attr, memo)
+    # copying fields of a constructed record, see TensorInfo.__deepcopy__
+    # tensors are not shared between ops, no need of the memo bookkeeping
+    # of copy.deepcopy
+    op_info = object.__new__(OperationInfo)
+    op_info.name = self.name
+    op_info.ugraph = memo['ugraph']
+    op_info.input_tensors = [t.__deepcopy__(memo) for t in self.input_tensors]
+    op_info.output_tensors = [t.__deepcopy__(memo) for t in self.output_tensors]
+    op_info.op_type = self.op_type
+    op_info.backend = self.backend
+    op_info.op_attr = op_attr
+    op_info.__attrs_post_init__()
     return op_info
 
   def copy_into_graph(self, ugraph):
-    return deepcopy(self, {'ugraph': ugraph})
+    with _skip_validation():
+      return deepcopy(self, {'ugraph': ugraph})
 
 class uTensorGraph(IRBase, _NoShallowCopyMixin):
   """
@@ -198,16 +346,33 @@ class uTensorGraph(IRBase, _NoShallowCopyMixin):
   topo_order : list
   output_nodes : list
   backend : str {"tensorflow", 'pytorch'(future work)}
+
+  Note
+  ====
+  - `importer` selects how a tf.GraphDef is loaded: 'tf' imports it
+    into tensorflow to get dtypes and shapes of tensors, 'fast' reads
+    them from node attributes and only falls back to tensorflow for
+    nodes it can't resolve. With 'fast', shapes of non-constant tensors
+    are only known if the graph has `_output_shapes` attributes.
+  - `weight_file` is the external weight file referenced by Const nodes
+    of the GraphDef, if any (see `utensor_cgen.ir.external_weights`)
   """
   KWPARSER_PATTERN = re.compile(r'^([^\d\W][\w\d_]*)__([^\d\W][\w\d_]*)')
+  TF_IMPORTERS = ['tf', 'fast']
 
-  def __init__(self, graph=None, output_nodes=None):
+  def __init__(self, graph=None, output_nodes=None, importer='tf', weight_file=None):
     if output_nodes is None:
       output_nodes = []
+    # op name --> names of ops consuming its output tensors
+    self._consumers = defaultdict(list)
+    # True if the structure changed since last topological sort
+    self._dirty = False
+    self._topo_order = []
+    self._output_nodes = []
     if graph is None:
       self.ops_info = {}
-      self.topo_order = []
       self.output_nodes = []
+      self.topo_order = []
       self._backend = ''
       return
     assert isinstance(output_nodes, list), \
@@ -215,7 +380,13 @@ class uTensorGraph(IRBase, _NoShallowCopyMixin):
     if isinstance(graph, tf.GraphDef):
       if not output_nodes:
         raise ValueError('No output_nodes given')
-      self._init_from_graph_def(graph, output_nodes)
+      if importer == 'tf':
+        self._init_from_graph_def(graph, output_nodes)
+      elif importer == 'fast':
+        self._init_from_graph_def_fast(graph, output_nodes)
+      else:
+        raise ValueError('Unknown importer: {}'.format(importer))
+      load_external_weights(self, weight_file)
     else:
       raise ValueError('Only support tensorflow now')
   
@@ -223,6 +394,37 @@ class uTensorGraph(IRBase, _NoShallowCopyMixin):
   def backend(self):
     return self._backend
 
+  @property
+  def topo_order(self):
+    """Names of ops needed by output nodes, sorted topologically
+
+    Ops not needed by the output nodes are not in the order, so adding
+    or dropping an op nobody consumes leaves it as it is. Other changes
+    of the structure only mark the order as stale; it's sorted again
+    lazily on next access.
+    """
+    if self._dirty:
+      self._topologic_order_graph()
+    return self._topo_order
+
+  @topo_order.setter
+  def topo_order(self, topo_order):
+    self._topo_order = topo_order
+    self._dirty = False
+
+  @property
+  def output_nodes(self):
+    return self._output_nodes
+
+  @output_nodes.setter
+  def output_nodes(self, output_nodes):
+    self._output_nodes = output_nodes
+    self._dirty = True
+
+  @property
+  def is_dirty(self):
+    return self._dirty
+
   @property
   def graph_def(self):
     assert self._backend == 'tensorflow', \
@@ -230,20 +432,31 @@ class uTensorGraph(IRBase, _NoShallowCopyMixin):
     graph_def = tf.GraphDef()
     for node_name in self.topo_order:
       op_info = self.ops_info[node_name]
-      attr = {}
-      for key, obj in op_info.op_attr.items():
-        if self.KWPARSER_PATTERN.match(key):
-          continue
-        value_name = obj.value_name
-        tf_value = ConverterFactory.get_tf_value(obj.value)
-        attr_value = _AttrValue(**{value_name: tf_value})
-        attr[key] = attr_value
       graph_def.node.add(name=op_info.name,
                          op=op_info.op_type,
                          input=[in_tensor.name for in_tensor in op_info.input_tensors],
                          device=op_info.op_attr.get('tensorflow__device', ''),
-                         attr=attr)
+                         attr=self._tf_node_attr(op_info))
     return graph_def
+
+  @classmethod
+  def _tf_node_attr(cls, op_info):
+    """Attributes of `op_info` as a dict of tf AttrValue
+    """
+    attr = {}
+    for key in op_info.op_attr:
+      if cls.KWPARSER_PATTERN.match(key):
+        continue
+      raw_value = op_info.op_attr.raw_value(key)
+      if isinstance(raw_value, _AttrValue):
+        # never accessed, no need to convert it back
+        attr[key] = raw_value
+        continue
+      obj = op_info.op_attr[key]
+      value_name = obj.value_name
+      tf_value = ConverterFactory.get_tf_value(obj.value)
+      attr[key] = _AttrValue(**{value_name: tf_value})
+    return attr
   
   @property
   def ops(self):
@@ -255,41 +468,115 @@ class uTensorGraph(IRBase, _NoShallowCopyMixin):
     if op.name in self.ops_info:
       raise ValueError('duplicate op detected, {}'.format(op.name))
     self.ops_info[op.name] = op
-    self._topologic_order_graph()
+    self._link_op(op)
 
   def drop_op(self, op_name):
     if op_name not in self.ops_info:
       raise ValueError('op not found in the graph: {}'.format(op_name))
-    del self.ops_info[op_name]
-    self.topo_order.remove(op_name)
+    op = self.ops_info.pop(op_name)
+    self._unlink_op(op)
+
+  def replace_tensor(self, tensor, new_tensor):
+    """Make all ops consuming `tensor` consume `new_tensor` instead
+    """
+    for op_name in list(self._consumers.get(tensor.op_name, [])):
+      op = self.ops_info[op_name]
+      if not any(in_tensor.name == tensor.name for in_tensor in op.input_tensors):
+        # consumes other outputs of the op
+        continue
+      self._unlink_op(op)
+      op.input_tensors = [deepcopy(new_tensor, {'ugraph': self})
+                          if in_tensor.name == tensor.name else in_tensor
+                          for in_tensor in op.input_tensors]
+      self._link_op(op)
+
+  def save(self, path):
+    """Save the graph in a compact binary format
+
+    see `load` for loading it back
+    """
+    from ._serialization import save_ugraph
+    save_ugraph(self, path)
+
+  @classmethod
+  def load(cls, path, mmap=True):
+    """Load a graph saved by `save`
+
+    If `mmap` is True, constant arrays are read-only views of the
+    memory-mapped file
+    """
+    from ._serialization import load_ugraph
+    return load_ugraph(path, mmap=mmap)
+
+  def fork(self):
+    """Copy the graph structure, sharing attribute values
+
+    The returned graph has its own OperationInfo/TensorInfo records, but
+    the values in `op_attr` (constant arrays included) are shared with
+    this graph rather than copied. Attribute values should therefore be
+    treated as immutable: assign a new value to `op_attr[key]` instead of
+    modifying it in place.
+    """
+    return deepcopy(self, {'share_attr_values': True})
+
+  def _link_op(self, op):
+    """Register `op` as a consumer of the ops producing its input tensors
+    """
+    for tensor in op.input_tensors:
+      consumers = self._consumers[tensor.op_name]
+      if op.name not in consumers:
+        consumers.append(op.name)
+    if self._in_order(op.name):
+      self._dirty = True
+
+  def _unlink_op(self, op):
+    for tensor in op.input_tensors:
+      consumers = self._consumers.get(tensor.op_name, [])
+      if op.name in consumers:
+        consumers.remove(op.name)
+    if self._in_order(op.name):
+      self._dirty = True
+
+  def _in_order(self, op_name):
+    """False if the op can't be needed by the output nodes
+
+    An op neither consumed nor an output node is not in the
+    topological order, linking or unlinking it doesn't change the order
+    """
+    return op_name in self._output_nodes or bool(self._consumers.get(op_name))
 
   def _topologic_order_graph(self):
     # https://en.wikipedia.org/wiki/Topological_sorting
-    queue = deepcopy(self.output_nodes)
+    # iterative DFS from the output nodes, O(V+E) and no recursion limit
     visited = set()    # temporary mark
     perm_visit = set()  # Permanent mark
     ops_torder = []  # L
 
-    def visit(node_name):
-      if node_name in perm_visit:
-        return
-      if node_name in visited:
-        raise ValueError("Input graph is not a DAG")
-
-      visited.add(node_name)
+    def in_op_names(node_name):
       op_info = self.ops_info[node_name]
-
-      for t_info in op_info.input_tensors:
-        op_name = parse_tensor_name(t_info.name)[0]
-        visit(op_name)
-
-      perm_visit.add(node_name)
-      ops_torder.insert(0, node_name)
-
-    while queue:
-      node_name = queue.pop(0)
-      visit(node_name)
-    self.topo_order = ops_torder[::-1]
+      return iter([t_info.op_name for t_info in op_info.input_tensors])
+
+    for out_name in self.output_nodes:
+      if out_name in perm_visit:
+        continue
+      visited.add(out_name)
+      stack = [(out_name, in_op_names(out_name))]
+      while stack:
+        node_name, in_names = stack[-1]
+        for in_name in in_names:
+          if in_name in perm_visit:
+            continue
+          if in_name in visited:
+            raise ValueError("Input graph is not a DAG")
+          visited.add(in_name)
+          stack.append((in_name, in_op_names(in_name)))
+          break
+        else:
+          stack.pop()
+          perm_visit.add(node_name)
+          ops_torder.append(node_name)
+    self._topo_order = ops_torder
+    self._dirty = False
 
   # tensorflow
   @staticmethod
@@ -307,25 +594,32 @@ class uTensorGraph(IRBase, _NoShallowCopyMixin):
       raise ValueError('Given graph_def is not freezed')
     self._backend = 'tensorflow'
     self.ops_info = {}
+    self._consumers = defaultdict(list)
     self.topo_order = []
     self.output_nodes = output_nodes
     graph = tf.Graph()
     with graph.as_default():
       tf.import_graph_def(graph_def, name='')
+    with _skip_validation():
+      self._tf_build_ops(graph_def, graph)
+    self._topologic_order_graph()
 
+  def _tf_build_ops(self, graph_def, graph):
     for node in graph_def.node:
       op = graph.get_operation_by_name(node.name)
       in_tensors = [TensorInfo(name=tensor.name,
                                ugraph=self,
                                op_name=tensor.op.name,
                                dtype=np.dtype(tensor.dtype.as_numpy_dtype),
-                               shape=self._tf_parse_tshape(tensor.shape))
+                               shape=self._tf_parse_tshape(tensor.shape),
+                               output_index=tensor.value_index)
                     for tensor in op.inputs]
       out_tensors = [TensorInfo(name=tensor.name,
                                 ugraph=self,
                                 op_name=op.name,
                                 dtype=np.dtype(tensor.dtype.as_numpy_dtype),
-                                shape=self._tf_parse_tshape(tensor.shape))
+                                shape=self._tf_parse_tshape(tensor.shape),
+                                output_index=tensor.value_index)
                      for tensor in op.outputs]
       op_type = node.op
       op_attr = node.attr
@@ -338,8 +632,106 @@ class uTensorGraph(IRBase, _NoShallowCopyMixin):
                               ugraph=self)
       op_info.op_attr['tensorflow__device'] = node.device
       self.ops_info[node.name] = op_info
-    self._topologic_order_graph()
   
+  def _init_from_graph_def_fast(self, graph_def, output_nodes):
+    """Initailize graph with Tensorflow GraphDef without importing it
+    into tensorflow
+    """
+    if not self._tf_is_freeze_graph(graph_def):
+      raise ValueError('Given graph_def is not freezed')
+    self._backend = 'tensorflow'
+    self.ops_info = {}
+    self._consumers = defaultdict(list)
+    self.topo_order = []
+    self.output_nodes = output_nodes
+
+    # op name --> [(dtype, shape), ...] of its outputs
+    out_specs = {}
+    unresolved = []
+    for node in graph_def.node:
+      specs = self._tf_node_output_specs(node)
+      if specs is None:
+        unresolved.append(node.name)
+      else:
+        out_specs[node.name] = specs
+    if unresolved:
+      graph = tf.Graph()
+      with graph.as_default():
+        tf.import_graph_def(graph_def, name='')
+      for op_name in unresolved:
+        op = graph.get_operation_by_name(op_name)
+        out_specs[op_name] = [(np.dtype(tensor.dtype.as_numpy_dtype),
+                               self._tf_parse_tshape(tensor.shape))
+                              for tensor in op.outputs]
+
+    with _skip_validation():
+      self._tf_build_ops_fast(graph_def, out_specs)
+    self._topologic_order_graph()
+
+  def _tf_build_ops_fast(self, graph_def, out_specs):
+    for node in graph_def.node:
+      in_tensors = []
+      for in_tname in node.input:
+        if in_tname.startswith('^'):
+          # control input
+          continue
+        op_name, index = parse_tensor_name(in_tname)
+        dtype, shape = out_specs[op_name][index]
+        in_tensors.append(TensorInfo(name='{}:{}'.format(op_name, index),
+                                     ugraph=self,
+                                     op_name=op_name,
+                                     dtype=dtype,
+                                     shape=None if shape is None else list(shape),
+                                     output_index=index))
+      out_tensors = [TensorInfo(name='{}:{}'.format(node.name, index),
+                                ugraph=self,
+                                op_name=node.name,
+                                dtype=dtype,
+                                shape=None if shape is None else list(shape),
+                                output_index=index)
+                     for index, (dtype, shape) in enumerate(out_specs[node.name])]
+      op_info = OperationInfo(name=node.name,
+                              input_tensors=in_tensors,
+                              output_tensors=out_tensors,
+                              op_type=node.op,
+                              backend='tensorflow',
+                              op_attr=node.attr,
+                              ugraph=self)
+      op_info.op_attr['tensorflow__device'] = node.device
+
+  @classmethod
+  def _tf_node_output_specs(cls, node):
+    """[(dtype, shape), ...] of the outputs of given NodeDef, None if the
+    dtypes can't be resolved from its attributes
+    """
+    dtypes = get_output_dtypes(node)
+    if dtypes is None:
+      return None
+    if '_output_shapes' in node.attr:
+      shape_protos = list(node.attr['_output_shapes'].list.shape)
+    elif node.op == 'Const':
+      shape_protos = [node.attr['value'].tensor.tensor_shape]
+    elif node.op == 'Placeholder' and 'shape' in node.attr:
+      shape_protos = [node.attr['shape'].shape]
+    else:
+      shape_protos = [None for _ in dtypes]
+    if len(shape_protos) != len(dtypes):
+      return None
+    specs = []
+    for dtype, shape_proto in zip(dtypes, shape_protos):
+      if shape_proto is None:
+        shape = None
+      else:
+        shape = cls._tf_parse_tshape(tf.TensorShape(shape_proto))
+      specs.append((cls._tf_np_dtype(dtype), shape))
+    return specs
+
+  @staticmethod
+  def _tf_np_dtype(dtype_enum):
+    if dtype_enum not in _TF_NP_DTYPES:
+      _TF_NP_DTYPES[dtype_enum] = np.dtype(tf.as_dtype(dtype_enum).as_numpy_dtype)
+    return _TF_NP_DTYPES[dtype_enum]
+
   def _tf_is_freeze_graph(self, graph_def):
     is_frozen = all(node.op not in ['VariableV2'] for node in graph_def.node)
     return is_frozen
@@ -347,11 +739,12 @@ class uTensorGraph(IRBase, _NoShallowCopyMixin):
   def __deepcopy__(self, memo):
     new_graph = uTensorGraph()
     memo['ugraph'] = new_graph
-    new_ops_info = dict((k, deepcopy(v, memo)) for k, v in self.ops_info.items())
+    with _skip_validation():
+      new_ops_info = dict((k, v.__deepcopy__(memo)) for k, v in self.ops_info.items())
     new_topo_order = [name for name in self.topo_order]
 
     new_graph.ops_info = new_ops_info
-    new_graph.topo_order = new_topo_order
     new_graph.output_nodes = self.output_nodes
+    new_graph.topo_order = new_topo_order
     new_graph._backend = self._backend
     return new_graph
@@ -56,10 +56,21 @@ class GenericTensorConverterMixin(GenericConverter):
   class GenericType(object):
     np_array = attr.ib(validator=validators.instance_of(np.ndarray))
     dtype = attr.ib(default=None)
+    # the proto np_array views the tensor_content of (read-only), if any
+    tf_proto = attr.ib(default=None, repr=False, cmp=False)
     
     def __attrs_post_init__(self):
       if self.dtype is None:
         self.dtype = self.np_array.dtype
+      self._proto_array = self.np_array if self.tf_proto is not None else None
+
+    @property
+    def is_proto_view(self):
+      """True if np_array is still the unmodified view of tf_proto
+      """
+      return (self.tf_proto is not None and
+              self.np_array is self._proto_array and
+              not self.np_array.flags.writeable)
   __utensor_generic_type__ = GenericType
 
 class GenericDataTypeConverterMixin(GenericConverter):
@@ -144,9 +155,16 @@ class ConverterFactory(object):
     cls._GENERIC2TF_MAP[converter_cls.__utensor_generic_type__] = converter_cls
     return converter_cls
 
+  @staticmethod
+  def _value_type(value):
+    if isinstance(value, np.dtype):
+      # numpy >= 1.20 has a dtype subclass per scalar type
+      return np.dtype
+    return type(value)
+
   @classmethod
   def get_generic_value(cls, tf_value):
-    value_type = type(tf_value)
+    value_type = cls._value_type(tf_value)
     if value_type in cls._GENERIC2TF_MAP:
       # already generic type
       return tf_value
@@ -157,7 +175,7 @@ class ConverterFactory(object):
   
   @classmethod
   def get_tf_value(cls, generic):
-    value_type = type(generic)
+    value_type = cls._value_type(generic)
     if value_type in cls._TF2GENERIC_MAP:
       # already tf type
       return generic
@@ -189,6 +207,9 @@ class TensorProtoConverter(GenericTensorConverterMixin, TFConverterMixin):
   @classmethod
   @_check_generic_type
   def get_tf_value(cls, value):
+    if value.is_proto_view:
+      # the array is not modified, reuse the original bytes
+      return value.tf_proto
     return make_tensor_proto(value.np_array, dtype=value.dtype)
   
   @classmethod
@@ -197,17 +218,36 @@ class TensorProtoConverter(GenericTensorConverterMixin, TFConverterMixin):
     """quantized numpy array is mapped to np.uint8 typed
 
     FIXME: I'm not sure if it's a good idea
+
+    If the values are stored in `tensor_content`, the returned
+    array is a read-only view over these bytes: not copied again, but
+    the cpp/upb protobuf backends copy them out of the proto on access
     """
-    np_array = make_ndarray(value)
-    dtype = np_array.dtype
+    # each access is a copy with the cpp/upb backends
+    content = value.tensor_content
+    if not content:
+      np_array = make_ndarray(value)
+      dtype = np_array.dtype
+      if dtype.fields is None:
+        pass
+      elif dtype[0] in [np.uint8, np.int8]:
+        np_array = np_array.astype(dtype[0])
+      else:
+        raise ValueError('Unsupported numpy dtype: %s' % dtype)
+      return cls.__utensor_generic_type__(np_array=np_array,
+                                          dtype=dtype)
+    dtype = np.dtype(_tf_as_dtype(value.dtype).as_numpy_dtype)
     if dtype.fields is None:
-      pass
+      np_dtype = dtype
     elif dtype[0] in [np.uint8, np.int8]:
-      np_array = np_array.astype(dtype[0])
+      np_dtype = dtype[0]
     else:
       raise ValueError('Unsupported numpy dtype: %s' % dtype)
+    shape = [dim.size for dim in value.tensor_shape.dim]
+    np_array = np.frombuffer(content, dtype=np_dtype).reshape(shape)
     return cls.__utensor_generic_type__(np_array=np_array,
-                                        dtype=dtype)
+                                        dtype=dtype,
+                                        tf_proto=value)
 
 @ConverterFactory.register
 class DataTypeConverter(GenericDataTypeConverterMixin, TFConverterMixin):
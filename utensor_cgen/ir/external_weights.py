@@ -0,0 +1,103 @@
+# -*- coding: utf8 -*-
+r"""Weights stored outside of a GraphDef
+
+A GraphDef can't be larger than the 2 GB protobuf limit. Large models
+keep the values of Const nodes in an external weight file instead:
+
+- the `value` attribute of such a Const node is a TensorProto with only
+  `dtype` and `tensor_shape` (no values)
+- `_external_offset` and `_external_length` attributes give the position
+  of the raw (C-order, little endian) bytes of the value in the weight file
+
+The weight file is memory-mapped on loading, so weights are only read
+from disk when they are accessed (ex: when `_ConstOperator` or
+`_InlineOperator` emit them).
+"""
+import numpy as np
+from tensorflow import as_dtype as _tf_as_dtype
+from tensorflow import make_ndarray
+from tensorflow.core.framework.graph_pb2 import GraphDef
+from tensorflow.core.framework.tensor_pb2 import TensorProto
+
+from .converter import AttrValueConverter, TensorProtoConverter
+
+__all__ = ['EXTERNAL_OFFSET_ATTR', 'EXTERNAL_LENGTH_ATTR',
+           'externalize_weights', 'load_external_weights']
+
+EXTERNAL_OFFSET_ATTR = '_external_offset'
+EXTERNAL_LENGTH_ATTR = '_external_length'
+
+
+def externalize_weights(graph_def, weight_fname, min_bytes=0):
+  """Move values of Const nodes in `graph_def` to `weight_fname`
+
+  Only constants of at least `min_bytes` bytes are moved. Return a new
+  GraphDef referencing the weight file.
+  """
+  new_graph_def = GraphDef()
+  new_graph_def.CopyFrom(graph_def)
+  offset = 0
+  with open(weight_fname, 'wb') as fid:
+    for node in new_graph_def.node:
+      if node.op != 'Const':
+        continue
+      tensor = node.attr['value'].tensor
+      np_array = make_ndarray(tensor)
+      if np_array.dtype.kind in 'OSU' or np_array.nbytes < min_bytes:
+        continue
+      data = np.ascontiguousarray(np_array,
+                                  dtype=np_array.dtype.newbyteorder('<')).tobytes()
+      fid.write(data)
+      node.attr[EXTERNAL_OFFSET_ATTR].i = offset
+      node.attr[EXTERNAL_LENGTH_ATTR].i = len(data)
+      offset += len(data)
+      # keep only dtype and shape
+      node.attr['value'].tensor.CopyFrom(TensorProto(dtype=tensor.dtype,
+                                                     tensor_shape=tensor.tensor_shape))
+  return new_graph_def
+
+
+def load_external_weights(ugraph, weight_fname):
+  """Replace the values of Const ops in `ugraph` referencing `weight_fname`
+  with read-only views over the memory-mapped weight file
+  """
+  weights = None
+  for op_info in ugraph.ops_info.values():
+    if EXTERNAL_OFFSET_ATTR not in op_info.op_attr:
+      continue
+    if weight_fname is None:
+      raise ValueError(
+        '{} references external weights but no weight file is given'.format(op_info.name)
+      )
+    if weights is None:
+      weights = np.memmap(weight_fname, dtype=np.uint8, mode='r')
+    offset = op_info.op_attr[EXTERNAL_OFFSET_ATTR].value
+    length = op_info.op_attr[EXTERNAL_LENGTH_ATTR].value
+    del op_info.op_attr[EXTERNAL_OFFSET_ATTR]
+    del op_info.op_attr[EXTERNAL_LENGTH_ATTR]
+    tensor = op_info.op_attr.raw_value('value')
+    if tensor is None:
+      raise ValueError('value of {} is already converted'.format(op_info.name))
+    tensor = tensor.tensor
+    dtype = np.dtype(_tf_as_dtype(tensor.dtype).as_numpy_dtype)
+    if dtype.fields is None:
+      np_dtype = dtype
+    elif dtype[0] in [np.uint8, np.int8]:
+      np_dtype = dtype[0]
+    else:
+      raise ValueError('Unsupported numpy dtype: %s' % dtype)
+    np_dtype = np_dtype.newbyteorder('<')
+    shape = [dim.size for dim in tensor.tensor_shape.dim]
+    if int(np.prod(shape)) * np_dtype.itemsize != length or \
+      offset + length > weights.size:
+      raise ValueError(
+        'invalid external weight reference of {}: offset {}, length {}'.format(
+          op_info.name, offset, length
+        )
+      )
+    np_array = weights[offset:offset + length].view(np_dtype).reshape(shape)
+    value = TensorProtoConverter.__utensor_generic_type__(np_array=np_array,
+                                                          dtype=dtype)
+    op_info.op_attr['value'] = AttrValueConverter.__utensor_generic_type__(
+      value_name='tensor', value=value
+    )
@@ -1,8 +1,5 @@
 # -*- coding: utf8 -*-
-from collections import defaultdict
-from copy import deepcopy
-
-import tensorflow as tf
+from collections import deque
 
 
 def clusters_by_name_scopes(op_infos, name_scope_prefix=None):
@@ -10,38 +7,38 @@ def clusters_by_name_scopes(op_infos, name_scope_prefix=None):
   Arguements
   ----------
   op_infos : list[OperationInfo]
-      list of parser.OperationInfo
+      list of ir.OperationInfo
   name_scope_prefix : str
       the target name scope prefix, e.g `dropout`.
 
   Return
   ------
   clusters : dict
-      a dictionary of found name_scopes as key and list of
+      a dictionary of found name_scopes as key and set of
       operation names as value
   """
-  op_infos = deepcopy(op_infos)
   if name_scope_prefix is not None:
     op_infos = [op_info for op_info in op_infos
-                if op_info.node_name.startswith(name_scope_prefix)]
+                if op_info.name.startswith(name_scope_prefix)]
+  op_infos_map = dict((op_info.name, op_info) for op_info in op_infos)
 
-  name_scope_map = defaultdict(lambda: [])
+  name_scope_map = {}
   visited = set([])
   for op_info in op_infos:
-    current_name_scope = op_infos[0].node_name.split('/')[0]
-    if op_info.node_name in visited:
+    if op_info.name in visited:
       continue
-    queue = [parse_tensor_name(tensor[0])[0]
-             for tensor in op_info.input_tensor + op_info.output_tensor]
+    current_name_scope = op_info.name.split('/')[0]
+    # connected ops among given op_infos
     cluster = set([])
-    while len(queue) > 0:
-      op_name = queue.pop(0)
+    queue = deque([op_info.name])
+    while queue:
+      op_name = queue.popleft()
+      if op_name in cluster or op_name not in op_infos_map:
+        continue
       cluster.add(op_name)
-      input_tensors = op_info[op_name].input_tensor
-      output_tensors = op_info[op_name].output_tensor
-      all_ops = [parse_tensor_name(tensor[0])[0]
-                 for tensor in input_tensors + output_tensors]
-      queue.extend(all_ops)
+      cluster_op = op_infos_map[op_name]
+      queue.extend([tensor.op_name for tensor in cluster_op.input_tensors])
+      queue.extend([out_op.name for out_op in cluster_op.output_nodes])
     name_scope_map[current_name_scope] = cluster
     visited.update(cluster)
   return name_scope_map
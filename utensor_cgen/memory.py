@@ -0,0 +1,184 @@
+# -*- coding:utf8 -*-
+r"""Static Tensor Memory Planning
+
+Intermediate tensors are placed in a single preallocated arena. A
+tensor is live from the op producing it to the last op consuming it
+(in `topo_order`, the order ops are evaluated); tensors with
+overlapping lifetimes get disjoint ranges of the arena.
+
+Offsets are assigned greedily by decreasing size, each tensor going to
+the smallest gap left between the tensors already placed with
+overlapping lifetimes (best fit). The peak arena size is known at
+code generation time.
+"""
+from collections import defaultdict
+
+import numpy as np
+
+from .snippets._types import NP_TYPES_MAP
+
+__all__ = ['NOT_PLANNED_OP_TYPES', 'tensor_nbytes', 'tensor_lifetimes', 'peak_live_bytes',
+           'MemoryPlan', 'plan_memory']
+
+# bytes of the tensor types of uTensor
+_TENSOR_TYPE_SIZES = {'float': 4, 'int': 4, 'uint8_t': 1}
+
+# ops whose outputs are not allocated in RAM by the generated code
+NOT_PLANNED_OP_TYPES = ['Const', 'Inline', 'Placeholder']
+
+
+def tensor_nbytes(tensor_info):
+  """Bytes of the tensor on device, None if its shape is not fully known
+  """
+  shape = tensor_info.shape
+  if shape is None or None in shape:
+    return None
+  if tensor_info.dtype in NP_TYPES_MAP:
+    itemsize = _TENSOR_TYPE_SIZES[NP_TYPES_MAP[tensor_info.dtype].tensor_type_str]
+  else:
+    itemsize = tensor_info.dtype.itemsize
+  return int(np.prod(shape, dtype=np.int64)) * itemsize
+
+
+def tensor_lifetimes(ugraph, order=None):
+  """tensor name --> (first, last), indices in `order` of the op
+  producing the tensor and of its last consumer
+
+  `order` defaults to `ugraph.topo_order`. Only outputs of ops
+  allocating RAM tensors are listed. Outputs of output nodes are live
+  until the end of `order`.
+  """
+  if order is None:
+    order = ugraph.topo_order
+  lifetimes = {}
+  for idx, op_name in enumerate(order):
+    op_info = ugraph.ops_info[op_name]
+    for in_tensor in op_info.input_tensors:
+      if in_tensor.name in lifetimes:
+        lifetimes[in_tensor.name] = (lifetimes[in_tensor.name][0], idx)
+    if op_info.op_type in NOT_PLANNED_OP_TYPES:
+      continue
+    for out_tensor in op_info.output_tensors:
+      lifetimes[out_tensor.name] = (idx, idx)
+  end = len(order)
+  for op_name in ugraph.output_nodes:
+    for out_tensor in ugraph.ops_info[op_name].output_tensors:
+      if out_tensor.name in lifetimes:
+        lifetimes[out_tensor.name] = (lifetimes[out_tensor.name][0], end)
+  return lifetimes
+
+
+def peak_live_bytes(ugraph, order=None, lifetimes=None):
+  """Max total bytes of live tensors over `order`, a lower bound of
+  the arena size. Tensors of unknown shapes are not counted
+  """
+  if lifetimes is None:
+    lifetimes = tensor_lifetimes(ugraph, order)
+  # bytes allocated (freed) at each step
+  deltas = defaultdict(lambda: 0)
+  for tname, (first, last) in lifetimes.items():
+    nbytes = tensor_nbytes(_get_tensor(ugraph, tname))
+    if nbytes is None:
+      continue
+    deltas[first] += nbytes
+    deltas[last + 1] -= nbytes
+  peak = live = 0
+  for step in sorted(deltas):
+    live += deltas[step]
+    peak = max(peak, live)
+  return peak
+
+
+def _get_tensor(ugraph, tensor_name):
+  op_name, index = tensor_name.rsplit(':', 1)
+  return ugraph.ops_info[op_name].output_tensors[int(index)]
+
+
+class MemoryPlan(object):
+  """
+  offsets : dict
+      tensor name --> offset in the arena
+  sizes : dict
+      tensor name --> bytes, of planned tensors
+  shapes : dict
+      tensor name --> shape, of planned tensors
+  lifetimes : dict
+      see `tensor_lifetimes`
+  unplanned : list
+      names of tensors with unknown shapes, allocated on the heap
+  arena_size : int
+      peak arena size in bytes
+  peak_live_bytes : int
+      lower bound of the arena size, see `peak_live_bytes`
+  """
+
+  def __init__(self, offsets, sizes, shapes, lifetimes, unplanned, arena_size, peak_live_bytes):
+    self.offsets = offsets
+    self.sizes = sizes
+    self.shapes = shapes
+    self.lifetimes = lifetimes
+    self.unplanned = unplanned
+    self.arena_size = arena_size
+    self.peak_live_bytes = peak_live_bytes
+
+  @property
+  def total_bytes(self):
+    """Bytes needed without reusing memory
+    """
+    return sum(self.sizes.values())
+
+
+def _align(nbytes, alignment):
+  return (nbytes + alignment - 1) // alignment * alignment
+
+
+def plan_memory(ugraph, order=None, alignment=8):
+  """Assign arena offsets to the RAM tensors of `ugraph`, evaluated in
+  `order` (default to `ugraph.topo_order`)
+
+  Return a `MemoryPlan`. Offsets are multiples of `alignment`.
+  """
+  lifetimes = tensor_lifetimes(ugraph, order)
+  sizes = {}
+  shapes = {}
+  unplanned = []
+  for tname in lifetimes:
+    tensor = _get_tensor(ugraph, tname)
+    nbytes = tensor_nbytes(tensor)
+    if nbytes is None:
+      unplanned.append(tname)
+    else:
+      sizes[tname] = nbytes
+      shapes[tname] = tensor.shape
+  # larger tensors first, ties broken by first use for determinism
+  to_place = sorted(sizes, key=lambda tname: (-sizes[tname], lifetimes[tname], tname))
+  offsets = {}
+  arena_size = 0
+  placed = []
+  for tname in to_place:
+    first, last = lifetimes[tname]
+    size = _align(sizes[tname], alignment)
+    # (offset, end) of placed tensors live at the same time
+    conflicts = sorted((offsets[other], offsets[other] + _align(sizes[other], alignment))
+                       for other in placed
+                       if lifetimes[other][0] <= last and first <= lifetimes[other][1])
+    best_offset = None
+    best_gap = None
+    prev_end = 0
+    for start, end in conflicts:
+      gap = start - prev_end
+      if gap >= size and (best_gap is None or gap < best_gap):
+        best_offset, best_gap = prev_end, gap
+      prev_end = max(prev_end, end)
+    if best_offset is None:
+      best_offset = prev_end
+    offsets[tname] = best_offset
+    arena_size = max(arena_size, best_offset + size)
+    placed.append(tname)
+  return MemoryPlan(offsets=offsets,
+                    sizes=sizes,
+                    shapes=shapes,
+                    lifetimes=lifetimes,
+                    unplanned=unplanned,
+                    arena_size=arena_size,
+                    peak_live_bytes=peak_live_bytes(ugraph, lifetimes=lifetimes))
@@ -87,6 +87,19 @@ class _DequantizeOperator(_Operator):
 
   def __init__(self, op_info, **kwargs):
     _Operator.__init__(self)
+    # uTensor DequantizeOp takes a single range, in MIN_FIRST mode
+    op_attr = op_info.op_attr
+    if 'mode' in op_attr:
+      mode = op_attr['mode'].value
+      if isinstance(mode, bytes):
+        mode = mode.decode('utf8')
+    else:
+      mode = 'MIN_COMBINED (tensorflow default, mode not set)'
+    axis = op_attr['axis'].value if 'axis' in op_attr else -1
+    if mode != 'MIN_FIRST' or axis != -1:
+      raise ValueError("unsupported Dequantize in uTensor: {}, mode {}, axis {} "
+                       "(only MIN_FIRST with a single range is supported)"
+                       .format(op_info.name, mode, axis))
     inputs = [tensor_info.name for tensor_info in op_info.input_tensors]
     out_tensor_info = op_info.output_tensors[0]
     output, out_dtype = out_tensor_info.name, out_tensor_info.dtype
@@ -202,6 +215,30 @@ class _QuantizedMatMulOperator(_Operator):
                                              ref_counts, to_eval)
 
 
+@OperatorFactory.register
+class _QuantizedFusedMatMulOperator(_Operator):
+
+  op_type = "QuantizedFusedMatMul"
+
+  def __init__(self, op_info, **kwargs):
+    _Operator.__init__(self)
+    inputs = [tensor_info.name for tensor_info in op_info.input_tensors]
+    outputs = [tensor_info.name for tensor_info in op_info.output_tensors]
+    x_dtype, w_dtype, out_dtype = (op_info.input_tensors[0].dtype,
+                                   op_info.input_tensors[1].dtype,
+                                   op_info.output_tensors[0].dtype)
+    relu = op_info.op_attr['fused_relu'].value
+    parser = NamescopedKWArgsParser(RefCntOptimizer.KWARGS_NAMESCOPE,
+                                    op_info.op_attr)
+    ref_counts = parser.get('ref_counts', [])
+    to_eval = parser.get('to_eval', False)
+    self._snippet = QuantizedFusedMatMulOpSnippet(inputs, outputs,
+                                                  x_dtype, w_dtype, out_dtype,
+                                                  relu=relu,
+                                                  ref_counts=ref_counts,
+                                                  to_eval=to_eval)
+
+
 @OperatorFactory.register
 class _QuantizedReluOperator(_Operator):
 
@@ -340,6 +377,31 @@ class _Conv2DOperator(_Operator):
                                      ref_counts=ref_counts, to_eval=to_eval)
 
 
+@OperatorFactory.register
+class _QuantizedFusedConv2DOperator(_Operator):
+
+  op_type = "QuantizedFusedConv2D"
+
+  def __init__(self, op_info, **kwargs):
+    _Operator.__init__(self)
+    inputs = [tensor_info.name for tensor_info in op_info.input_tensors]
+    outputs = [tensor_info.name for tensor_info in op_info.output_tensors]
+    in_dtype, filter_dtype = (op_info.input_tensors[0].dtype,
+                              op_info.input_tensors[1].dtype)
+    out_dtypes = [tensor_info.dtype for tensor_info in op_info.output_tensors]
+    strides = op_info.op_attr["strides"].value.ints_value
+    padding = op_info.op_attr["padding"].value.decode('utf8')
+    relu = op_info.op_attr['fused_relu'].value
+    parser = NamescopedKWArgsParser(RefCntOptimizer.KWARGS_NAMESCOPE,
+                                    op_info.op_attr)
+    ref_counts = parser.get('ref_counts', [])
+    to_eval = parser.get('to_eval', False)
+    self._snippet = QuantizedFusedConv2DOpSnippet(inputs, outputs, strides, padding,
+                                                  in_dtype=in_dtype, filter_dtype=filter_dtype,
+                                                  out_dtypes=out_dtypes, relu=relu,
+                                                  ref_counts=ref_counts, to_eval=to_eval)
+
+
 @OperatorFactory.register
 class _ConstOperator(_Operator):
 
@@ -353,17 +415,23 @@ class _ConstOperator(_Operator):
                                     op_info.op_attr)
     ref_count = parser.get('ref_counts', [0])[0]
     pre_tname = self._tf_prepare_tensor_name(out_tname)
-    idx_fname = "{}.idx".format(pre_tname)
     idx_dir = kwargs['idx_dir']
     embed_data_dir = kwargs.get('embed_data_dir',
                                 os.path.join("/fs", idx_dir))
+    np_array = self._tf_prepare_data(op_info.op_attr['value'].value)
+    own_idx_fname = "{}.idx".format(pre_tname)
+    # the idx file of a previous constant of the same value, if any
+    idx_fname = own_idx_fname
+    shared_weights = kwargs.get('shared_weights', None)
+    if shared_weights is not None:
+      idx_fname = shared_weights.get_name('idx', np_array, own_idx_fname)
     self._snippet = CreateTensorIdxSnippet(embed_data_dir, out_tname,
                                            idx_fname=idx_fname,
                                            np_dtype=out_dtype,
                                            ref_count=ref_count)
-    idx_path = os.path.join(idx_dir, idx_fname)
-    value = op_info.op_attr['value'].value
-    self._tf_save_data(idx_path, value)
+    if idx_fname == own_idx_fname:
+      idx_path = os.path.join(idx_dir, idx_fname)
+      self._tf_save_data(idx_path, np_array)
 
   def _tf_prepare_tensor_name(self, tensor_name):
     """Replace all ':' and '/' with '_' in a given tensor name
@@ -371,10 +439,13 @@ class _ConstOperator(_Operator):
     prepared = tensor_name.replace(":", "_").replace("/", "_")
     return prepared
   
-  def _tf_save_data(self, path, value):
+  def _tf_prepare_data(self, value):
     np_array = value.np_array
     if np_array.shape == ():
       np_array = np.array([np_array])
+    return np_array
+
+  def _tf_save_data(self, path, np_array):
     with open(path, "wb") as fid:
       idx2np.convert_to_file(fid, np_array)
     logger.info("saving %s", path)
@@ -394,20 +465,26 @@ class _InlineOperator(_Operator):
                                     op_info.op_attr)
     ref_count = parser.get('ref_counts', [0])[0]
     pre_tname = self._prepare_tensor_name(out_tname)
-    inline_tname = self._prepare_inline_array_name(out_tname)
-    value = op_info.op_attr['value'].value.np_array.flatten()
+    own_inline_tname = self._prepare_inline_array_name(out_tname)
+    np_array = op_info.op_attr['value'].value.np_array
+    # the array of a previous constant of the same value, if any
+    inline_tname = own_inline_tname
+    shared_weights = kwargs.get('shared_weights', None)
+    if shared_weights is not None:
+      inline_tname = shared_weights.get_name('inline', np_array, own_inline_tname)
     self._snippet = CreateTensorBinarySnippet(out_tname, tensor_shape=tensor_shape,
                                          tf_dtype=out_dtype,
                                          sptr_name=pre_tname,
                                          inline_name=inline_tname,
                                          ref_count=ref_count)
 
-    weight_snippet = WeightSnippet(inline_tname,
-                                  out_dtype,
-                                  tensor_shape,
-                                  value)
-    weight_container = kwargs['weight_container']                             
-    weight_container.add_snippet(weight_snippet)
+    if inline_tname == own_inline_tname:
+      weight_snippet = WeightSnippet(inline_tname,
+                                    out_dtype,
+                                    tensor_shape,
+                                    np_array.flatten())
+      weight_container = kwargs['weight_container']
+      weight_container.add_snippet(weight_snippet)
 
   def _prepare_tensor_name(self, tensor_name):
     prepared = tensor_name.replace(":", "_").replace("/", "_")
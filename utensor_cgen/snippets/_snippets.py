@@ -8,10 +8,11 @@ __all__ = ["Snippet", "SnippetContainerBase",
            "CreateTensorIdxSnippet", "CreateTensorNewSnippet",
            "AddOpSnippet", "MinOpSnippet", "MaxOpSnippet",
            "ArgMaxOpSnippet", "DequantizeOpSnippet", "QuantizedMaxPoolSnippet",
-           "QuantizedMatMulOpSnippet", "QuantizeV2OpSnippet",
+           "QuantizedMatMulOpSnippet", "QuantizedFusedMatMulOpSnippet",
+           "QuantizeV2OpSnippet",
            "QuantizedReluOpSnippet",
            "ReshapeOpSnippet", "QuantizedReshapeOpSnippet",
-           "Conv2DOpSnippent",
+           "Conv2DOpSnippent", "QuantizedFusedConv2DOpSnippet",
            "RequantizationRangeOpSnippet", "RequantizeOpSnippet",
            "CommentSnippet", "ContextHeaderSnippet",
            "ContextSnippetsContainer", "QuantizedAddOpSnippet",
@@ -269,6 +270,36 @@ class QuantizedMatMulOpSnippet(Snippet):
     self.template_vars["to_eval"] = to_eval
 
 
+class QuantizedFusedMatMulOpSnippet(Snippet):
+  """QuantizedMatMul requantized to 8 bits, followed by a Relu if `relu`
+  is True, in one kernel
+  """
+  __template_name__ = "snippets/qmatmul_fused_op.cpp"
+  __headers__ = set(['"uTensor/ops/MatrixOps.hpp"'])
+
+  def __init__(self, inputs, outputs, x_dtype, w_dtype, out_dtype,
+               relu=False,
+               ref_counts=None,
+               to_eval=False):
+    Snippet.__init__(self)
+    if ref_counts is None:
+      ref_counts = []
+    # same arguments order as QuantizedMatMulOpSnippet
+    inputs = _permute_args(inputs, [0, 2, 3, 1, 4, 5])
+    if ref_counts:
+      err_msg = ("incorrect number of ref_counts and outputs: {}, {}"
+                 .format(ref_counts, outputs))
+      assert len(ref_counts) == len(outputs), err_msg
+      self.template_vars['ref_counts'] = ref_counts
+    self.template_vars["inputs"] = inputs
+    self.template_vars["outputs"] = outputs
+    self.template_vars["x_dtype"] = NP_TYPES_MAP[x_dtype].tensor_type_str
+    self.template_vars["w_dtype"] = NP_TYPES_MAP[w_dtype].tensor_type_str
+    self.template_vars["out_dtype"] = NP_TYPES_MAP[out_dtype].tensor_type_str
+    self.template_vars["relu"] = relu
+    self.template_vars["to_eval"] = to_eval
+
+
 class QuantizedAddOpSnippet(Snippet):
   __template_name__ = "snippets/qadd_op.cpp"
   __headers__ = set(['"uTensor/ops/MathOps.hpp"'])
@@ -442,6 +473,37 @@ class Conv2DOpSnippent(Snippet):
     self.template_vars["to_eval"] = to_eval
 
 
+class QuantizedFusedConv2DOpSnippet(Snippet):
+  """QuantizedConv2D requantized to 8 bits, followed by a Relu if `relu`
+  is True, in one kernel
+  """
+  __template_name__ = "snippets/conv2d_fused_op.cpp"
+  __headers__ = set(['"uTensor/ops/MatrixOps.hpp"'])
+
+  def __init__(self, inputs, outputs, strides, padding,
+               in_dtype, filter_dtype, out_dtypes,
+               relu=False,
+               ref_counts=None,
+               to_eval=False):
+    Snippet.__init__(self)
+    if ref_counts is None:
+      ref_counts = []
+    if ref_counts:
+      err_msg = ("incorrect number of ref_counts and outputs: {}, {}"
+                 .format(ref_counts, outputs))
+      assert len(ref_counts) == len(outputs), err_msg
+    self.template_vars["inputs"] = inputs
+    self.template_vars["outputs"] = outputs
+    self.template_vars["in_dtype"] = NP_TYPES_MAP[in_dtype].tensor_type_str
+    self.template_vars["filter_dtype"] = NP_TYPES_MAP[filter_dtype].tensor_type_str
+    self.template_vars["out_dtypes"] = [NP_TYPES_MAP[out_dtype].tensor_type_str for out_dtype in out_dtypes]
+    self.template_vars["strides"] = strides
+    self.template_vars["padding"] = padding
+    self.template_vars["relu"] = relu
+    self.template_vars["ref_counts"] = ref_counts
+    self.template_vars["to_eval"] = to_eval
+
+
 class CommentSnippet(Snippet):
   __template_name__ = "snippets/comments.cpp"
   __headers__ = set([])
@@ -490,7 +552,8 @@ class ContextSnippetsContainer(SnippetContainerBase):
 
   def __init__(self,
                graph_name, ctx_header_name, ctx_weightheader_name,
-               snippets=None, placeholders=None, ref_counts=None):
+               snippets=None, placeholders=None, ref_counts=None,
+               arena_size=0, arena_alignment=8):
     SnippetContainerBase.__init__(self, snippets)
     if placeholders is None:
       placeholders = []
@@ -503,5 +566,7 @@ class ContextSnippetsContainer(SnippetContainerBase):
     self.template_vars["graph_name"] = graph_name
     self.template_vars["placeholders"] = placeholders
     self.template_vars["ref_counts"] = ref_counts
+    self.template_vars["arena_size"] = arena_size
+    self.template_vars["arena_alignment"] = arena_alignment
     self.add_header('"{}"'.format(ctx_header_name))
     self.add_header('"{}"'.format(ctx_weightheader_name))
@@ -3,8 +3,28 @@ from jinja2 import Environment, PackageLoader
 
 _loader = PackageLoader('utensor_cgen', 'snippets/templates')
 
+# name of the static buffer of tensors placed by the memory planner
+ARENA_NAME = 'utensor_arena'
+
+
+def new_ram_tensor(dtype, tensor_name, arena=None, shape=''):
+  """C++ expression creating the RAM tensor of given name
+
+  `arena` maps names of tensors placed in the arena to their (offset, shape),
+  other tensors are allocated on the heap with the `shape` initializer
+  (ex: '{1}')
+  """
+  if arena and tensor_name in arena:
+    offset, tensor_shape = arena[tensor_name]
+    dims = ', '.join(str(dim) for dim in tensor_shape) or '1'
+    return 'new WrappedRamTensor<{0}>({{{1}}}, ({0}*) ({2} + {3}))'.format(
+      dtype, dims, ARENA_NAME, offset
+    )
+  return 'new RamTensor<{}>({})'.format(dtype, shape)
+
+
 env = Environment(loader=_loader, trim_blocks=True, lstrip_blocks=True)
-env.globals.update(zip=zip)
+env.globals.update(zip=zip, new_ram_tensor=new_ram_tensor, arena_name=ARENA_NAME)
 
 del _loader
 
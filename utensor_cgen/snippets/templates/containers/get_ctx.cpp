@@ -1,3 +1,8 @@
+{% if arena_size %}
+// tensors placed by the memory planner, {{arena_size}} bytes
+alignas({{arena_alignment}}) static uint8_t {{arena_name}}[{{arena_size}}];
+
+{% endif %}
 {%if placeholders%}
 void get_{{graph_name}}_ctx(Context& ctx, {%for ph in placeholders%}Tensor* input_{{loop.index0}}{%if not loop.last %},{%endif%}{%endfor%}) {
 
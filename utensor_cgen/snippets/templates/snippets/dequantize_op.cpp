@@ -3,9 +3,9 @@ S_TENSOR {{sptr_name}};
 {% endif %}
 {
     {% if ref_count %}
-    ctx.add(new RamTensor<{{out_dtype}}>(), "{{output}}", {{ref_count}});
+    ctx.add({{ new_ram_tensor(out_dtype, output, arena) }}, "{{output}}", {{ref_count}});
     {% else %}
-    ctx.add(new RamTensor<{{out_dtype}}>(), "{{output}}");
+    ctx.add({{ new_ram_tensor(out_dtype, output, arena) }}, "{{output}}");
     {% endif %}
     ctx.push(new DequantizeOp(), 
              { {% for tname in inputs[:-1]%}"{{tname}}", {%endfor%}"{{inputs[-1]}}" },
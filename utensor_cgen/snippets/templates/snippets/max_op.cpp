@@ -2,11 +2,11 @@
 S_TENSOR {{sptr_name}};
 {% endif %}
 {   
-    RamTensor<{{out_dtype}}>* out_tensor;
+    Tensor* out_tensor;
     {%if out_shape %}
-    out_tensor = new RamTensor<{{out_dtype}}>({ {%for dim in out_shape[:-1]%}{{dim}}, {%endfor%}{{out_shape[-1]}} });
+    out_tensor = {{ new_ram_tensor(out_dtype, output, arena, '{ ' + out_shape|join(', ') + ' }') }};
     {%else%}
-    out_tensor = new RamTensor<{{out_dtype}}>();
+    out_tensor = {{ new_ram_tensor(out_dtype, output, arena) }};
     {%endif%}
     {%if ref_count %}
     ctx.add(out_tensor, "{{output}}", {{ref_count}});
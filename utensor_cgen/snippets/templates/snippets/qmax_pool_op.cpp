@@ -3,13 +3,13 @@ S_TENSOR {%for sptr_name in sptr_names[:-1]%}{{sptr_name}}, {%endfor%} {{sptr_na
 {% endif %}
 {
     {% if ref_counts %}
-    ctx.add(new RamTensor<{{dtype}}>(), "{{outputs[0]}}", {{ref_counts[0]}});
-    ctx.add(new RamTensor<float>({1}), "{{outputs[1]}}", {{ref_counts[1]}});
-    ctx.add(new RamTensor<float>({1}), "{{outputs[2]}}", {{ref_counts[2]}});
+    ctx.add({{ new_ram_tensor(dtype, outputs[0], arena) }}, "{{outputs[0]}}", {{ref_counts[0]}});
+    ctx.add({{ new_ram_tensor('float', outputs[1], arena, '{1}') }}, "{{outputs[1]}}", {{ref_counts[1]}});
+    ctx.add({{ new_ram_tensor('float', outputs[2], arena, '{1}') }}, "{{outputs[2]}}", {{ref_counts[2]}});
     {% else %}
-    ctx.add(new RamTensor<{{dtype}}>(), "{{outputs[0]}}");
-    ctx.add(new RamTensor<float>({1}), "{{outputs[1]}}");
-    ctx.add(new RamTensor<float>({1}), "{{outputs[2]}}");
+    ctx.add({{ new_ram_tensor(dtype, outputs[0], arena) }}, "{{outputs[0]}}");
+    ctx.add({{ new_ram_tensor('float', outputs[1], arena, '{1}') }}, "{{outputs[1]}}");
+    ctx.add({{ new_ram_tensor('float', outputs[2], arena, '{1}') }}, "{{outputs[2]}}");
     {% endif %}
 
     ctx.push(new QuantizedMaxPoolingOp<{{dtype}}>({{wind_rows}}, {{wind_cols}}, {{row_stride}}, {{col_stride}}, {{padding}}),
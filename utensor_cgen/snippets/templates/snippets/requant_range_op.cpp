@@ -3,11 +3,11 @@ S_TENSOR {%for sptr_name in sptr_names[:-1]%}{{sptr_name}}, {%endfor%} {{sptr_na
 {% endif %}
 {
     {%if ref_counts%}
-    ctx.add(new RamTensor<{{out_dtype}}>({1}), "{{outputs[0]}}", {{ref_counts[0]}});
-    ctx.add(new RamTensor<{{out_dtype}}>({1}), "{{outputs[1]}}", {{ref_counts[1]}});
+    ctx.add({{ new_ram_tensor(out_dtype, outputs[0], arena, '{1}') }}, "{{outputs[0]}}", {{ref_counts[0]}});
+    ctx.add({{ new_ram_tensor(out_dtype, outputs[1], arena, '{1}') }}, "{{outputs[1]}}", {{ref_counts[1]}});
     {%else%}
-    ctx.add(new RamTensor<{{out_dtype}}>({1}), "{{outputs[0]}}");
-    ctx.add(new RamTensor<{{out_dtype}}>({1}), "{{outputs[1]}}");
+    ctx.add({{ new_ram_tensor(out_dtype, outputs[0], arena, '{1}') }}, "{{outputs[0]}}");
+    ctx.add({{ new_ram_tensor(out_dtype, outputs[1], arena, '{1}') }}, "{{outputs[1]}}");
     {%endif%}
     ctx.push(new Requantization_RangeOp(),
              { {%for tname in inputs[:-1]%}"{{tname}}", {% endfor %}"{{inputs[-1]}}" },
@@ -1,5 +1,8 @@
 # -*- coding:utf8 -*-
+from .const_fold import *
+from .cse import *
 from .ns_transformer import *
 from .optimizer import *
 from .quantize import *
+from .schedule import *
 from .pipline import TransformerPipeline
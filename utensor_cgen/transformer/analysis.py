@@ -0,0 +1,136 @@
+# -*- coding:utf8 -*-
+r"""Graph Analyses
+
+Facts about the structure of a uTensorGraph which are shared by
+transformers. In a `TransformerPipeline`, results are cached in an
+`AnalysisManager` and only computed again after a transformer which
+doesn't list the analysis in its `PRESERVED_ANALYSES`.
+
+Results only refer to ops and tensors by name, so they stay valid for
+a forked graph, and should be treated as read-only.
+"""
+from abc import ABCMeta, abstractmethod
+from collections import defaultdict
+
+__all__ = ['Analysis', 'AnalysisManager', 'TensorConsumers', 'RefCounts',
+           'Reachability', 'NameScopeClusters', 'OpTypeIndex',
+           'STRUCTURAL_ANALYSES']
+
+
+class Analysis(object):
+  __metaclass__ = ABCMeta
+
+  @classmethod
+  @abstractmethod
+  def run(cls, ugraph, *args):
+    raise NotImplementedError('You should overwrite run method for all analysis')
+
+
+class TensorConsumers(Analysis):
+  """tensor name --> names of ops consuming it, one entry per input
+  """
+
+  @classmethod
+  def run(cls, ugraph):
+    consumers = defaultdict(list)
+    for op_info in ugraph.ops_info.values():
+      for tensor_info in op_info.input_tensors:
+        consumers[tensor_info.name].append(op_info.name)
+    return dict(consumers)
+
+
+class RefCounts(Analysis):
+  """tensor name --> number of inputs of ops referencing it
+
+  tensors not consumed by any op are not in the table
+  """
+
+  @classmethod
+  def run(cls, ugraph):
+    ref_counts = defaultdict(lambda: 0)
+    for op_info in ugraph.ops_info.values():
+      for tensor_info in op_info.input_tensors:
+        ref_counts[tensor_info.name] += 1
+    return dict(ref_counts)
+
+
+class Reachability(Analysis):
+  """set of names of ops the output nodes depend on
+  """
+
+  @classmethod
+  def run(cls, ugraph):
+    reachable = set(ugraph.output_nodes)
+    stack = list(ugraph.output_nodes)
+    while stack:
+      op_info = ugraph.ops_info[stack.pop()]
+      for tensor_info in op_info.input_tensors:
+        if tensor_info.op_name not in reachable:
+          reachable.add(tensor_info.op_name)
+          stack.append(tensor_info.op_name)
+    return reachable
+
+
+class NameScopeClusters(Analysis):
+  """name scope --> names of ops in it, in topological order
+
+  The name scope is the first group of `pattern` matching op names
+  """
+
+  @classmethod
+  def run(cls, ugraph, pattern):
+    clusters = defaultdict(list)
+    for op_name in ugraph.topo_order:
+      match = pattern.match(op_name)
+      if match:
+        clusters[match.group(1)].append(op_name)
+    return dict(clusters)
+
+
+class OpTypeIndex(Analysis):
+  """op type --> names of ops of that type
+  """
+
+  @classmethod
+  def run(cls, ugraph):
+    index = defaultdict(list)
+    for op_info in ugraph.ops_info.values():
+      index[op_info.op_type].append(op_info.name)
+    return dict(index)
+
+
+# analyses which only depend on ops, their connections and the output nodes
+STRUCTURAL_ANALYSES = (TensorConsumers, RefCounts, Reachability, NameScopeClusters)
+
+
+class AnalysisManager(object):
+  """Cache of analysis results
+
+  Results are keyed by the analysis and its extra arguments, it's up
+  to the caller to `invalidate` them when the graph changes.
+  If `enabled` is False, analyses are computed on every request.
+  """
+
+  def __init__(self, enabled=True):
+    self.enabled = enabled
+    self.hits = 0
+    self.misses = 0
+    self._cache = {}
+
+  def get(self, analysis_cls, ugraph, *args):
+    key = (analysis_cls,) + args
+    if key in self._cache:
+      self.hits += 1
+      return self._cache[key]
+    self.misses += 1
+    result = analysis_cls.run(ugraph, *args)
+    if self.enabled:
+      self._cache[key] = result
+    return result
+
+  def invalidate(self, preserved=()):
+    """Drop cached results of analyses not in `preserved`
+    """
+    for key in list(self._cache.keys()):
+      if key[0] not in preserved:
+        del self._cache[key]
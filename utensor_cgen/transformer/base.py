@@ -1,8 +1,8 @@
+import time
 from abc import ABCMeta, abstractmethod
-from copy import deepcopy
 from functools import wraps
 
-from utensor_cgen.utils import parse_tensor_name
+from .analysis import Reachability
 
 
 class Transformer(object):
@@ -15,6 +15,10 @@ class Transformer(object):
   __metaclass__ = ABCMeta
   KWARGS_NAMESCOPE = None
   METHOD_NAME = None
+  # analyses (see analysis.py) still valid after the transformation
+  PRESERVED_ANALYSES = ()
+  # True if `transform` sets `changed`
+  REPORTS_CHANGES = False
 
   def __new__(cls,
               prune_graph=True,
@@ -23,14 +27,40 @@ class Transformer(object):
       raise ValueError('kwargs namescope not found for %s' % cls)
     self = object.__new__(cls)
     self.prune_graph = prune_graph
+    # set by TransformerPipeline to share analyses between transformers
+    self.analysis_manager = None
+    # ops removed by and duration of the last pruning, if any
+    self.prune_stats = None
+    # set by transformers: True if the last transform modified the graph,
+    # None if unknown
+    self.changed = None
     ori_transform = self.transform
 
     @wraps(ori_transform)
     def transform(ugraph):
+      self.changed = None
       new_ugraph = ori_transform(ugraph)
-      new_ugraph._topologic_order_graph()
+      if self.analysis_manager is not None:
+        self.analysis_manager.invalidate(self.PRESERVED_ANALYSES)
+      ops_in_need = None
+      if new_ugraph.is_dirty:
+        new_ugraph._topologic_order_graph()
+        # a fresh topological order holds exactly the ops needed by the
+        # output nodes, no need of another traversal for pruning
+        ops_in_need = set(new_ugraph.topo_order)
+      self.prune_stats = None
       if self.prune_graph:
-        return self._prune_graph(new_ugraph)
+        start = time.time()
+        num_ops = len(new_ugraph.ops_info)
+        if ops_in_need is None:
+          ops_in_need = self.get_analysis(Reachability, new_ugraph)
+        self._prune_graph(new_ugraph, ops_in_need)
+        ops_removed = num_ops - len(new_ugraph.ops_info)
+        if self.analysis_manager is not None and ops_removed:
+          # dropping unreachable ops doesn't change reachability
+          self.analysis_manager.invalidate((Reachability,))
+        self.prune_stats = {'ops_removed': ops_removed,
+                            'time': time.time() - start}
       return new_ugraph
 
     self.transform = transform
@@ -44,29 +74,32 @@ class Transformer(object):
   def transform(self, ugraph):
     raise NotImplementedError('You should overwrite transform method for all transformer')
 
-  @classmethod
-  def _prune_graph(cls, ugraph):
-    """Remove nodes that is no longer needed
+  def get_analysis(self, analysis_cls, ugraph, *args):
+    """Result of the analysis on `ugraph`, cached if the transformer
+    runs in a pipeline
     """
-    new_ugraph = deepcopy(ugraph)
-    # BFS to find all ops you need
-    ops_in_need = set(ugraph.output_nodes)
-    queue = [name for name in ugraph.output_nodes]
-    visited = set([])
-    while queue:
-      op_name = queue.pop(0)
-      op_info = new_ugraph.ops_info[op_name]
-      in_ops = [parse_tensor_name(t_info.name)[0] 
-                for t_info in op_info.input_tensors]
-      queue.extend([name for name in in_ops if name not in visited])
-      visited.update(in_ops)
-      ops_in_need.update(in_ops)
+    if self.analysis_manager is None:
+      return analysis_cls.run(ugraph, *args)
+    return self.analysis_manager.get(analysis_cls, ugraph, *args)
+
+  @classmethod
+  def _prune_graph(cls, ugraph, ops_in_need=None):
+    """Remove nodes that is no longer needed, in place
 
-    ops_to_remove = set([])
-    for op_name in new_ugraph.ops_info.keys():
-      if op_name not in ops_in_need:
-        # remove ops not needed from ops_info
-        ops_to_remove.add(op_name)
+    `ops_in_need` is the result of `Reachability` analysis, computed
+    if not given. Nothing is done if all ops are needed, which is known
+    without traversing the graph if a transformer preserves the cached
+    reachability of a pruned graph.
+    """
+    if ops_in_need is None:
+      ops_in_need = Reachability.run(ugraph)
+    if len(ops_in_need) == len(ugraph.ops_info):
+      return ugraph
+    topo_order = ugraph.topo_order
+    ops_to_remove = [op_name for op_name in ugraph.ops_info
+                     if op_name not in ops_in_need]
     for op_name in ops_to_remove:
-      new_ugraph.ops_info.pop(op_name)
-    return new_ugraph
+      ugraph.drop_op(op_name)
+    # only ops not in the topological order are dropped
+    ugraph.topo_order = topo_order
+    return ugraph
@@ -0,0 +1,297 @@
+# -*- coding:utf8 -*-
+r"""Constant Folding
+
+Ops whose inputs are all constant are evaluated offline and replaced by
+`Const` ops, so they are neither computed nor allocated on the device.
+"""
+import logging
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.core.framework.node_def_pb2 import NodeDef
+
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.memory import tensor_nbytes
+
+from .base import Transformer
+from .utils import const_value, is_stateful, make_const_op
+
+__all__ = ['ConstFoldTransformer', 'FOLDING_KERNELS']
+
+_logger = logging.getLogger('utensor-cli')
+
+
+def _attr(op_info, key, default=None):
+  if key not in op_info.op_attr:
+    return default
+  return op_info.op_attr[key].value
+
+
+def _ints_attr(op_info, key):
+  value = _attr(op_info, key)
+  return [] if value is None else list(value.ints_value)
+
+
+def _reduce(np_func):
+  def kernel(op_info, values):
+    axis = values[1]
+    axis = tuple(axis.ravel().tolist()) if axis.ndim else int(axis)
+    keepdims = bool(_attr(op_info, 'keep_dims', False))
+    return [np_func(values[0], axis=axis, keepdims=keepdims).astype(values[0].dtype)]
+  return kernel
+
+
+def _binary(np_func):
+  def kernel(op_info, values):
+    return [np_func(values[0], values[1]).astype(op_info.output_tensors[0].dtype)]
+  return kernel
+
+
+def _unary(np_func):
+  def kernel(op_info, values):
+    return [np_func(values[0]).astype(op_info.output_tensors[0].dtype)]
+  return kernel
+
+
+def _bias_add(op_info, values):
+  value, bias = values
+  if _attr(op_info, 'data_format', b'NHWC') in [b'NCHW', 'NCHW'] and value.ndim > 2:
+    # channels on axis 1
+    bias = bias.reshape([-1] + [1] * (value.ndim - 2))
+  return [np.add(value, bias).astype(op_info.output_tensors[0].dtype)]
+
+
+def _squeeze(op_info, values):
+  axis = _ints_attr(op_info, 'squeeze_dims')
+  return [np.squeeze(values[0], axis=tuple(axis) if axis else None)]
+
+
+def _matmul(op_info, values):
+  a, b = values
+  if _attr(op_info, 'transpose_a', False):
+    a = a.T
+  if _attr(op_info, 'transpose_b', False):
+    b = b.T
+  return [np.matmul(a, b)]
+
+
+def _pack(op_info, values):
+  return [np.stack(values, axis=_attr(op_info, 'axis', 0))]
+
+
+def _unpack(op_info, values):
+  axis = _attr(op_info, 'axis', 0)
+  return [np.squeeze(value, axis=axis)
+          for value in np.split(values[0], values[0].shape[axis], axis=axis)]
+
+
+def _cast(op_info, values):
+  return [values[0].astype(op_info.output_tensors[0].dtype)]
+
+
+def _shape_dtype(op_info):
+  return op_info.output_tensors[0].dtype
+
+
+# op type --> kernel(op_info, input arrays) returning the output arrays
+FOLDING_KERNELS = {
+  'Identity': lambda op_info, values: [values[0]],
+  'Reshape': lambda op_info, values: [values[0].reshape(values[1].tolist())],
+  'Transpose': lambda op_info, values: [np.transpose(values[0], values[1].tolist())],
+  'ExpandDims': lambda op_info, values: [np.expand_dims(values[0],
+                                                      int(np.asarray(values[1]).reshape(-1)[0]))],
+  'Squeeze': _squeeze,
+  'Pack': _pack,
+  'Unpack': _unpack,
+  'ConcatV2': lambda op_info, values: [np.concatenate(values[:-1], axis=int(values[-1]))],
+  'Fill': lambda op_info, values: [np.full(values[0].tolist(), values[1], dtype=values[1].dtype)],
+  'Shape': lambda op_info, values: [np.array(values[0].shape, dtype=_shape_dtype(op_info))],
+  'Size': lambda op_info, values: [np.array(values[0].size, dtype=_shape_dtype(op_info))],
+  'Rank': lambda op_info, values: [np.array(values[0].ndim, dtype=np.int32)],
+  'Cast': _cast,
+  'Add': _binary(np.add),
+  'AddV2': _binary(np.add),
+  'BiasAdd': _bias_add,
+  'Sub': _binary(np.subtract),
+  'Mul': _binary(np.multiply),
+  'RealDiv': _binary(np.divide),
+  'Maximum': _binary(np.maximum),
+  'Minimum': _binary(np.minimum),
+  'Neg': _unary(np.negative),
+  'Sqrt': _unary(np.sqrt),
+  'Rsqrt': _unary(lambda x: 1 / np.sqrt(x)),
+  'Square': _unary(np.square),
+  'Exp': _unary(np.exp),
+  'Floor': _unary(np.floor),
+  'MatMul': _matmul,
+  'Sum': _reduce(np.sum),
+  'Mean': _reduce(np.mean),
+  'Max': _reduce(np.max),
+  'Min': _reduce(np.min),
+  'Prod': _reduce(np.prod),
+}
+
+
+class ConstFoldTransformer(Transformer):
+  """Replace ops with constant inputs by `Const` ops
+
+  Ops in `FOLDING_KERNELS` are evaluated with numpy, other ops are
+  evaluated by tensorflow if `use_tf` is True. Stateful ops (variables,
+  random ops, `Print`, ...) are never folded. `Shape`, `Size` and
+  `Rank` of tensors with fully known shapes are folded too.
+
+  Ops with outputs larger than `max_output_size` bytes (ex: `Fill` or
+  `Tile` of small constants) are not folded, so the model is not grown
+  by big constants. No limit if it is None.
+
+  Stats of last transform are kept in `fold_stats`: the number of
+  folded ops, the bytes of their outputs, which are no longer computed
+  at runtime, and the bytes of the `Const` ops replacing them.
+  """
+  METHOD_NAME = 'constfold'
+  KWARGS_NAMESCOPE = '_utensor_constfold'
+  REPORTS_CHANGES = True
+
+  # constants already, stateful ops are not foldable either
+  NON_FOLDABLE_OPS = ['Const', 'Inline']
+  SHAPE_OPS = ['Shape', 'Size', 'Rank']
+
+  def __init__(self, use_tf=True, max_output_size=1024 * 1024, **kwargs):
+    self.use_tf = use_tf
+    self.max_output_size = max_output_size
+    self.fold_stats = None
+
+  def transform(self, ugraph):
+    new_ugraph = ugraph.fork()
+    # tensor name --> constant value
+    values = {}
+    folded_ops = []
+    for op_name in new_ugraph.topo_order:
+      op_info = new_ugraph.ops_info[op_name]
+      if op_info.op_type == 'Const':
+        values[op_info.output_tensors[0].name] = const_value(op_info)
+        continue
+      out_values = self._fold(op_info, values)
+      if out_values is None:
+        continue
+      for tensor, value in zip(op_info.output_tensors, out_values):
+        values[tensor.name] = value
+      folded_ops.append(op_info)
+    folded_names = set(op_info.name for op_info in folded_ops)
+    bytes_removed = 0
+    const_bytes = 0
+    for op_info in folded_ops:
+      bytes_removed += sum(values[tensor.name].nbytes for tensor in op_info.output_tensors)
+      const_bytes += self._replace_by_const(new_ugraph, op_info, values, folded_names)
+    self.changed = bool(folded_ops)
+    self.fold_stats = {'ops_folded': len(folded_ops),
+                       'bytes_removed': bytes_removed,
+                       'const_bytes': const_bytes}
+    _logger.debug('constfold: %d ops folded, %d bytes removed, %d bytes of new constants',
+                  len(folded_ops), bytes_removed, const_bytes)
+    return new_ugraph
+
+  def _fold(self, op_info, values):
+    """Output values of `op_info`, None if it can't be folded
+    """
+    if op_info.op_type in self.NON_FOLDABLE_OPS or is_stateful(op_info) or \
+      not op_info.input_tensors or not op_info.output_tensors:
+      return None
+    if any(not self._is_foldable_dtype(tensor.dtype) for tensor in op_info.output_tensors):
+      return None
+    # skip before evaluation if the output shapes are known
+    if self._too_large([tensor_nbytes(tensor) or 0 for tensor in op_info.output_tensors]):
+      return None
+    if op_info.op_type in self.SHAPE_OPS:
+      in_tensor = op_info.input_tensors[0]
+      if in_tensor.name not in values:
+        shape = in_tensor.shape
+        if shape is None or None in shape:
+          return None
+        # only the shape is needed
+        return FOLDING_KERNELS[op_info.op_type](op_info, [np.broadcast_to(np.uint8(0), shape)])
+    in_values = []
+    for tensor in op_info.input_tensors:
+      value = values.get(tensor.name, None)
+      if value is None:
+        return None
+      in_values.append(value)
+    kernel = FOLDING_KERNELS.get(op_info.op_type, None)
+    if kernel is not None:
+      out_values = [np.asarray(value) for value in kernel(op_info, in_values)]
+    elif self.use_tf:
+      out_values = self._tf_eval(op_info, in_values)
+    else:
+      out_values = None
+    if out_values is None or self._too_large([value.nbytes for value in out_values]):
+      return None
+    return out_values
+
+  def _too_large(self, out_nbytes):
+    return self.max_output_size is not None and \
+      sum(out_nbytes) > self.max_output_size
+
+  @staticmethod
+  def _is_foldable_dtype(dtype):
+    # quantized types are structured dtypes
+    return dtype.fields is None and dtype.kind in 'biuf'
+
+  @staticmethod
+  def _tf_eval(op_info, in_values):
+    node_def = NodeDef(name=op_info.name,
+                       op=op_info.op_type,
+                       attr=uTensorGraph._tf_node_attr(op_info))
+    graph = tf.Graph()
+    with graph.as_default():
+      inputs = [tf.constant(value) for value in in_values]
+    node_def.input.extend([tensor.name for tensor in inputs])
+    graph_def = graph.as_graph_def()
+    graph_def.node.extend([node_def])
+    graph = tf.Graph()
+    with graph.as_default():
+      try:
+        tf.import_graph_def(graph_def, name='')
+      except (ValueError, TypeError) as err:
+        _logger.debug('constfold: can not evaluate %s: %s', op_info.name, err)
+        return None
+      out_tensors = [graph.get_tensor_by_name(tensor.name)
+                     for tensor in op_info.output_tensors]
+    with tf.Session(graph=graph) as sess:
+      try:
+        out_values = sess.run(out_tensors)
+      except tf.errors.OpError as err:
+        # ex: no CPU kernel for the op
+        _logger.debug('constfold: can not evaluate %s: %s', op_info.name, err)
+        return None
+    return [np.asarray(value) for value in out_values]
+
+  @staticmethod
+  def _replace_by_const(ugraph, op_info, values, folded_names):
+    """Replace outputs of `op_info` consumed by ops not folded with
+    `Const` ops, return the bytes of the new constants
+    """
+    if op_info.name in ugraph.output_nodes and len(op_info.output_tensors) == 1:
+      # keep the output name
+      value = values[op_info.output_tensors[0].name]
+      make_const_op(ugraph, op_info.name, value)
+      return value.nbytes
+    consumers = [out_op for out_op in op_info.output_nodes
+                 if out_op.name not in folded_names]
+    if not consumers:
+      return 0
+    if len(op_info.output_tensors) == 1:
+      value = values[op_info.output_tensors[0].name]
+      make_const_op(ugraph, op_info.name, value)
+      return value.nbytes
+    const_bytes = 0
+    for tensor in op_info.output_tensors:
+      if not any(in_tensor.name == tensor.name
+                 for out_op in consumers for in_tensor in out_op.input_tensors):
+        continue
+      value = values[tensor.name]
+      const_op = make_const_op(ugraph,
+                               '{}/folded_{}'.format(op_info.name, tensor.output_index),
+                               value)
+      ugraph.replace_tensor(tensor, const_op.output_tensors[0])
+      const_bytes += value.nbytes
+    return const_bytes
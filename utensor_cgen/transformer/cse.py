@@ -0,0 +1,109 @@
+# -*- coding:utf8 -*-
+r"""Common Subexpression Elimination
+
+Ops of the same type, with the same inputs and attributes compute the
+same outputs: the consumers of duplicated ops are moved to the first of
+them, the others are pruned. Ops are visited once in topological order,
+so chains of duplicated ops (ex: Reshape -> Min fed by the same tensor)
+are merged in a single pass.
+"""
+import hashlib
+import logging
+
+from utensor_cgen.ir import uTensorGraph
+from utensor_cgen.memory import NOT_PLANNED_OP_TYPES, tensor_nbytes
+
+from .base import Transformer
+from .optimizer import RefCntOptimizer
+from .utils import is_stateful
+
+__all__ = ['CSETransformer']
+
+_logger = logging.getLogger('utensor-cli')
+
+_REF_COUNTS_KEY = '%s__ref_counts' % RefCntOptimizer.KWARGS_NAMESCOPE
+
+
+class CSETransformer(Transformer):
+  """Merge ops computing the same values
+
+  Two ops are duplicates if they have the same type, the same input
+  tensors (in order) and the same attributes. Attributes of names
+  starting with an underscore (ex: `_class`, `_output_shapes` or the
+  ones set by other transformers) are ignored. Output nodes are never
+  removed and stateful ops (placeholders, variables, random ops, ...),
+  whose outputs differ across ops, are never merged.
+
+  Ref counts set by `refcnt` are updated. Stats of the last
+  transformation are kept in `cse_stats`: the number of ops removed
+  and the bytes of their RAM tensors.
+  """
+  METHOD_NAME = 'cse'
+  KWARGS_NAMESCOPE = '_utensor_cse'
+  REPORTS_CHANGES = True
+
+  def __init__(self, **kwargs):
+    self.cse_stats = None
+
+  def transform(self, ugraph):
+    new_ugraph = ugraph.fork()
+    # op key --> first op of that key
+    seen = {}
+    ops_removed = 0
+    bytes_removed = 0
+    for op_name in new_ugraph.topo_order:
+      op_info = new_ugraph.ops_info[op_name]
+      if is_stateful(op_info):
+        continue
+      key = self._op_key(op_info)
+      kept_op = seen.get(key, None)
+      if kept_op is None:
+        seen[key] = op_info
+        continue
+      if op_name in new_ugraph.output_nodes:
+        continue
+      self._merge(new_ugraph, op_info, kept_op)
+      ops_removed += 1
+      if op_info.op_type not in NOT_PLANNED_OP_TYPES:
+        bytes_removed += sum(tensor_nbytes(tensor) or 0 for tensor in op_info.output_tensors)
+    self.changed = ops_removed > 0
+    self.cse_stats = {'ops_removed': ops_removed, 'bytes_removed': bytes_removed}
+    _logger.debug('cse: %d ops removed, %d bytes of tensors removed',
+                  ops_removed, bytes_removed)
+    return new_ugraph
+
+  @staticmethod
+  def _op_key(op_info):
+    # inputs are already rewired to the kept ops of earlier duplicates
+    attr = uTensorGraph._tf_node_attr(op_info)
+    digest = hashlib.sha1()
+    for attr_name in sorted(attr):
+      if attr_name.startswith('_'):
+        continue
+      digest.update(attr_name.encode('utf8'))
+      digest.update(attr[attr_name].SerializeToString(deterministic=True))
+    return (op_info.op_type,
+            tuple(tensor.name for tensor in op_info.input_tensors),
+            len(op_info.output_tensors),
+            digest.digest())
+
+  @staticmethod
+  def _merge(ugraph, op_info, kept_op):
+    """Move consumers of the outputs of `op_info` to the outputs of
+    `kept_op`, updating ref counts if any
+    """
+    kept_counts = kept_op.op_attr.get(_REF_COUNTS_KEY, None)
+    counts = op_info.op_attr.get(_REF_COUNTS_KEY, None)
+    if kept_counts is not None and counts is not None:
+      kept_op.op_attr[_REF_COUNTS_KEY] = [kept_count + count for kept_count, count
+                                          in zip(kept_counts, counts)]
+    # inputs of the removed op lose a consumer
+    for tensor in op_info.input_tensors:
+      in_op = tensor.op
+      in_counts = in_op.op_attr.get(_REF_COUNTS_KEY, None) if in_op is not None else None
+      if in_counts is not None:
+        in_counts = list(in_counts)
+        in_counts[tensor.output_index] -= 1
+        in_op.op_attr[_REF_COUNTS_KEY] = in_counts
+    for tensor, kept_tensor in zip(op_info.output_tensors, kept_op.output_tensors):
+      ugraph.replace_tensor(tensor, kept_tensor)
@@ -4,117 +4,364 @@ r"""Namescope Transformer
 Transformers that get rid of namescope/nodes which are not needed 
 for inference
 """
+import logging
 import re
-from collections import defaultdict
-from copy import deepcopy
 
-from utensor_cgen.ir import OperationInfo, uTensorGraph
-from utensor_cgen.utils import parse_tensor_name
+import numpy as np
 
+from utensor_cgen.ir import OperationInfo, TensorInfo
+from utensor_cgen.ir.converter import AttrValueConverter
+from utensor_cgen.memory import tensor_nbytes
+
+from .analysis import STRUCTURAL_ANALYSES, NameScopeClusters, OpTypeIndex
 from .base import Transformer
+from .pattern import OpPattern, PatternTransformer, RewriteRule
+from .utils import CONST_OP_TYPES, attr_value, const_value, make_const_op
+
+__all__ = ["DropoutTransformer", "BatchNormTransformer", "InlineTransformer",
+           "IdentityTransformer"]
 
-__all__ = ["DropoutTransformer", "BatchNormTransformer", "InlineTransformer"]
+_logger = logging.getLogger('utensor-cli')
 
 class InlineTransformer(Transformer):
   METHOD_NAME = 'inline'
   KWARGS_NAMESCOPE = '_utensor_inline'
   TARGET_NODENAME_PATTERN = re.compile(r'(const[_\w\d]*)/.*')
+  # only op types are changed
+  PRESERVED_ANALYSES = STRUCTURAL_ANALYSES
 
 
   def transform(self, ugraph):
-    for node_name in ugraph.topo_order:
-      op_type = ugraph.ops_info[node_name].op_type
-      if op_type == 'Const':
-        op_info = ugraph.ops_info[node_name]
-        op_info.op_type = 'Inline'
+    op_type_index = self.get_analysis(OpTypeIndex, ugraph)
+    for node_name in op_type_index.get('Const', []):
+      ugraph.ops_info[node_name].op_type = 'Inline'
     
     return ugraph
 
-class DropoutTransformer(Transformer):
+class DropoutTransformer(PatternTransformer):
   """Remove Dropout Op
+
+  Dropout subgraphs are matched by structure, as generated by
+  `tf.nn.dropout` of different tensorflow versions, and their
+  output is replaced by their input. Each of them must draw its mask
+  from a `RandomUniform` op, so plain arithmetic of the same shape is
+  kept. The dropout ops (and keep_prob if not used elsewhere) are
+  removed by graph pruning.
+
+  Dropout name scopes (`NameScopeClusters`) still feeding the graph
+  after the transformation, whose structure is not recognized, are
+  kept in `unmatched_scopes` and reported.
   """
   METHOD_NAME = 'dropout'
   KWARGS_NAMESCOPE = '_utensor_dropout'
   TARGET_NODENAME_PATTERN = re.compile(r'(dropout[_\w\d]*)/.*')
 
+  def __init__(self, prune_graph=True, **kwargs):
+    self.unmatched_scopes = None
+
   def transform(self, ugraph):
-    new_graph = uTensorGraph()
-    dropout_input_map = self._find_input(ugraph)
-    new_ops_info = {}
-    for node_name in ugraph.topo_order:
-      match = self.TARGET_NODENAME_PATTERN.match(node_name)
-      if match:
-        # ignore all dropout nodes
-        continue
-      # replace inputs with dropout inputs
-      op_info = ugraph.ops_info[node_name]
-      in_t_infos = [deepcopy(t_info, {'ugraph': new_graph}) 
-                    for t_info in op_info.input_tensors]
-      out_t_infos = [deepcopy(t_info, {'ugraph': new_graph}) 
-                    for t_info in op_info.output_tensors]
-      op_attr = deepcopy(op_info.op_attr)
-      for i, t_info in enumerate(in_t_infos):
-        op_name = parse_tensor_name(t_info.name)[0]
-        match = self.TARGET_NODENAME_PATTERN.match(op_name)
-        if match:
-          name_scope = match.group(1)
-          # assume there should be only on input except keep_prob
-          dropout_in_tensor = dropout_input_map[name_scope]
-          in_t_infos.pop(i)
-          in_t_infos.insert(i, dropout_in_tensor)
-      new_op_info = OperationInfo(name=op_info.name,
-                                  input_tensors=in_t_infos,
-                                  output_tensors=out_t_infos,
-                                  op_type=op_info.op_type,
-                                  backend=op_info.backend,
-                                  op_attr=op_attr,
-                                  ugraph=new_graph)
-      new_ops_info[node_name] = new_op_info
-    new_graph.ops_info = new_ops_info
-    new_graph.output_nodes = ugraph.output_nodes
-    new_graph._backend = ugraph._backend
-    return new_graph
-
-  def _find_dropout_clusters(self, ugraph):
-    clusters = defaultdict(lambda: [])
-    for node_name in ugraph.topo_order:
-      match = self.TARGET_NODENAME_PATTERN.match(node_name)
-      if match:
-        name_scope = match.group(1)
-        clusters[name_scope].append(node_name)
-    return dict(clusters)
-
-  def _find_input(self, ugraph):
-    """dropout_name --> input_tensor_info
-
-    input_tensor_info := the tensor info of a tensor which is not generated
-                         in the dropout namescope but is consumed by ops in
-                         dropout namescope with name not starts with 'keep_prob'
+    new_ugraph = PatternTransformer.transform(self, ugraph)
+    clusters = self.get_analysis(NameScopeClusters, ugraph, self.TARGET_NODENAME_PATTERN)
+    self.unmatched_scopes = sorted(name_scope for name_scope, op_names in clusters.items()
+                                   if self._is_used(new_ugraph, op_names))
+    if self.unmatched_scopes:
+      _logger.warning('dropout: name scopes not recognized as dropout, kept: %s',
+                      ', '.join(self.unmatched_scopes))
+    return new_ugraph
+
+  @staticmethod
+  def _is_used(ugraph, op_names):
+    """True if ops of `op_names` are output nodes or consumed by other ops
     """
-    clusters = self._find_dropout_clusters(ugraph)
-    input_map = {}
-    for node_name in ugraph.topo_order:
-      match = self.TARGET_NODENAME_PATTERN.match(node_name)
-      if match:
-        name_scope = match.group(1)
-        cluster = clusters[name_scope]
-        op_info = ugraph.ops_info[node_name]
-        for in_tensor_info in op_info.input_tensors:
-          in_op_name = parse_tensor_name(in_tensor_info.name)[0]
-          if in_op_name not in cluster and not in_op_name.startswith('keep_prob'):
-            input_map[name_scope] = in_tensor_info
-            # assuming there is only one input for dropout
-            break
-    return input_map
-
-
-class BatchNormTransformer(Transformer):
-  """Replace Batch Norm namescope with uTensor Op
+    op_names = set(op_names)
+    for op_name in op_names:
+      op_info = ugraph.ops_info.get(op_name, None)
+      if op_info is None:
+        continue
+      if op_name in ugraph.output_nodes or \
+        any(out_op.name not in op_names for out_op in op_info.output_nodes):
+        return True
+    return False
+
+  @staticmethod
+  def _random_patterns():
+    # random_uniform of [0, 1): scaled and shifted by older tensorflow
+    return [
+      OpPattern('RandomUniform'),
+      OpPattern(['Add', 'AddV2'], inputs=[
+        OpPattern('Mul', inputs=[OpPattern('RandomUniform'), None]),
+        None
+      ])
+    ]
+
+  @classmethod
+  def _dropout_patterns(cls):
+    patterns = []
+    for random in cls._random_patterns():
+      # x / keep_prob * floor(keep_prob + random_uniform)
+      patterns.append(OpPattern('Mul', name='dropout', inputs=[
+        OpPattern('RealDiv', name='scaled'),
+        OpPattern('Floor', inputs=[OpPattern(['Add', 'AddV2'], inputs=[None, random])])
+      ]))
+      # x * (1 / (1 - rate)) * cast(random_uniform >= rate)
+      patterns.append(OpPattern('Mul', name='dropout', inputs=[
+        OpPattern('Mul', name='scaled'),
+        OpPattern('Cast', inputs=[OpPattern('GreaterEqual', inputs=[random, None])])
+      ]))
+      # select(random_uniform >= rate, x / (1 - rate), 0)
+      patterns.append(OpPattern(['Select', 'SelectV2'], name='dropout', inputs=[
+        OpPattern('GreaterEqual', inputs=[random, None]),
+        OpPattern('RealDiv', name='scaled'),
+        OpPattern('Const')
+      ]))
+    return patterns
+
+  def rewrite_rules(self):
+    return [RewriteRule(pattern, self._remove_dropout)
+            for pattern in self._dropout_patterns()]
+
+  @staticmethod
+  def _remove_dropout(ugraph, match):
+    dropout = match['dropout']
+    if dropout.name in ugraph.output_nodes:
+      return False
+    ugraph.replace_tensor(dropout.output_tensors[0],
+                          match['scaled'].input_tensors[0])
+
+
+class BatchNormTransformer(PatternTransformer):
+  """Fold inference batch norm into the weights and bias of the
+  preceding Conv2D/MatMul
+
+  Both `FusedBatchNorm` ops and the unfused ops generated by
+  `tf.nn.batch_normalization` are matched. With
+
+    multiplier = scale / sqrt(variance + epsilon)
+    y = (conv(x, W) + bias - mean) * multiplier + offset
+
+  the batch norm is replaced by `conv(x, W * multiplier)` followed by a
+  BiasAdd of `(bias - mean) * multiplier + offset`. Batch norm ops are
+  removed by graph pruning.
   """
   METHOD_NAME = 'batch_norm'
   KWARGS_NAMESCOPE = '_batch_norm'
-  TARGET_NODENAME_PATTERN = re.compile(r'(BatchNorm[_\w\d]*)/.*')
+
+  _PRODUCER_TYPES = ['Conv2D', 'MatMul', 'BiasAdd']
+  _FUSED_TYPES = ['FusedBatchNorm', 'FusedBatchNormV2', 'FusedBatchNormV3']
+
+  def rewrite_rules(self):
+    return [RewriteRule(pattern, self._fold_batch_norm)
+            for pattern in [self._fused_pattern(),
+                            self._unfused_pattern(with_scale=True),
+                            self._unfused_pattern(with_scale=False)]]
+
+  @classmethod
+  def _fused_pattern(cls):
+    def is_inference(op_info):
+      return (not attr_value(op_info, 'is_training', False) and
+              attr_value(op_info, 'data_format', 'NHWC') in [b'NHWC', 'NHWC'])
+    return OpPattern(cls._FUSED_TYPES, name='batch_norm', predicate=is_inference, inputs=[
+      OpPattern(cls._PRODUCER_TYPES, name='producer'),
+      OpPattern(CONST_OP_TYPES, name='scale'),
+      OpPattern(CONST_OP_TYPES, name='offset'),
+      OpPattern(CONST_OP_TYPES, name='mean'),
+      OpPattern(CONST_OP_TYPES, name='variance'),
+    ])
+
+  @classmethod
+  def _unfused_pattern(cls, with_scale):
+    # x * multiplier + (offset - mean * multiplier)
+    rsqrt = OpPattern('Rsqrt', inputs=[
+      OpPattern(['Add', 'AddV2'], inputs=[
+        OpPattern(CONST_OP_TYPES, name='variance'),
+        OpPattern(CONST_OP_TYPES, name='epsilon')
+      ])
+    ])
+    if with_scale:
+      multiplier = OpPattern('Mul', name='multiplier', inputs=[
+        rsqrt, OpPattern(CONST_OP_TYPES, name='scale')
+      ])
+    else:
+      rsqrt.name = 'multiplier'
+      multiplier = rsqrt
+    return OpPattern(['Add', 'AddV2'], name='batch_norm', inputs=[
+      OpPattern('Mul', name='scaled', inputs=[
+        OpPattern(cls._PRODUCER_TYPES, name='producer'),
+        multiplier
+      ]),
+      OpPattern('Sub', inputs=[
+        OpPattern(CONST_OP_TYPES, name='offset'),
+        OpPattern('Mul', inputs=[OpPattern(CONST_OP_TYPES, name='mean'), multiplier])
+      ])
+    ])
+
+  def _fold_batch_norm(self, ugraph, match):
+    batch_norm = match['batch_norm']
+    if batch_norm.name in ugraph.output_nodes:
+      return False
+    # only the normalized output of FusedBatchNorm can be consumed
+    for out_op in batch_norm.output_nodes:
+      for in_tensor in out_op.input_tensors:
+        if in_tensor.op_name == batch_norm.name and in_tensor.output_index != 0:
+          return False
+    # x * multiplier of the unfused batch norm is computed from the
+    # producer output, it can't be consumed elsewhere. The shift only
+    # depends on constants, other consumers of it are not changed
+    scaled = match.get('scaled', None)
+    if scaled is not None and \
+      (scaled.name in ugraph.output_nodes or
+       [out_op.name for out_op in scaled.output_nodes] != [batch_norm.name]):
+      return False
+    producer = match['producer']
+    # the producer output should be consumed by batch norm only
+    if len(producer.output_nodes) != 1 or producer.name in ugraph.output_nodes:
+      return False
+    bias = None
+    bias_add = None
+    if producer.op_type == 'BiasAdd':
+      bias_add = producer
+      producer = bias_add.input_tensors[0].op
+      bias = const_value(bias_add.input_tensors[1].op)
+      if producer is None or producer.op_type not in ['Conv2D', 'MatMul'] or \
+        bias is None or len(producer.output_nodes) != 1:
+        return False
+    if producer.op_type == 'Conv2D' and \
+      attr_value(producer, 'data_format', 'NHWC') not in [b'NHWC', 'NHWC']:
+      return False
+    weight = const_value(producer.input_tensors[1].op)
+    if weight is None:
+      return False
+    values = dict((name, const_value(match[name]))
+                  for name in ['scale', 'offset', 'mean', 'variance', 'epsilon']
+                  if name in match)
+    # const patterns also match Identity of non-constant tensors
+    if any(value is None for value in values.values()):
+      return False
+    if 'epsilon' not in values:
+      values['epsilon'] = attr_value(batch_norm, 'epsilon', 1e-4)
+    if 'scale' not in values:
+      values['scale'] = 1.0
+    multiplier = values['scale'] / np.sqrt(values['variance'] + values['epsilon'])
+    shift = values['offset'] - values['mean'] * multiplier
+    transpose_b = (producer.op_type == 'MatMul' and
+                   attr_value(producer, 'transpose_b', False))
+    num_channels = weight.shape[0] if transpose_b else weight.shape[-1]
+    if multiplier.ndim != 1 or multiplier.size != num_channels:
+      return False
+    if transpose_b:
+      new_weight = weight * multiplier[:, np.newaxis]
+    else:
+      new_weight = weight * multiplier
+    if bias is not None:
+      shift = shift + bias * multiplier
+    dtype = weight.dtype
+    weight_op = make_const_op(ugraph, '{}/bn_folded_weight'.format(producer.name),
+                              new_weight.astype(dtype))
+    bias_op = make_const_op(ugraph, '{}/bn_folded_bias'.format(producer.name),
+                            shift.astype(dtype))
+    # same name, replacing the producer
+    new_producer = OperationInfo(name=producer.name,
+                                 input_tensors=[producer.input_tensors[0],
+                                                weight_op.output_tensors[0]],
+                                 output_tensors=producer.output_tensors,
+                                 op_type=producer.op_type,
+                                 backend=producer.backend,
+                                 op_attr=producer.op_attr,
+                                 ugraph=ugraph)
+    if bias_add is None:
+      bias_add_name = '{}/bn_folded_bias_add'.format(producer.name)
+      out_tensor = TensorInfo(name=u'{}:0'.format(bias_add_name),
+                              op_name=bias_add_name,
+                              dtype=batch_norm.output_tensors[0].dtype,
+                              shape=batch_norm.output_tensors[0].shape,
+                              ugraph=ugraph)
+      op_attr = {
+        'T': AttrValueConverter.__utensor_generic_type__(value_name='type',
+                                                         value=np.dtype(dtype)),
+        'data_format': AttrValueConverter.__utensor_generic_type__(value_name='s',
+                                                                   value=b'NHWC')
+      }
+    else:
+      bias_add_name = bias_add.name
+      out_tensor = bias_add.output_tensors[0]
+      op_attr = bias_add.op_attr
+    new_bias_add = OperationInfo(name=bias_add_name,
+                                 input_tensors=[new_producer.output_tensors[0],
+                                                bias_op.output_tensors[0]],
+                                 output_tensors=[out_tensor],
+                                 op_type='BiasAdd',
+                                 backend=producer.backend,
+                                 op_attr=op_attr,
+                                 ugraph=ugraph)
+    ugraph.replace_tensor(batch_norm.output_tensors[0],
+                          new_bias_add.output_tensors[0])
+
+
+class IdentityTransformer(Transformer):
+  """Remove ops forwarding their inputs unchanged
+
+  Consumers of `Identity`, `StopGradient`, ... and of `Reshape` ops
+  whose output shape is their (fully known) input shape consume the
+  forwarded tensors instead, `NoOp` ops are dropped. Ops are visited
+  once in topological order, so chains of them are removed in a single
+  pass. Output nodes are kept.
+
+  Stats of the last transformation are kept in `removal_stats`: the
+  number of ops removed, and the number and bytes of their output
+  tensors, which are no longer allocated.
+  """
+  METHOD_NAME = 'identity'
+  KWARGS_NAMESCOPE = '_utensor_identity'
+  REPORTS_CHANGES = True
+
+  # op type --> index of the input forwarded to each output
+  FORWARDED_INPUTS = {
+    'Identity': [0],
+    'Snapshot': [0],
+    'StopGradient': [0],
+    'PreventGradient': [0],
+    'Reshape': [0],
+    'QuantizedReshape': [0, 2, 3],
+  }
+  RESHAPE_OPS = ['Reshape', 'QuantizedReshape']
+
+  def __init__(self, **kwargs):
+    self.removal_stats = None
 
   def transform(self, ugraph):
-    # TODO: implement this!
-    pass
+    new_ugraph = ugraph.fork()
+    tensors_removed = 0
+    bytes_removed = 0
+    # no data outputs, not in the topological order of output nodes
+    noop_names = [op_name for op_name, op_info in new_ugraph.ops_info.items()
+                  if op_info.op_type == 'NoOp' and op_name not in new_ugraph.output_nodes]
+    for op_name in noop_names:
+      new_ugraph.drop_op(op_name)
+    ops_removed = len(noop_names)
+    for op_name in new_ugraph.topo_order:
+      op_info = new_ugraph.ops_info[op_name]
+      if op_name in new_ugraph.output_nodes:
+        continue
+      forwarded = self.FORWARDED_INPUTS.get(op_info.op_type, None)
+      if forwarded is None or \
+        (op_info.op_type in self.RESHAPE_OPS and not self._is_noop_reshape(op_info)):
+        continue
+      for tensor, in_idx in zip(op_info.output_tensors, forwarded):
+        new_ugraph.replace_tensor(tensor, op_info.input_tensors[in_idx])
+        tensors_removed += 1
+        bytes_removed += tensor_nbytes(tensor) or 0
+      ops_removed += 1
+    self.changed = ops_removed > 0
+    self.removal_stats = {'ops_removed': ops_removed,
+                          'tensors_removed': tensors_removed,
+                          'bytes_removed': bytes_removed}
+    _logger.debug('identity: %(ops_removed)d ops removed, %(tensors_removed)d tensors '
+                  '(%(bytes_removed)d bytes) not allocated', self.removal_stats)
+    return new_ugraph
+
+  @staticmethod
+  def _is_noop_reshape(op_info):
+    in_shape = op_info.input_tensors[0].shape
+    out_shape = op_info.output_tensors[0].shape
+    return (in_shape is not None and out_shape is not None and
+            None not in in_shape and list(in_shape) == list(out_shape))
@@ -0,0 +1,139 @@
+# -*- coding:utf8 -*-
+r"""Subgraph Pattern Rewriting
+
+A `RewriteRule` pairs an `OpPattern` with a function rewriting the
+matched subgraph. Candidates for the root of a pattern are looked up in
+the `OpTypeIndex` analysis, so only ops of the right type are tried, and
+the rules of a transformer are all applied in one pass over the index.
+
+ex: the output of `Mul(RealDiv(x, _), Floor(_))`
+
+  OpPattern('Mul', name='mul',
+            inputs=[OpPattern('RealDiv', name='div'), OpPattern('Floor')])
+"""
+from collections import defaultdict
+
+import six
+
+from .analysis import OpTypeIndex, Reachability
+from .base import Transformer
+
+__all__ = ['OpPattern', 'RewriteRule', 'apply_rewrite_rules', 'PatternTransformer']
+
+
+class OpPattern(object):
+  """Pattern of an op and, recursively, of the ops producing its inputs
+
+  op_types : str or list of str
+      accepted op types, None for any type
+  inputs : list
+      patterns of the producers of the input tensors, one per input and
+      None for any producer. If `inputs` is None, the inputs are not checked
+  name : str
+      the matched op is bound to this name in the match. Patterns with
+      the same name must match the same op
+  predicate : callable
+      extra check on the matched OperationInfo (ex: on its `op_attr`)
+  """
+
+  def __init__(self, op_types=None, inputs=None, name=None, predicate=None):
+    if isinstance(op_types, six.string_types):
+      op_types = [op_types]
+    self.op_types = None if op_types is None else tuple(op_types)
+    self.inputs = inputs
+    self.name = name
+    self.predicate = predicate
+
+  def match(self, ugraph, op_info, bindings):
+    """Check if `op_info` matches the pattern, matched named ops are
+    added to `bindings`
+    """
+    if self.op_types is not None and op_info.op_type not in self.op_types:
+      return False
+    if self.name is not None:
+      bound_op = bindings.get(self.name, None)
+      if bound_op is not None:
+        return bound_op.name == op_info.name
+      bindings[self.name] = op_info
+    if self.predicate is not None and not self.predicate(op_info):
+      return False
+    if self.inputs is None:
+      return True
+    if len(self.inputs) != len(op_info.input_tensors):
+      return False
+    for in_pattern, in_tensor in zip(self.inputs, op_info.input_tensors):
+      if in_pattern is None:
+        continue
+      in_op = ugraph.ops_info.get(in_tensor.op_name, None)
+      if in_op is None or not in_pattern.match(ugraph, in_op, bindings):
+        return False
+    return True
+
+
+class RewriteRule(object):
+  """
+  pattern : OpPattern
+      the root pattern must have a name and op types
+  rewrite : callable
+      rewrite(ugraph, match) modifies `ugraph` in place, `match` maps
+      names of the patterns to matched ops. Returning False means the
+      match is rejected and the graph is not modified
+  """
+
+  def __init__(self, pattern, rewrite):
+    if pattern.name is None or pattern.op_types is None:
+      raise ValueError('the root pattern should have a name and op types')
+    self.pattern = pattern
+    self.rewrite = rewrite
+
+
+def apply_rewrite_rules(ugraph, rules, op_type_index):
+  """Rewrite matches of `rules` in `ugraph`, in place
+
+  `op_type_index` is the result of `OpTypeIndex` analysis. Each op
+  is tried as a root once, with rules in given order; ops created by
+  rewrites are not tried. Return the number of rewrites.
+  """
+  rules_by_type = defaultdict(list)
+  for rule in rules:
+    for op_type in rule.pattern.op_types:
+      rules_by_type[op_type].append(rule)
+  num_rewrites = 0
+  for op_type, type_rules in rules_by_type.items():
+    for op_name in op_type_index.get(op_type, []):
+      op_info = ugraph.ops_info.get(op_name, None)
+      if op_info is None or op_info.op_type != op_type:
+        # dropped or changed by previous rewrites
+        continue
+      for rule in type_rules:
+        match = {}
+        if rule.pattern.match(ugraph, op_info, match) and \
+          rule.rewrite(ugraph, match) is not False:
+          num_rewrites += 1
+          break
+  return num_rewrites
+
+
+class PatternTransformer(Transformer):
+  """Transformer rewriting the matches of its `rewrite_rules`
+
+  The rules are applied on a fork of the graph and the number of
+  rewrites of last transform is kept in `num_rewrites`. Ops not needed
+  by the output nodes are pruned before matching, so rewrites checking
+  the consumers of an op (`output_nodes`) ignore dead branches.
+  """
+  REPORTS_CHANGES = True
+
+  def rewrite_rules(self):
+    raise NotImplementedError('You should overwrite rewrite_rules method for all pattern transformer')
+
+  def transform(self, ugraph):
+    op_type_index = self.get_analysis(OpTypeIndex, ugraph)
+    new_ugraph = ugraph.fork()
+    # nothing done if the graph is pruned already
+    self._prune_graph(new_ugraph, self.get_analysis(Reachability, ugraph))
+    self.num_rewrites = apply_rewrite_rules(new_ugraph,
+                                            self.rewrite_rules(),
+                                            op_type_index)
+    self.changed = self.num_rewrites > 0
+    return new_ugraph
@@ -1,10 +1,26 @@
+import logging
+import time
+
 from utensor_cgen.utils import NamescopedKWArgsParser
 
+from .analysis import AnalysisManager
 from .base import Transformer
+from .const_fold import ConstFoldTransformer
+from .cse import CSETransformer
 from .ns_transformer import (BatchNormTransformer, DropoutTransformer,
-                             InlineTransformer)
+                             IdentityTransformer, InlineTransformer)
 from .optimizer import RefCntOptimizer
-from .quantize import QuantizeTransformer
+from .quantize import (QuantizedFusionTransformer, QuantizeTransformer,
+                       RedundantQuantizationTransformer)
+from .schedule import ScheduleTransformer
+
+_logger = logging.getLogger('utensor-cli')
+
+
+def _graph_signature(ugraph):
+  return [(op_name, ugraph.ops_info[op_name].op_type,
+           [tensor.name for tensor in ugraph.ops_info[op_name].input_tensors])
+          for op_name in ugraph.topo_order]
 
 
 class TransformerPipeline(object):
@@ -13,11 +29,20 @@ class TransformerPipeline(object):
     RefCntOptimizer.METHOD_NAME: RefCntOptimizer,
     DropoutTransformer.METHOD_NAME: DropoutTransformer,
     BatchNormTransformer.METHOD_NAME: BatchNormTransformer,
+    IdentityTransformer.METHOD_NAME: IdentityTransformer,
     QuantizeTransformer.METHOD_NAME: QuantizeTransformer,
-    InlineTransformer.METHOD_NAME: InlineTransformer
+    RedundantQuantizationTransformer.METHOD_NAME: RedundantQuantizationTransformer,
+    QuantizedFusionTransformer.METHOD_NAME: QuantizedFusionTransformer,
+    InlineTransformer.METHOD_NAME: InlineTransformer,
+    ConstFoldTransformer.METHOD_NAME: ConstFoldTransformer,
+    CSETransformer.METHOD_NAME: CSETransformer,
+    ScheduleTransformer.METHOD_NAME: ScheduleTransformer
   }
 
-  def __init__(self, methods, kwargs):
+  # joins the methods of a group iterated to a fixed point
+  GROUP_SEP = '+'
+
+  def __init__(self, methods, kwargs, cache_analyses=True, max_iterations=10):
     """
     kwargs is a dict of following format:
     {
@@ -31,18 +56,135 @@ class TransformerPipeline(object):
     {
       'refcnt__kwarg': 3  # this is kwarg for RefCntOptimizer
     }
+
+    A method can be a group of methods joined by '+' (ex:
+    'identity+constfold+cse'), run repeatedly until none of them
+    changes the graph, for at most `max_iterations` iterations
+
+    If cache_analyses is True, graph analyses are shared between
+    transformers and only computed again after a transformer which
+    doesn't preserve them
     """
+    self.cache_analyses = cache_analyses
+    self.max_iterations = max_iterations
+    self.analysis_manager = None
+    # per stage stats of last transform, see `transform`
+    self.stats = []
     self._pipeline = []
+    # (method, transformers) of each stage
+    self._stages = []
     for method in methods:
-      trans_cls = self._TRANSFORMER_MAP[method]
-      trans_name = trans_cls.KWARGS_NAMESCOPE
-      parser = NamescopedKWArgsParser(trans_name, kwargs)
-      transformer = trans_cls(**parser.as_dict())
-      self._pipeline.append(transformer)
+      transformers = [self._create_transformer(group_method, kwargs)
+                      for group_method in method.split(self.GROUP_SEP)]
+      self._pipeline.extend(transformers)
+      self._stages.append((method, transformers))
+
+  def _create_transformer(self, method, kwargs):
+    trans_cls = self._TRANSFORMER_MAP[method]
+    trans_name = trans_cls.KWARGS_NAMESCOPE
+    parser = NamescopedKWArgsParser(trans_name, kwargs)
+    return trans_cls(**parser.as_dict())
   
   def transform(self, ugraph):
-    for transformer in self._pipeline:
-      ugraph = transformer.transform(ugraph)
+    """Run all transformers on `ugraph`
+
+    Stats of each stage are stored in `stats`: the transform method,
+    its total duration and the duration and number of ops removed of
+    the pruning after it (None if the transformer doesn't prune). Stats
+    of groups have no pruning stats but per iteration stats instead,
+    see `_transform_group`
+    """
+    self.analysis_manager = AnalysisManager(enabled=self.cache_analyses)
+    self.stats = []
+    try:
+      for method, transformers in self._stages:
+        if len(transformers) > 1:
+          ugraph = self._transform_group(method, transformers, ugraph)
+          continue
+        transformer = transformers[0]
+        transformer.analysis_manager = self.analysis_manager
+        start = time.time()
+        ugraph = transformer.transform(ugraph)
+        duration = time.time() - start
+        prune_stats = transformer.prune_stats or {}
+        self.stats.append({'method': transformer.METHOD_NAME,
+                           'time': duration,
+                           'prune_time': prune_stats.get('time', None),
+                           'ops_removed': prune_stats.get('ops_removed', None)})
+        if prune_stats:
+          _logger.debug('%s: %.4fs, pruning: %.4fs, %d ops removed',
+                        transformer.METHOD_NAME, duration,
+                        prune_stats['time'], prune_stats['ops_removed'])
+        else:
+          _logger.debug('%s: %.4fs', transformer.METHOD_NAME, duration)
+    finally:
+      for transformer in self._pipeline:
+        transformer.analysis_manager = None
+    return ugraph
+
+  def _transform_group(self, method, transformers, ugraph):
+    """Run `transformers` in order until none of them changes the graph
+
+    A transformer is run again only if the graph changed since it last
+    left it unchanged. Transformers report changes in `changed`; for
+    the ones which don't (`REPORTS_CHANGES`), the graph structure is
+    compared before and after. Passes are rerun on the whole graph: they
+    work on a fork of it, which costs a full copy anyway.
+
+    The stats of the group have the keys of other stages plus
+    `converged` and `iterations`, the list of the transformers run at
+    each iteration, with their durations, if they changed the graph and
+    the number of ops after them
+    """
+    for transformer in transformers:
+      transformer.analysis_manager = self.analysis_manager
+    start = time.time()
+    num_ops = len(ugraph.ops_info)
+    # indices of the transformers leaving the current graph unchanged
+    clean = set()
+    iterations = []
+    # structure of the current graph, None if not known
+    signature = None
+    while len(clean) < len(transformers) and len(iterations) < self.max_iterations:
+      iteration = []
+      for idx, transformer in enumerate(transformers):
+        if idx in clean:
+          continue
+        if not transformer.REPORTS_CHANGES and signature is None:
+          signature = _graph_signature(ugraph)
+        pass_start = time.time()
+        ugraph = transformer.transform(ugraph)
+        changed = transformer.changed
+        if not transformer.REPORTS_CHANGES:
+          new_signature = _graph_signature(ugraph)
+          changed = signature != new_signature
+          signature = new_signature
+        elif changed or (transformer.prune_stats or {}).get('ops_removed', 0):
+          signature = None
+        if changed:
+          clean = set()
+        else:
+          clean.add(idx)
+        iteration.append({'method': transformer.METHOD_NAME,
+                          'time': time.time() - pass_start,
+                          'changed': changed,
+                          'num_ops': len(ugraph.ops_info)})
+      iterations.append(iteration)
+      _logger.debug('%s: iteration %d, changed by: %s', method, len(iterations),
+                    ', '.join(stats['method'] for stats in iteration if stats['changed'])
+                    or 'none')
+    converged = len(clean) == len(transformers)
+    duration = time.time() - start
+    if not converged:
+      _logger.warning('%s: no fixed point after %d iterations', method, len(iterations))
+    self.stats.append({'method': method,
+                       'time': duration,
+                       'prune_time': None,
+                       'ops_removed': num_ops - len(ugraph.ops_info),
+                       'converged': converged,
+                       'iterations': iterations})
+    _logger.debug('%s: %.4fs, %d iterations, %d ops removed', method, duration,
+                  len(iterations), num_ops - len(ugraph.ops_info))
     return ugraph
   
   @property
@@ -59,4 +201,4 @@ class TransformerPipeline(object):
       "expecting Transformer type, get %s" % trans_cls
     assert method not in cls._TRANSFORMER_MAP or overwrite, \
       "Registering existing transformer without overwriting"
-    cls._TRANSFORMER_MAP[name] = trans_cls
+    cls._TRANSFORMER_MAP[method] = trans_cls
@@ -1,20 +1,499 @@
-from tensorflow.tools.graph_transforms import TransformGraph
+# -*- coding:utf8 -*-
+r"""Quantization
 
-from utensor_cgen.ir.base import uTensorGraph
+Float weights are stored as 8 bits integers and float ops having a
+quantized kernel are replaced by their quantized version, as done by
+the `quantize_weights` and `quantize_nodes` transforms of tensorflow
+graph_transforms, but on the graph directly (no conversion to a
+GraphDef and back).
+
+The Dequantize -> QuantizeV2 round trips left between consecutive
+quantized ops are removed by `RedundantQuantizationTransformer`, then
+quantized layers are fused by `QuantizedFusionTransformer`, a kernel
+followed by its requantization (and Relu) being one op.
+"""
+import logging
+from collections import namedtuple
+
+import numpy as np
+import tensorflow as tf
+
+from utensor_cgen.ir import OperationInfo, TensorInfo, uTensorGraph
+from utensor_cgen.ir.converter import AttrValueConverter
+from utensor_cgen.memory import tensor_nbytes
 
 from .base import Transformer
+from .pattern import OpPattern, PatternTransformer, RewriteRule
+from .utils import const_value, make_const_op
+
+__all__ = ['QuantizeTransformer', 'RedundantQuantizationTransformer',
+           'QuantizedFusionTransformer']
+
+_logger = logging.getLogger('utensor-cli')
+
+_FLOAT = np.dtype(np.float32)
+_INT32 = np.dtype(np.int32)
+_QUINT8 = np.dtype(tf.quint8.as_numpy_dtype)
+_QINT32 = np.dtype(tf.qint32.as_numpy_dtype)
+
+_QuantizedOp = namedtuple('_QuantizedOp', ['op_type', 'attrs_to_copy', 'type_attrs',
+                                           'output_dtype', 'unquantized_inputs',
+                                           'contiguous_min_max'])
+
+# float op type --> its quantized version, as in tensorflow quantize_nodes
+# - attrs_to_copy: attributes of the float op kept
+# - type_attrs: [(name, dtype), ...] of the quantized op
+# - unquantized_inputs: indices of inputs left as is (ex: shape of Reshape)
+# - contiguous_min_max: True if the min and max of each input are
+#   consecutive inputs, else all the mins are followed by all the maxs
+_QUANTIZED_OPS = {
+  'Add': _QuantizedOp('QuantizedAdd', [],
+                      [('T1', _QUINT8), ('T2', _QUINT8), ('Toutput', _QINT32)],
+                      _QINT32, [], True),
+  'AvgPool': _QuantizedOp('QuantizedAvgPool', ['ksize', 'strides', 'padding'],
+                          [('T', _QUINT8)], _QUINT8, [], True),
+  'BiasAdd': _QuantizedOp('QuantizedBiasAdd', [],
+                          [('T1', _QUINT8), ('T2', _QUINT8), ('out_type', _QINT32)],
+                          _QINT32, [], True),
+  'Concat': _QuantizedOp('QuantizedConcat', ['N'], [('T', _QUINT8)], _QUINT8, [0], False),
+  'Conv2D': _QuantizedOp('QuantizedConv2D', ['strides', 'padding'],
+                         [('Tinput', _QUINT8), ('Tfilter', _QUINT8), ('out_type', _QINT32)],
+                         _QINT32, [], True),
+  'MatMul': _QuantizedOp('QuantizedMatMul', ['transpose_a', 'transpose_b'],
+                         [('T1', _QUINT8), ('T2', _QUINT8), ('Toutput', _QINT32)],
+                         _QINT32, [], True),
+  'MaxPool': _QuantizedOp('QuantizedMaxPool', ['ksize', 'strides', 'padding'],
+                          [('T', _QUINT8)], _QUINT8, [], True),
+  'Mul': _QuantizedOp('QuantizedMul', [],
+                      [('T1', _QUINT8), ('T2', _QUINT8), ('Toutput', _QINT32)],
+                      _QINT32, [], True),
+  'Relu': _QuantizedOp('QuantizedRelu', [], [('Tinput', _QUINT8)], _QUINT8, [], True),
+  'Relu6': _QuantizedOp('QuantizedRelu6', [], [('Tinput', _QUINT8)], _QUINT8, [], True),
+  'Reshape': _QuantizedOp('QuantizedReshape', [], [('T', _QUINT8)], _QUINT8, [1], True),
+  'ResizeBilinear': _QuantizedOp('QuantizedResizeBilinear', ['align_corners'],
+                                 [('T', _QUINT8)], _QUINT8, [1], True),
+}
+# exported by recent versions of tensorflow instead of Add
+_QUANTIZED_OPS['AddV2'] = _QUANTIZED_OPS['Add']
+
+
+def _attr(value_name, value):
+  return AttrValueConverter.__utensor_generic_type__(value_name=value_name, value=value)
+
+
+def _round(values):
+  # half away from zero, as std::round
+  return np.sign(values) * np.floor(np.abs(values) + 0.5)
+
+
+def _quantize_weight(value):
+  """Return (quantized, min, max), the uint8 values and the range of
+  `value`, the range includes 0
+
+  Values are quantized in the MIN_FIRST mode, as tensorflow
+  quantize_weights
+  """
+  value = np.asarray(value, dtype=np.float32)
+  min_value, max_value = value.min(), value.max()
+  min_value = np.minimum(min_value, 0).astype(np.float32)
+  max_value = np.maximum(max_value, 0).astype(np.float32)
+  # all zeros
+  max_value = np.where(min_value == max_value, min_value + 1, max_value).astype(np.float32)
+  range_scale = 255.0 / (max_value.astype(np.float64) - min_value)
+  quantized = _round(value * range_scale) - _round(min_value * range_scale)
+  return np.clip(quantized, 0, 255).astype(np.uint8), min_value, max_value
 
-__all__ = ['QuantizeTransformer']
 
 class QuantizeTransformer(Transformer):
+  """Quantize weights and ops to 8 bits
 
+  minimum_size : int
+      float constants of fewer elements are kept in float
+
+  A quantized op is fed by QuantizeV2 ops computing the ranges of its
+  float inputs at runtime, quantized weights are fed to it directly. Its
+  32 bits outputs are requantized to 8 bits by RequantizationRange and
+  Requantize. It's followed by a Dequantize op of the name of the float
+  op, so the consumers of the float op are not changed.
+
+  Stats of the last transformation are kept in `quantize_stats`.
+  """
   METHOD_NAME = 'quantize'
   KWARGS_NAMESCOPE = '_quantize'
 
+  def __init__(self, minimum_size=1024, **kwargs):
+    self.minimum_size = minimum_size
+    self.quantize_stats = None
+
+  def transform(self, ugraph):
+    new_ugraph = ugraph.fork()
+    self.quantize_stats = {'weights_quantized': 0,
+                           'weight_bytes_before': 0,
+                           'weight_bytes_after': 0,
+                           'ops_quantized': 0}
+    weights = self._quantize_weights(new_ugraph)
+    self._quantize_ops(new_ugraph, weights)
+    _logger.debug('quantize: %(weights_quantized)d weights (%(weight_bytes_before)d -> '
+                  '%(weight_bytes_after)d bytes), %(ops_quantized)d ops quantized',
+                  self.quantize_stats)
+    return new_ugraph
+
+  @staticmethod
+  def _is_quantizable(op_info):
+    spec = _QUANTIZED_OPS.get(op_info.op_type, None)
+    if spec is None or len(op_info.output_tensors) != 1 or \
+      op_info.output_tensors[0].dtype != _FLOAT:
+      return False
+    # quantized kernels are NHWC only
+    if 'data_format' in op_info.op_attr and \
+      op_info.op_attr['data_format'].value not in [b'NHWC', 'NHWC']:
+      return False
+    return all(tensor.dtype == _FLOAT
+               for idx, tensor in enumerate(op_info.input_tensors)
+               if idx not in spec.unquantized_inputs)
+
+  def _quantize_weights(self, ugraph):
+    """Replace float Const ops by Dequantize ops of quantized constants
+
+    Return a dict, name of a Dequantize op --> its input tensors
+    """
+    weights = {}
+    for op_name in list(ugraph.topo_order):
+      op_info = ugraph.ops_info[op_name]
+      if op_info.op_type != 'Const' or op_info.output_tensors[0].dtype != _FLOAT:
+        continue
+      value = op_info.op_attr['value'].value.np_array
+      if value.size < self.minimum_size:
+        continue
+      quantized, min_value, max_value = _quantize_weight(value)
+      quantized_op = make_const_op(ugraph, '{}_quantized_const'.format(op_name),
+                                   quantized, dtype=_QUINT8)
+      min_op = make_const_op(ugraph, '{}_quantized_min'.format(op_name), min_value)
+      max_op = make_const_op(ugraph, '{}_quantized_max'.format(op_name), max_value)
+      op_attr = {'T': _attr('type', _QUINT8),
+                 'mode': _attr('s', b'MIN_FIRST')}
+      in_tensors = [quantized_op.output_tensors[0],
+                    min_op.output_tensors[0],
+                    max_op.output_tensors[0]]
+      # same name, replacing the Const op
+      OperationInfo(name=op_name,
+                    input_tensors=in_tensors,
+                    output_tensors=op_info.output_tensors,
+                    op_type='Dequantize',
+                    backend=op_info.backend,
+                    op_attr=op_attr,
+                    ugraph=ugraph)
+      weights[op_name] = in_tensors
+      self.quantize_stats['weights_quantized'] += 1
+      self.quantize_stats['weight_bytes_before'] += value.nbytes
+      self.quantize_stats['weight_bytes_after'] += (quantized.nbytes + min_value.nbytes +
+                                                    max_value.nbytes)
+    return weights
+
+  def _quantize_ops(self, ugraph, weights):
+    for op_name in list(ugraph.topo_order):
+      op_info = ugraph.ops_info[op_name]
+      if not self._is_quantizable(op_info):
+        continue
+      spec = _QUANTIZED_OPS[op_info.op_type]
+      prefix = '{}_eightbit'.format(op_name)
+      values = []
+      ranges = []
+      for idx, tensor in enumerate(op_info.input_tensors):
+        if idx in spec.unquantized_inputs:
+          values.append(tensor)
+          continue
+        if tensor.op_name in weights:
+          value, min_value, max_value = weights[tensor.op_name]
+        else:
+          value, min_value, max_value = self._quantize_input(ugraph, prefix, tensor)
+        values.append(value)
+        ranges.append((min_value, max_value))
+      if spec.contiguous_min_max:
+        range_tensors = [tensor for min_max in ranges for tensor in min_max]
+      else:
+        range_tensors = [min_value for min_value, _ in ranges] + \
+                        [max_value for _, max_value in ranges]
+      op_attr = dict((key, op_info.op_attr[key])
+                     for key in spec.attrs_to_copy if key in op_info.op_attr)
+      for key, dtype in spec.type_attrs:
+        op_attr[key] = _attr('type', dtype)
+      shape = op_info.output_tensors[0].shape
+      quantized_name = '{}/eightbit'.format(op_name)
+      quantized_op = OperationInfo(name=quantized_name,
+                                   input_tensors=values + range_tensors,
+                                   output_tensors=self._quantized_outputs(ugraph,
+                                                                          quantized_name,
+                                                                          spec.output_dtype,
+                                                                          shape),
+                                   op_type=spec.op_type,
+                                   backend=op_info.backend,
+                                   op_attr=op_attr,
+                                   ugraph=ugraph)
+      out_tensors = quantized_op.output_tensors
+      if spec.output_dtype == _QINT32:
+        out_tensors = self._requantize(ugraph, quantized_name, out_tensors, shape)
+      # same name, replacing the float op
+      OperationInfo(name=op_name,
+                    input_tensors=out_tensors,
+                    output_tensors=op_info.output_tensors,
+                    op_type='Dequantize',
+                    backend=op_info.backend,
+                    op_attr={'T': _attr('type', _QUINT8),
+                             'mode': _attr('s', b'MIN_FIRST')},
+                    ugraph=ugraph)
+      self.quantize_stats['ops_quantized'] += 1
+
+  @staticmethod
+  def _quantized_outputs(ugraph, op_name, dtype, shape):
+    """Tensors of a quantized value and of its min and max
+    """
+    return [TensorInfo(name=u'{}:{}'.format(op_name, idx),
+                       op_name=op_name,
+                       dtype=dtype if idx == 0 else _FLOAT,
+                       shape=shape if idx == 0 else [],
+                       ugraph=ugraph)
+            for idx in range(3)]
+
+  @classmethod
+  def _quantize_input(cls, ugraph, prefix, tensor):
+    """Add ops computing the range of `tensor` and quantizing it, return
+    the quantized value, min and max tensors
+    """
+    name = '{}/{}'.format(prefix, tensor.name.replace(':', '__port__'))
+    reshape_dims = make_const_op(ugraph, '{}/reshape_dims'.format(name),
+                                 np.array([-1], dtype=np.int32))
+    reduction_dims = make_const_op(ugraph, '{}/reduction_dims'.format(name),
+                                   np.array([0], dtype=np.int32))
+    if tensor.shape is None or None in tensor.shape:
+      flat_shape = [None]
+    else:
+      flat_shape = [int(np.prod(tensor.shape, dtype=np.int64))]
+    reshape_name = '{}/reshape'.format(name)
+    reshape = OperationInfo(name=reshape_name,
+                            input_tensors=[tensor, reshape_dims.output_tensors[0]],
+                            output_tensors=[TensorInfo(name=u'{}:0'.format(reshape_name),
+                                                       op_name=reshape_name,
+                                                       dtype=_FLOAT,
+                                                       shape=flat_shape,
+                                                       ugraph=ugraph)],
+                            op_type='Reshape',
+                            backend=tensor.op.backend,
+                            op_attr={'T': _attr('type', _FLOAT),
+                                     'Tshape': _attr('type', _INT32)},
+                            ugraph=ugraph)
+    range_tensors = []
+    for op_type in ['Min', 'Max']:
+      range_name = '{}/{}'.format(name, op_type.lower())
+      range_op = OperationInfo(name=range_name,
+                               input_tensors=[reshape.output_tensors[0],
+                                              reduction_dims.output_tensors[0]],
+                               output_tensors=[TensorInfo(name=u'{}:0'.format(range_name),
+                                                          op_name=range_name,
+                                                          dtype=_FLOAT,
+                                                          shape=[],
+                                                          ugraph=ugraph)],
+                               op_type=op_type,
+                               backend=tensor.op.backend,
+                               op_attr={'T': _attr('type', _FLOAT),
+                                        'Tidx': _attr('type', _INT32),
+                                        'keep_dims': _attr('b', False)},
+                               ugraph=ugraph)
+      range_tensors.append(range_op.output_tensors[0])
+    quantize_name = '{}/quantize'.format(name)
+    quantize = OperationInfo(name=quantize_name,
+                             input_tensors=[tensor] + range_tensors,
+                             output_tensors=cls._quantized_outputs(ugraph, quantize_name,
+                                                                   _QUINT8, tensor.shape),
+                             op_type='QuantizeV2',
+                             backend=tensor.op.backend,
+                             op_attr={'T': _attr('type', _QUINT8),
+                                      'mode': _attr('s', b'MIN_FIRST')},
+                             ugraph=ugraph)
+    return quantize.output_tensors
+
+  @classmethod
+  def _requantize(cls, ugraph, quantized_name, in_tensors, shape):
+    """Add ops requantizing 32 bits `in_tensors` (value, min, max) to
+    8 bits, return the requantized tensors
+    """
+    range_name = '{}/requant_range'.format(quantized_name)
+    range_op = OperationInfo(name=range_name,
+                             input_tensors=in_tensors,
+                             output_tensors=[TensorInfo(name=u'{}:{}'.format(range_name, idx),
+                                                        op_name=range_name,
+                                                        dtype=_FLOAT,
+                                                        shape=[],
+                                                        ugraph=ugraph)
+                                             for idx in range(2)],
+                             op_type='RequantizationRange',
+                             backend=in_tensors[0].op.backend,
+                             op_attr={'Tinput': _attr('type', _QINT32)},
+                             ugraph=ugraph)
+    requantize_name = '{}/requantize'.format(quantized_name)
+    requantize = OperationInfo(name=requantize_name,
+                               input_tensors=in_tensors + range_op.output_tensors,
+                               output_tensors=cls._quantized_outputs(ugraph, requantize_name,
+                                                                     _QUINT8, shape),
+                               op_type='Requantize',
+                               backend=in_tensors[0].op.backend,
+                               op_attr={'Tinput': _attr('type', _QINT32),
+                                        'out_type': _attr('type', _QUINT8)},
+                               ugraph=ugraph)
+    return requantize.output_tensors
+
+
+class RedundantQuantizationTransformer(PatternTransformer):
+  """Remove the Dequantize -> QuantizeV2 round trips between quantized
+  ops, each costing a float copy of the activation
+
+  If QuantizeV2 quantizes to the range of the data (Min and Max of the
+  flattened Dequantize output, as inserted by `quantize`), its consumers
+  get the quantized tensor and range of the Dequantize directly. The data
+  is within this range, so values are unchanged.
+
+  Round trips to a constant (calibrated) range are kept: Requantize only
+  takes 32 bits inputs. Dequantize ops still consumed by float ops are
+  kept. Stats of the last transformation are kept in `removal_stats`.
+  """
+  METHOD_NAME = 'redundant_quant'
+  KWARGS_NAMESCOPE = '_redundant_quant'
+
+  def __init__(self, **kwargs):
+    self.removal_stats = None
+
+  def transform(self, ugraph):
+    self.removal_stats = {'pairs_removed': 0}
+    new_ugraph = PatternTransformer.transform(self, ugraph)
+    _logger.debug('redundant_quant: %(pairs_removed)d Dequantize -> QuantizeV2 removed',
+                  self.removal_stats)
+    return new_ugraph
+
+  def rewrite_rules(self):
+    dequantize = OpPattern('Dequantize', name='dequantize', predicate=self._is_min_first)
+    flat = OpPattern('Reshape', name='flat', inputs=[dequantize, OpPattern('Const')])
+    data_range = [OpPattern(op_type, name=op_type.lower(), inputs=[flat, OpPattern('Const')])
+                  for op_type in ['Min', 'Max']]
+    return [RewriteRule(OpPattern('QuantizeV2', name='quantize', predicate=self._is_min_first,
+                                  inputs=[dequantize] + data_range),
+                        self._remove_pair)]
+
+  @staticmethod
+  def _is_min_first(op_info):
+    # quint8, one range per tensor, MIN_FIRST (not the default mode)
+    op_attr = op_info.op_attr
+    if 'mode' not in op_attr or 'T' not in op_attr or \
+      ('axis' in op_attr and op_attr['axis'].value != -1):
+      return False
+    # type enum if read from a GraphDef
+    return (op_attr['mode'].value in [b'MIN_FIRST', 'MIN_FIRST'] and
+            tf.as_dtype(op_attr['T'].value) == tf.quint8)
+
+  def _remove_pair(self, ugraph, match):
+    quantize = match['quantize']
+    if quantize.name in ugraph.output_nodes:
+      return False
+    # global min and max of the data
+    if not np.array_equal(const_value(match['flat'].input_tensors[1].op), [-1]):
+      return False
+    for key in ['min', 'max']:
+      reduce_op = match[key]
+      if not np.array_equal(const_value(reduce_op.input_tensors[1].op), [0]) or \
+        ('keep_dims' in reduce_op.op_attr and reduce_op.op_attr['keep_dims'].value):
+        return False
+    for tensor, new_tensor in zip(quantize.output_tensors,
+                                  match['dequantize'].input_tensors):
+      ugraph.replace_tensor(tensor, new_tensor)
+    self.removal_stats['pairs_removed'] += 1
+
+
+def _is_outputs_of(tensors, op_info):
+  """True if `tensors` are the first outputs of `op_info`, in order
+  """
+  return all(tensor.op_name == op_info.name and tensor.output_index == idx
+             for idx, tensor in enumerate(tensors))
+
+
+class QuantizedFusionTransformer(PatternTransformer):
+  """Fuse a quantized MatMul/Conv2D with the RequantizationRange and
+  Requantize ops bringing its 32 bits outputs back to 8 bits, and with
+  the QuantizedRelu consuming them, if any
+
+    QuantizedMatMul -> RequantizationRange -> Requantize [-> QuantizedRelu]
+
+  becomes one QuantizedFusedMatMul op (QuantizedFusedConv2D for
+  QuantizedConv2D) with the inputs of the kernel and the outputs of the
+  last op, its `fused_relu` attribute telling if the Relu is fused.
+  The 32 bits outputs and the ranges are not allocated anymore.
+
+  The intermediate ops must not be consumed elsewhere. Stats of the
+  last transformation are kept in `fusion_stats`.
+  """
+  METHOD_NAME = 'quant_fusion'
+  KWARGS_NAMESCOPE = '_quant_fusion'
+
+  FUSED_OP_TYPES = {
+    'QuantizedMatMul': 'QuantizedFusedMatMul',
+    'QuantizedConv2D': 'QuantizedFusedConv2D',
+  }
+
+  def __init__(self, **kwargs):
+    self.fusion_stats = None
+
   def transform(self, ugraph):
-    graph_def = ugraph.graph_def
-    quant_graph_def = TransformGraph(input_graph_def=graph_def,
-                                     inputs=[],
-                                     outputs=ugraph.output_nodes,
-                                     transforms=["quantize_weights", "quantize_nodes"])
-    return uTensorGraph(graph=quant_graph_def, output_nodes=ugraph.output_nodes)
+    self.fusion_stats = {'layers_fused': 0, 'ops_removed': 0, 'bytes_removed': 0}
+    new_ugraph = PatternTransformer.transform(self, ugraph)
+    _logger.debug('quant_fusion: %(layers_fused)d layers fused, %(ops_removed)d ops '
+                  'and %(bytes_removed)d bytes of tensors removed', self.fusion_stats)
+    return new_ugraph
+
+  def rewrite_rules(self):
+    kernel = OpPattern(list(self.FUSED_OP_TYPES.keys()), name='kernel')
+    requant_range = OpPattern('RequantizationRange', name='range',
+                              inputs=[kernel, kernel, kernel])
+    requantize = OpPattern('Requantize', name='requantize',
+                           inputs=[kernel, kernel, kernel, requant_range, requant_range])
+    relu = OpPattern('QuantizedRelu', name='relu',
+                     inputs=[requantize, requantize, requantize])
+    # longest chains first
+    return [RewriteRule(relu, self._fuse), RewriteRule(requantize, self._fuse)]
+
+  def _fuse(self, ugraph, match):
+    kernel, requant_range, requantize = match['kernel'], match['range'], match['requantize']
+    relu = match.get('relu', None)
+    chain = [kernel, requant_range, requantize]
+    if relu is not None:
+      chain.append(relu)
+    last_op = chain[-1]
+    if not last_op.output_nodes and last_op.name not in ugraph.output_nodes:
+      # the Requantize of a fused Relu
+      return False
+    if not _is_outputs_of(requant_range.input_tensors, kernel) or \
+      not _is_outputs_of(requantize.input_tensors[:3], kernel) or \
+      not _is_outputs_of(requantize.input_tensors[3:], requant_range) or \
+      (relu is not None and not _is_outputs_of(relu.input_tensors, requantize)):
+      return False
+    # intermediate ops are consumed by the next ops of the chain only
+    chain_names = set(op_info.name for op_info in chain)
+    for op_info in chain[:-1]:
+      if op_info.name in ugraph.output_nodes or \
+        any(out_op.name not in chain_names for out_op in op_info.output_nodes):
+        return False
+    # attributes set by other transformers (ex: ref counts) are dropped
+    op_attr = dict((key, kernel.op_attr[key]) for key in kernel.op_attr
+                   if not uTensorGraph.KWPARSER_PATTERN.match(key))
+    op_attr['out_type'] = _attr('type', last_op.output_tensors[0].dtype)
+    op_attr['fused_relu'] = _attr('b', relu is not None)
+    # same name, replacing the last op
+    OperationInfo(name=last_op.name,
+                  input_tensors=kernel.input_tensors,
+                  output_tensors=last_op.output_tensors,
+                  op_type=self.FUSED_OP_TYPES[kernel.op_type],
+                  backend=kernel.backend,
+                  op_attr=op_attr,
+                  ugraph=ugraph)
+    self.fusion_stats['layers_fused'] += 1
+    self.fusion_stats['ops_removed'] += len(chain) - 1
+    self.fusion_stats['bytes_removed'] += sum(tensor_nbytes(tensor) or 0
+                                              for op_info in chain[:-1]
+                                              for tensor in op_info.output_tensors)
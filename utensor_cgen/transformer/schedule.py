@@ -0,0 +1,263 @@
+# -*- coding:utf8 -*-
+r"""Memory-aware Operator Scheduling
+
+Reorder `topo_order`, the order ops are evaluated in the generated
+code, to minimize the peak bytes of live RAM tensors (see
+`utensor_cgen.memory`).
+"""
+import logging
+
+from utensor_cgen.memory import (NOT_PLANNED_OP_TYPES, peak_live_bytes,
+                                 tensor_lifetimes, tensor_nbytes)
+
+from .analysis import OpTypeIndex, Reachability, RefCounts, TensorConsumers
+from .base import Transformer
+
+__all__ = ['ScheduleTransformer']
+
+_logger = logging.getLogger('utensor-cli')
+
+
+class _ScheduleProblem(object):
+  """Dependencies and tensor bytes of the ops allocating RAM tensors
+
+  Ops not allocating RAM tensors (Const, Placeholder, ...) are left out
+  and put back right before their first consumer by `full_order`.
+  """
+
+  def __init__(self, ugraph):
+    self.ugraph = ugraph
+    lifetimes = tensor_lifetimes(ugraph)
+    self.ops = [op_name for op_name in ugraph.topo_order
+                if ugraph.ops_info[op_name].op_type not in NOT_PLANNED_OP_TYPES]
+    index = dict((op_name, idx) for idx, op_name in enumerate(self.ops))
+    output_tensors = set(tensor.name for op_name in ugraph.output_nodes
+                         for tensor in ugraph.ops_info[op_name].output_tensors)
+    # per op: indices of ops producing its inputs, bytes of its outputs
+    self.preds = []
+    self.out_bytes = []
+    # per op: (tensor bytes, indices of its consumers) of input tensors
+    # and of outputs never consumed
+    self.releases = [[] for _ in self.ops]
+    consumers = {}
+    for op_name in self.ops:
+      op_info = ugraph.ops_info[op_name]
+      for tensor in op_info.input_tensors:
+        if tensor.name in lifetimes:
+          consumers.setdefault(tensor.name, set()).add(index[op_name])
+    for idx, op_name in enumerate(self.ops):
+      op_info = ugraph.ops_info[op_name]
+      self.preds.append(set(index[tensor.op_name] for tensor in op_info.input_tensors
+                            if tensor.op_name in index))
+      nbytes = 0
+      for tensor in op_info.output_tensors:
+        tensor_bytes = tensor_nbytes(tensor) or 0
+        nbytes += tensor_bytes
+        if tensor.name in output_tensors:
+          continue
+        tensor_consumers = frozenset(consumers.get(tensor.name, [idx]))
+        for consumer in tensor_consumers:
+          self.releases[consumer].append((tensor_bytes, tensor_consumers))
+      self.out_bytes.append(nbytes)
+
+  def released_bytes(self, idx, done):
+    """Bytes freed after running op `idx`, `done` is the set of ops
+    run before it
+    """
+    return sum(nbytes for nbytes, consumers in self.releases[idx]
+               if all(consumer == idx or consumer in done for consumer in consumers))
+
+  def full_order(self, schedule):
+    """Names of all ops in the graph, given the order of `self.ops`
+    """
+    order = []
+    added = set()
+
+    def add_free_inputs(op_name):
+      for tensor in self.ugraph.ops_info[op_name].input_tensors:
+        if tensor.op_name not in added and \
+          self.ugraph.ops_info[tensor.op_name].op_type in NOT_PLANNED_OP_TYPES:
+          added.add(tensor.op_name)
+          order.append(tensor.op_name)
+
+    for idx in schedule:
+      op_name = self.ops[idx]
+      add_free_inputs(op_name)
+      added.add(op_name)
+      order.append(op_name)
+    # not consumed by any scheduled op (ex: output nodes)
+    for op_name in self.ugraph.topo_order:
+      if op_name not in added:
+        order.append(op_name)
+    return order
+
+
+def _schedule_greedy(problem):
+  """At each step, run the ready op increasing live bytes the least,
+  ties broken by the original order
+  """
+  num_ops = len(problem.ops)
+  num_pending = [len(preds) for preds in problem.preds]
+  succs = [[] for _ in range(num_ops)]
+  for idx, preds in enumerate(problem.preds):
+    for pred in preds:
+      succs[pred].append(idx)
+  ready = set(idx for idx in range(num_ops) if not num_pending[idx])
+  done = set()
+  schedule = []
+  while ready:
+    best = min(ready, key=lambda idx: (problem.out_bytes[idx] -
+                                       problem.released_bytes(idx, done), idx))
+    ready.remove(best)
+    done.add(best)
+    schedule.append(best)
+    for succ in succs[best]:
+      num_pending[succ] -= 1
+      if not num_pending[succ]:
+        ready.add(succ)
+  return schedule
+
+
+def _schedule_dfs(problem):
+  """Depth first, the producers of the inputs of an op visited by
+  decreasing (peak bytes - output bytes) of their subgraphs, as in
+  Sethi-Ullman register allocation. Subgraphs are estimated as trees
+  """
+  num_ops = len(problem.ops)
+  # estimated peak bytes of running the subgraph of each op
+  peaks = []
+  pred_orders = []
+  for idx in range(num_ops):
+    preds = sorted(problem.preds[idx],
+                   key=lambda pred: (problem.out_bytes[pred] - peaks[pred], pred))
+    peak = running = 0
+    for pred in preds:
+      peak = max(peak, running + peaks[pred])
+      running += problem.out_bytes[pred]
+    peaks.append(max(peak, running + problem.out_bytes[idx]))
+    pred_orders.append(preds)
+  has_succs = set(pred for preds in problem.preds for pred in preds)
+  sinks = sorted((idx for idx in range(num_ops) if idx not in has_succs),
+                 key=lambda idx: (problem.out_bytes[idx] - peaks[idx], idx))
+  visited = set()
+  schedule = []
+  for sink in sinks:
+    visited.add(sink)
+    stack = [(sink, iter(pred_orders[sink]))]
+    while stack:
+      idx, preds = stack[-1]
+      for pred in preds:
+        if pred not in visited:
+          visited.add(pred)
+          stack.append((pred, iter(pred_orders[pred])))
+          break
+      else:
+        stack.pop()
+        schedule.append(idx)
+  return schedule
+
+
+def _schedule_exact(problem, max_states):
+  """Dynamic programming over sets of ops already run, the live bytes
+  only depend on the set. Return None if more than `max_states` sets
+  are reachable
+  """
+  num_ops = len(problem.ops)
+  pred_masks = [sum(1 << pred for pred in preds) for preds in problem.preds]
+  # set of ops run (bitmask) --> (peak, live bytes, previous set, last op)
+  layer = {0: (0, 0, None, None)}
+  history = []
+  num_states = 1
+  for _ in range(num_ops):
+    next_layer = {}
+    for state, (peak, live, _, _) in layer.items():
+      done = None
+      for idx in range(num_ops):
+        if state >> idx & 1 or pred_masks[idx] & state != pred_masks[idx]:
+          continue
+        if done is None:
+          done = set(i for i in range(num_ops) if state >> i & 1)
+        step_bytes = live + problem.out_bytes[idx]
+        new_state = state | 1 << idx
+        new_peak = max(peak, step_bytes)
+        if new_state not in next_layer or new_peak < next_layer[new_state][0]:
+          next_layer[new_state] = (new_peak,
+                                   step_bytes - problem.released_bytes(idx, done),
+                                   state, idx)
+    num_states += len(next_layer)
+    if num_states > max_states:
+      return None
+    history.append(layer)
+    layer = next_layer
+  history.append(layer)
+  # walk back from the set of all ops
+  schedule = []
+  state = (1 << num_ops) - 1
+  for layer in reversed(history[1:]):
+    _, _, prev_state, idx = layer[state]
+    schedule.append(idx)
+    state = prev_state
+  return schedule[::-1]
+
+
+class ScheduleTransformer(Transformer):
+  """Reorder ops to minimize the peak bytes of live RAM tensors
+
+  mode : str
+      'heuristic' keeps the better of a greedy list scheduling and a
+      depth first order visiting costly subgraphs first, 'exact' finds an
+      optimal order by dynamic programming for graphs of at most
+      `max_exact_ops` ops allocating RAM tensors (and falls back to the
+      heuristic for larger graphs)
+  max_exact_ops : int
+  max_states : int
+      the exact search falls back to the heuristic if it visits more
+      sets of ops
+
+  The original order is kept if it's not worse. Peak live bytes before
+  and after are kept in `schedule_stats`. The order is reset if the
+  graph is modified later, so it should be one of the last methods.
+  """
+  METHOD_NAME = 'schedule'
+  KWARGS_NAMESCOPE = '_utensor_schedule'
+  # only the order of ops is changed
+  PRESERVED_ANALYSES = (TensorConsumers, RefCounts, Reachability, OpTypeIndex)
+
+  def __init__(self, mode='heuristic', max_exact_ops=24, max_states=200000, **kwargs):
+    if mode not in ['heuristic', 'exact']:
+      raise ValueError('unknown scheduling mode: {}'.format(mode))
+    self.prune_graph = False
+    self.mode = mode
+    self.max_exact_ops = max_exact_ops
+    self.max_states = max_states
+    self.schedule_stats = None
+
+  def transform(self, ugraph):
+    new_ugraph = ugraph.fork()
+    problem = _ScheduleProblem(new_ugraph)
+    peak_before = peak_live_bytes(new_ugraph)
+    schedule = None
+    mode = self.mode
+    if mode == 'exact':
+      if len(problem.ops) <= self.max_exact_ops:
+        schedule = _schedule_exact(problem, self.max_states)
+      if schedule is None:
+        _logger.warning('schedule: graph too large for exact scheduling, using heuristic')
+        mode = 'heuristic'
+    if schedule is None:
+      # the better of the heuristics
+      orders = [problem.full_order(_schedule_greedy(problem)),
+                problem.full_order(_schedule_dfs(problem))]
+      order = min(orders, key=lambda order: peak_live_bytes(new_ugraph, order))
+    else:
+      order = problem.full_order(schedule)
+    peak_after = peak_live_bytes(new_ugraph, order)
+    if peak_after < peak_before:
+      new_ugraph.topo_order = order
+    else:
+      peak_after = peak_before
+    self.schedule_stats = {'mode': mode,
+                           'peak_before': peak_before,
+                           'peak_after': peak_after}
+    _logger.debug('schedule (%s): peak live bytes %d -> %d', mode, peak_before, peak_after)
+    return new_ugraph
@@ -0,0 +1,86 @@
+# -*- coding:utf8 -*-
+r"""Helpers for transformers building ops
+"""
+import numpy as np
+from tensorflow.python.framework import op_def_registry
+
+from utensor_cgen.ir import OperationInfo, TensorInfo
+from utensor_cgen.ir.converter import (AttrValueConverter,
+                                       TensorProtoConverter)
+
+__all__ = ['attr_value', 'const_value', 'is_stateful', 'make_const_op', 'CONST_OP_TYPES']
+
+# op types whose output can be resolved to a constant array
+CONST_OP_TYPES = ['Const', 'Identity']
+# not stateful in tensorflow, but their outputs are not computed from their inputs
+_NON_PURE_OP_TYPES = ['Placeholder', 'PlaceholderWithDefault', 'NoOp']
+
+
+def attr_value(op_info, name, default=None):
+  """The value of the attribute `name` of `op_info`, `default` if the
+  attribute is not set (ex: default attributes stripped from the graph)
+  """
+  attr = op_info.op_attr.get(name, None)
+  if attr is None:
+    return default
+  return attr.value
+
+
+def _registered_op_def(op_type):
+  if hasattr(op_def_registry, 'get'):
+    return op_def_registry.get(op_type)
+  return op_def_registry.get_registered_ops().get(op_type, None)
+
+
+def is_stateful(op_info):
+  """True if the outputs of `op_info` are not a function of its inputs
+  and attributes: placeholders and ops registered as stateful in
+  tensorflow (variables, random ops, `Print`, `Assert`, ...). Op types
+  unknown to tensorflow are not stateful
+  """
+  if op_info.op_type in _NON_PURE_OP_TYPES:
+    return True
+  op_def = _registered_op_def(op_info.op_type)
+  return op_def is not None and op_def.is_stateful
+
+
+def const_value(op_info):
+  """The numpy array of a Const op, or of the Const op read through
+  Identity ops (ex: `weight/read` of a frozen variable). None if the
+  value is not constant
+  """
+  while op_info is not None and op_info.op_type == 'Identity':
+    op_info = op_info.input_tensors[0].op
+  if op_info is None or op_info.op_type != 'Const':
+    return None
+  return op_info.op_attr['value'].value.np_array
+
+
+def make_const_op(ugraph, name, np_array, dtype=None):
+  """Add a Const op of name `name` with value `np_array` to `ugraph`
+
+  `dtype` defaults to the dtype of `np_array`, it differs for quantized
+  types (ex: quint8 values are stored in an uint8 array)
+  """
+  np_array = np.asarray(np_array)
+  if dtype is None:
+    dtype = np_array.dtype
+  tensor = TensorProtoConverter.__utensor_generic_type__(np_array=np_array, dtype=dtype)
+  op_attr = {
+    'value': AttrValueConverter.__utensor_generic_type__(value_name='tensor',
+                                                         value=tensor),
+    'dtype': AttrValueConverter.__utensor_generic_type__(value_name='type',
+                                                         value=dtype),
+  }
+  out_tensor = TensorInfo(name=u'{}:0'.format(name),
+                          op_name=name,
+                          dtype=dtype,
+                          shape=list(np_array.shape),
+                          ugraph=ugraph)
+  return OperationInfo(name=name,
+                       input_tensors=[],
+                       output_tensors=[out_tensor],
+                       op_type='Const',
+                       backend='tensorflow',
+                       op_attr=op_attr,
+                       ugraph=ugraph)
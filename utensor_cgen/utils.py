@@ -8,7 +8,6 @@ import numpy as np
 import tensorflow as tf
 from click.types import ParamType
 from tensorflow.python.framework import graph_util
-from tensorflow.tools.graph_transforms import TransformGraph
 
 from utensor_cgen.logger import logger
 
@@ -0,0 +1,45 @@
+# -*- coding:utf8 -*-
+r"""Weight Deduplication
+
+Constants of the same dtype, shape and bytes (ex: zero initialized
+biases, tied embeddings or shared filters) are written once by the code
+generator: the idx file or the inline array of the first of them is
+referenced by the tensors of the others.
+"""
+import hashlib
+
+import numpy as np
+
+__all__ = ['SharedWeights']
+
+
+class SharedWeights(object):
+  """Payloads of the constants written so far
+
+  num_shared : int
+      constants referencing the payload of a previous constant
+  bytes_saved : int
+      bytes of the payloads not written
+  """
+
+  def __init__(self):
+    # (kind, dtype, shape, digest) --> name of the payload
+    self._names = {}
+    self.num_shared = 0
+    self.bytes_saved = 0
+
+  def get_name(self, kind, np_array, name):
+    """Name of the payload of `np_array`, `name` if no constant of the
+    same `kind` (ex: 'idx', 'inline') has the same value yet, else
+    the name given with that constant
+    """
+    np_array = np.ascontiguousarray(np_array)
+    key = (kind, np_array.dtype, np_array.shape,
+           hashlib.sha1(np_array.tobytes()).digest())
+    shared_name = self._names.get(key, None)
+    if shared_name is None:
+      self._names[key] = name
+      return name
+    self.num_shared += 1
+    self.bytes_saved += np_array.nbytes
+    return shared_name